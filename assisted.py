@@ -0,0 +1,74 @@
+import threading
+from typing import Optional, Tuple
+
+
+class _ForwardCounter:
+    """Forward hook that counts calls of a module"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, module, inputs, output):
+        self.calls += 1
+
+
+class AssistedDecoder:
+    """Draft model for assisted (speculative) generation, with acceptance statistics
+
+    The draft model proposes a few tokens at a time and the main model checks
+    them all in one forward pass, keeping the longest prefix it agrees with.
+    Forward hooks on both models count the passes, from which the acceptance
+    rate and the number of tokens per main-model pass follow.
+    """
+
+    def __init__(self, model, draft_model, draft_name: str):
+        self.draft_model = draft_model
+        self.draft_name = draft_name
+        self._target_calls = _ForwardCounter()
+        self._draft_calls = _ForwardCounter()
+        model.register_forward_hook(self._target_calls)
+        draft_model.register_forward_hook(self._draft_calls)
+        self._lock = threading.Lock()
+        self.generations = 0
+        self.new_tokens = 0
+        self.target_passes = 0
+        self.draft_passes = 0
+        self.seconds = 0.0
+        # Decode time per token without a draft model, measured at warm-up
+        self.baseline_ms_per_token: Optional[float] = None
+
+    def snapshot(self) -> Tuple[int, int]:
+        """Forward pass counters, taken before an assisted generate call"""
+        return self._target_calls.calls, self._draft_calls.calls
+
+    def record(self, before: Tuple[int, int], new_tokens: int, seconds: float):
+        """Add an assisted generate call to the statistics
+
+        With several inference workers the counters also see concurrent
+        calls, so the numbers are an approximation in that setup.
+        """
+        target, draft = self.snapshot()
+        with self._lock:
+            self.generations += 1
+            self.new_tokens += new_tokens
+            self.target_passes += target - before[0]
+            self.draft_passes += draft - before[1]
+            self.seconds += seconds
+
+    def get_stats(self) -> dict:
+        # Every main-model pass yields one token of its own; the rest are accepted drafts
+        accepted = max(0, self.new_tokens - self.target_passes)
+        ms_per_token = self.seconds * 1000 / self.new_tokens if self.new_tokens else None
+        return {
+            "draft_model": self.draft_name,
+            "generations": self.generations,
+            "new_tokens": self.new_tokens,
+            "acceptance_rate": accepted / self.draft_passes if self.draft_passes else None,
+            "tokens_per_target_pass": self.new_tokens / self.target_passes if self.target_passes else None,
+            "ms_per_token": ms_per_token,
+            "baseline_ms_per_token": self.baseline_ms_per_token,
+            "speedup": (
+                self.baseline_ms_per_token / ms_per_token
+                if self.baseline_ms_per_token and ms_per_token else None
+            ),
+        }
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+CPU thread and affinity autotuner for Summarify AI
+
+Tries combinations of workers x torch threads per worker, with and without
+pinning each worker to its own cores (NUMA-node aligned where the host has
+several nodes), against a sample workload. Every combination runs the way
+prefork.py serves: the model is loaded once, the workers are forked from
+it and pull documents from a shared queue. The best combination is written
+to TUNING_FILE, which run.py and the server's startup apply.
+
+    python autotune.py
+    python autotune.py --stub --documents 16 --objective latency
+    python autotune.py --max-workers 4 --max-p95 2.0 --output tuning.json
+
+Unix only (fork).
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+from typing import List, Tuple
+
+from benchmark import load_summarizer, make_corpus, parse_mix, summarize_latencies
+from config import MAX_LENGTH, MIN_LENGTH, TUNING_FILE
+from prefork import available_cpus, configure_worker, numa_nodes, plan_threads
+
+
+def candidate_configs(cpus: int, max_workers: int) -> List[Tuple[int, int, bool]]:
+    """(workers, threads_per_worker, pin) combinations worth measuring"""
+    pin_modes = [False, True] if hasattr(os, "sched_setaffinity") else [False]
+    configs = []
+    workers = 1
+    while workers <= min(max_workers, cpus):
+        even = cpus // workers
+        # An even split of the cores, and half of it to leave room for the server threads
+        for threads in sorted({even, max(1, even // 2)}, reverse=True):
+            for pin in pin_modes:
+                configs.append((workers, threads, pin))
+        workers *= 2
+    return configs
+
+
+def _worker(summarizer, cpus, pin, corpus, next_index, barrier, results, max_length, min_length):
+    """Body of a forked worker: warm up, wait for the others, then summarize until the queue is empty"""
+    try:
+        configure_worker(cpus, pin)
+        summarizer.warm_up()
+        barrier.wait()
+        latencies = []
+        while True:
+            with next_index.get_lock():
+                i = next_index.value
+                next_index.value += 1
+            if i >= len(corpus):
+                break
+            start = time.perf_counter()
+            summarizer.summarize(corpus[i], max_length=max_length, min_length=min_length)
+            latencies.append(time.perf_counter() - start)
+        results.put(latencies)
+    except Exception as e:
+        barrier.abort()
+        results.put(f"{type(e).__name__}: {e}")
+
+
+def measure(summarizer, corpus: List[str], workers: int, threads: int, pin: bool, args) -> dict:
+    """Run the corpus through forked workers with one thread configuration"""
+    context = multiprocessing.get_context("fork")
+    next_index = context.Value("i", 0)
+    barrier = context.Barrier(workers + 1)
+    results = context.Queue()
+    plan = plan_threads(workers, threads)
+    processes = [
+        context.Process(
+            target=_worker,
+            args=(summarizer, cpus, pin, corpus, next_index, barrier, results, args.max_length, args.min_length)
+        )
+        for cpus in plan
+    ]
+    for process in processes:
+        process.start()
+    try:
+        barrier.wait(timeout=args.timeout)
+        start = time.perf_counter()
+        latencies = []
+        for _ in processes:
+            result = results.get(timeout=args.timeout)
+            if isinstance(result, str):
+                raise RuntimeError(result)
+            latencies.extend(result)
+        wall_time = time.perf_counter() - start
+    finally:
+        for process in processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+
+    latency = summarize_latencies(latencies)
+    return {
+        "workers": workers,
+        "threads_per_worker": threads,
+        "pin_worker_cpus": pin,
+        "latency_p50": latency["p50"],
+        "latency_p95": latency["p95"],
+        "throughput": len(latencies) / wall_time if wall_time > 0 else 0,
+    }
+
+
+def pick_best(results: List[dict], objective: str, max_p95: float) -> dict:
+    """Highest throughput (or lowest p95) among the results within the p95 limit"""
+    eligible = [r for r in results if not max_p95 or r["latency_p95"] <= max_p95] or results
+    if objective == "latency":
+        return min(eligible, key=lambda r: (r["latency_p95"], -r["throughput"]))
+    return max(eligible, key=lambda r: (r["throughput"], -r["latency_p95"]))
+
+
+def print_report(results: List[dict], best: dict):
+    print("-" * 64)
+    print(f"{'workers':>7} {'threads':>7} {'pinned':>7} {'p50 s':>8} {'p95 s':>8} {'docs/s':>8}")
+    for r in results:
+        marker = "  ⭐" if r is best else ""
+        print(f"{r['workers']:>7} {r['threads_per_worker']:>7} {'yes' if r['pin_worker_cpus'] else 'no':>7} "
+              f"{r['latency_p50']:>8.3f} {r['latency_p95']:>8.3f} {r['throughput']:>8.2f}{marker}")
+    print("-" * 64)
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description="Find the best worker/thread layout for this host")
+    parser.add_argument("--stub", action="store_true", help="Use the offline stub model")
+    parser.add_argument("--documents", type=int, default=24, help="Documents per configuration")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix("short=0.6,medium=0.3,long=0.1"),
+                        help="Document length mix, e.g. short=0.6,medium=0.3,long=0.1")
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--max-length", type=int, default=MAX_LENGTH)
+    parser.add_argument("--min-length", type=int, default=MIN_LENGTH)
+    parser.add_argument("--max-workers", type=int, default=8)
+    parser.add_argument("--objective", choices=["throughput", "latency"], default="throughput",
+                        help="Maximize documents/s or minimize p95 latency")
+    parser.add_argument("--max-p95", type=float, default=0, help="Only pick layouts with a p95 latency below this (seconds)")
+    parser.add_argument("--timeout", type=float, default=600, help="Seconds to wait for a configuration")
+    parser.add_argument("--output", default=TUNING_FILE, help="Tuning file to write")
+    args = parser.parse_args()
+
+    if not hasattr(os, "fork"):
+        print("❌ Autotuning needs os.fork (Linux or macOS)")
+        sys.exit(1)
+
+    cpus = len(available_cpus())
+    nodes = numa_nodes()
+    configs = candidate_configs(cpus, args.max_workers)
+    print(f"🔬 {cpus} CPUs on {len(nodes)} NUMA node(s), measuring {len(configs)} layouts "
+          f"on {args.documents} documents each")
+
+    # Load the weights once without running the model: a forward pass would
+    # start torch's thread pool, which does not survive fork
+    summarizer = load_summarizer(args.stub)
+    corpus = make_corpus(args.documents, args.mix, args.seed)
+
+    results = []
+    for workers, threads, pin in configs:
+        print(f"⏳ {workers} worker(s) x {threads} thread(s){', pinned' if pin else ''}...")
+        try:
+            results.append(measure(summarizer, corpus, workers, threads, pin, args))
+        except Exception as e:
+            print(f"❌ Failed: {e}")
+    if not results:
+        print("❌ No configuration could be measured")
+        sys.exit(1)
+
+    best = pick_best(results, args.objective, args.max_p95)
+    print_report(results, best)
+
+    tuning = {
+        "workers": best["workers"],
+        "threads_per_worker": best["threads_per_worker"],
+        "pin_worker_cpus": best["pin_worker_cpus"],
+        "cpus": cpus,
+        "numa_nodes": len(nodes),
+        "objective": args.objective,
+        "model": summarizer.model_name,
+        "tuned_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(tuning, f, indent=2)
+    print(f"📄 Best layout written to {args.output}: {best['workers']} worker(s) x "
+          f"{best['threads_per_worker']} thread(s){', pinned' if best['pin_worker_cpus'] else ''}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+"""
+Inference backends for TextSummarizer
+
+A backend turns a model name into an object with a Hugging Face style
+generate(), so prompt building, stopping criteria and post-processing stay
+the same whichever backend runs the forward passes:
+
+- eager: the PyTorch model as loaded by transformers (default)
+- compile: the same model with its forward pass compiled by torch.compile,
+  with compiled graphs cached on disk for later startups
+- onnx: the model exported once to ONNX (with past key/values inputs, so
+  every decode step only processes the new token) and run by ONNX Runtime
+
+Small models spend a large share of each decode step in Python and
+framework dispatch on CPU, which the compiled backends remove.
+"""
+
+import logging
+import os
+import time
+
+from config import BACKEND_CACHE_DIR
+
+logger = logging.getLogger(__name__)
+
+
+def _model_dir(kind: str, model_name: str) -> str:
+    """Cache directory of a converted model"""
+    return os.path.join(BACKEND_CACHE_DIR, kind, model_name.replace("/", "--"))
+
+
+class InferenceBackend:
+    """Loads a model whose generate() TextSummarizer drives"""
+
+    name = ""
+    # CPU precisions the backend can run; others fall back to fp32
+    precisions = ("fp32", "bf16", "int8")
+    # Whether generate() accepts a precomputed prompt-prefix cache and a draft model
+    supports_prefix_cache = True
+    supports_assisted = True
+
+    def load(self, model_name: str, device: str, dtype, precision: str):
+        raise NotImplementedError
+
+    def memory_mb(self, model) -> float:
+        """Memory taken by the model's weights in MB"""
+        if model is None or not hasattr(model, "parameters"):
+            return 0.0
+        tensors = list(model.parameters()) + list(model.buffers())
+        return sum(t.numel() * t.element_size() for t in tensors) / (1024 * 1024)
+
+
+class EagerBackend(InferenceBackend):
+    """The transformers model run eagerly by PyTorch"""
+
+    name = "eager"
+
+    def load(self, model_name: str, device: str, dtype, precision: str):
+        import torch
+        from transformers import AutoModelForCausalLM
+        from snapshot import is_snapshot, load_mmap_model
+
+        if device == "cpu" and is_snapshot(model_name):
+            # Weights stay mapped from the snapshot files, shared through the page cache
+            model = load_mmap_model(model_name, dtype)
+        else:
+            model = AutoModelForCausalLM.from_pretrained(
+                model_name,
+                dtype=dtype,
+                device_map="auto" if device == "cuda" else None,
+                local_files_only=is_snapshot(model_name)
+            )
+            # Move model to CPU manually if needed
+            if device == "cpu":
+                model = model.to(device)
+            model.eval()
+
+        if device == "cpu" and precision == "int8":
+            # Dynamic quantization: int8 weights for every Linear layer,
+            # activations are quantized on the fly
+            model = torch.ao.quantization.quantize_dynamic(
+                model, {torch.nn.Linear}, dtype=torch.qint8
+            )
+        return model
+
+
+class CompiledBackend(EagerBackend):
+    """Eager model with its forward pass compiled by torch.compile
+
+    Compilation happens on the first generate call (the warm-up). Inductor's
+    FX graph cache is kept under BACKEND_CACHE_DIR, so later startups reuse
+    the compiled kernels instead of compiling again.
+    """
+
+    name = "compile"
+
+    def load(self, model_name: str, device: str, dtype, precision: str):
+        import torch
+        import torch._inductor.config as inductor_config
+
+        # Read when the cache is first used, so setting it here is early enough
+        os.environ.setdefault("TORCHINDUCTOR_CACHE_DIR", os.path.abspath(os.path.join(BACKEND_CACHE_DIR, "inductor")))
+        inductor_config.fx_graph_cache = True
+
+        model = super().load(model_name, device, dtype, precision)
+        # Prompt and cache lengths change every call; dynamic shapes avoid
+        # recompiling for each of them
+        model.forward = torch.compile(model.forward, dynamic=True)
+        return model
+
+
+class OnnxBackend(InferenceBackend):
+    """Model exported to ONNX and run by ONNX Runtime through optimum
+
+    The export (with past key/values, so decoding reuses the KV cache) runs
+    on the first load and is saved under BACKEND_CACHE_DIR; later startups
+    load the saved graph directly.
+    """
+
+    name = "onnx"
+    precisions = ("fp32",)
+    # The exported graph takes its own cache format and no draft model
+    supports_prefix_cache = False
+    supports_assisted = False
+
+    def load(self, model_name: str, device: str, dtype, precision: str):
+        import torch
+        try:
+            import onnxruntime
+            from optimum.onnxruntime import ORTModelForCausalLM
+        except ImportError as e:
+            raise RuntimeError("The onnx backend needs optimum[onnxruntime]: pip install optimum[onnxruntime]") from e
+
+        session_options = onnxruntime.SessionOptions()
+        # Follow torch's thread setting, which the multi-worker server sets per worker
+        session_options.intra_op_num_threads = torch.get_num_threads()
+        provider = "CUDAExecutionProvider" if device == "cuda" else "CPUExecutionProvider"
+
+        path = _model_dir("onnx", model_name)
+        if os.path.isfile(os.path.join(path, "config.json")):
+            logger.info(f"Loading ONNX model from {path}")
+            return ORTModelForCausalLM.from_pretrained(
+                path, use_cache=True, provider=provider, session_options=session_options
+            )
+
+        start = time.time()
+        logger.info(f"Exporting {model_name} to ONNX (first start only)")
+        model = ORTModelForCausalLM.from_pretrained(
+            model_name, export=True, use_cache=True, provider=provider, session_options=session_options
+        )
+        model.save_pretrained(path)
+        logger.info(f"ONNX export saved to {path} in {time.time() - start:.1f}s")
+        return model
+
+    def memory_mb(self, model) -> float:
+        path = getattr(model, "model_save_dir", None)
+        if not path or not os.path.isdir(path):
+            return 0.0
+        return sum(
+            os.path.getsize(os.path.join(path, name))
+            for name in os.listdir(path)
+            if name.endswith((".onnx", ".onnx_data"))
+        ) / (1024 * 1024)
+
+
+BACKENDS = {backend.name: backend for backend in (EagerBackend, CompiledBackend, OnnxBackend)}
+
+
+def get_backend(name: str) -> InferenceBackend:
+    """Backend instance by name"""
+    try:
+        return BACKENDS[name.lower()]()
+    except KeyError:
+        raise ValueError(f"Unknown inference backend '{name}', expected one of: {', '.join(BACKENDS)}") from None
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+Offline batch summarization for Summarify AI
+
+Summarizes a directory of text files or a JSONL file without the HTTP
+server. Documents are read lazily and results are streamed to a JSONL
+output file, which doubles as the checkpoint: rerunning the same command
+skips every document that already has a result.
+
+    python batch_summarize.py docs/ summaries.jsonl --workers 4
+    python batch_summarize.py corpus.jsonl summaries.jsonl --text-field body
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from typing import Iterator, List, Optional, Set, Tuple
+
+from config import BATCH_MAX_SIZE
+
+# Set in each worker process by _init_worker
+_summarizer = None
+
+
+def _init_worker(threads: int):
+    """Pin the thread count and load the model once per worker process"""
+    global _summarizer
+    import torch
+
+    torch.set_num_threads(threads)
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        # Already set by an earlier parallel op in this process
+        pass
+
+    from summarizer import TextSummarizer
+    _summarizer = TextSummarizer()
+
+
+def _summarize_documents(documents: List[Tuple[str, str]], max_length: Optional[int], min_length: Optional[int]) -> List[dict]:
+    """Worker task: summarize a batch of (id, text) documents"""
+    try:
+        outputs = _summarizer.summarize_many([(text, max_length, min_length) for _, text in documents])
+    except Exception as e:
+        outputs = [e] * len(documents)
+
+    results = []
+    for (doc_id, _), output in zip(documents, outputs):
+        if isinstance(output, Exception):
+            results.append({"id": doc_id, "error": str(output)})
+        else:
+            results.append({"id": doc_id, "summary": output})
+    return results
+
+
+def read_directory(path: str, pattern_suffix: str = ".txt") -> Iterator[Tuple[str, str]]:
+    """Yield (relative path, text) for every text file below a directory"""
+    for root, dirs, files in os.walk(path):
+        dirs.sort()
+        for name in sorted(files):
+            if not name.endswith(pattern_suffix):
+                continue
+            file_path = os.path.join(root, name)
+            with open(file_path, encoding="utf-8", errors="replace") as f:
+                yield os.path.relpath(file_path, path), f.read()
+
+
+def read_jsonl(path: str, text_field: str, id_field: str) -> Iterator[Tuple[str, str]]:
+    """Yield (id, text) for every line of a JSONL file"""
+    with open(path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            yield str(record.get(id_field, line_number)), record.get(text_field, "")
+
+
+def load_completed(output: str) -> Set[str]:
+    """Ids that already have a summary in the output file"""
+    completed = set()
+    if not os.path.exists(output):
+        return completed
+    with open(output, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # Unreadable record, redo that document
+                continue
+            if "summary" in record:
+                completed.add(record["id"])
+    return completed
+
+
+def truncate_partial_line(output: str):
+    """Cut an unterminated last line (from an interrupted run) off the output file
+
+    Appending after it would glue the next record onto the same line.
+    """
+    if not os.path.exists(output):
+        return
+    with open(output, "rb+") as f:
+        end = f.seek(0, os.SEEK_END)
+        position = end
+        while position > 0:
+            step = min(position, 64 * 1024)
+            f.seek(position - step)
+            block = f.read(step)
+            newline = block.rfind(b"\n")
+            if newline >= 0:
+                position = position - step + newline + 1
+                break
+            position -= step
+        if position < end:
+            f.truncate(position)
+
+
+def batched(documents: Iterator[Tuple[str, str]], size: int) -> Iterator[List[Tuple[str, str]]]:
+    batch = []
+    for document in documents:
+        batch.append(document)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def run(args) -> int:
+    """Summarize every pending document and return the number of failures"""
+    if os.path.isdir(args.input):
+        documents = read_directory(args.input, args.suffix)
+    else:
+        documents = read_jsonl(args.input, args.text_field, args.id_field)
+
+    truncate_partial_line(args.output)
+    completed = load_completed(args.output)
+    if completed:
+        print(f"🔁 Resuming: {len(completed)} documents already summarized")
+    pending = (doc for doc in documents if doc[0] not in completed)
+
+    workers = max(1, args.workers)
+    threads = args.threads or max(1, (os.cpu_count() or 1) // workers)
+    print(f"🚀 Starting {workers} worker(s) with {threads} thread(s) each")
+
+    done = 0
+    failed = 0
+    lock = threading.Lock()
+    # Bound the batches in flight so reading never runs ahead of the workers
+    in_flight = threading.Semaphore(workers * 2)
+    errors = []
+
+    # spawn gives every worker a clean interpreter instead of a forked torch runtime
+    context = multiprocessing.get_context("spawn")
+    start_time = time.time()
+    with open(args.output, "a", encoding="utf-8") as out, \
+            context.Pool(processes=workers, initializer=_init_worker, initargs=(threads,)) as pool:
+
+        def on_result(results: List[dict]):
+            nonlocal done, failed
+            with lock:
+                for result in results:
+                    out.write(json.dumps(result) + "\n")
+                    if "error" in result:
+                        failed += 1
+                    else:
+                        done += 1
+                out.flush()
+                total = done + failed
+                if total and total % args.progress_every < len(results):
+                    elapsed = time.time() - start_time
+                    print(f"📄 {total} documents, {total / elapsed:.2f} docs/s")
+            in_flight.release()
+
+        def on_error(error: BaseException):
+            errors.append(error)
+            in_flight.release()
+
+        for batch in batched(pending, args.batch_size):
+            in_flight.acquire()
+            if errors:
+                break
+            pool.apply_async(
+                _summarize_documents,
+                (batch, args.max_length, args.min_length),
+                callback=on_result,
+                error_callback=on_error
+            )
+
+        pool.close()
+        pool.join()
+
+    if errors:
+        print(f"❌ Worker failed: {errors[0]}")
+        return max(failed, 1)
+
+    elapsed = time.time() - start_time
+    total = done + failed
+    rate = total / elapsed if elapsed > 0 else 0
+    print("-" * 50)
+    print(f"✅ Summarized {done} documents ({failed} failed) in {elapsed:.1f}s")
+    print(f"⚡ Throughput: {rate:.2f} documents/second")
+    return failed
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description="Summarify AI offline batch summarization")
+    parser.add_argument("input", help="Directory of text files or a JSONL file")
+    parser.add_argument("output", help="JSONL file to write results to (also used to resume)")
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes, each loads the model once")
+    parser.add_argument("--threads", type=int, default=0, help="Torch threads per worker (default: cores / workers)")
+    parser.add_argument("--batch-size", type=int, default=BATCH_MAX_SIZE, help="Documents per generate call")
+    parser.add_argument("--max-length", type=int, default=None)
+    parser.add_argument("--min-length", type=int, default=None)
+    parser.add_argument("--suffix", default=".txt", help="File suffix to pick up in directory mode")
+    parser.add_argument("--text-field", default="text", help="JSONL field holding the document text")
+    parser.add_argument("--id-field", default="id", help="JSONL field holding the document id")
+    parser.add_argument("--progress-every", type=int, default=100, help="Report progress every N documents")
+    args = parser.parse_args()
+
+    try:
+        failed = run(args)
+    except KeyboardInterrupt:
+        print("\n👋 Interrupted, rerun the same command to resume")
+        sys.exit(130)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
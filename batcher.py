@@ -0,0 +1,367 @@
+import logging
+import math
+import queue
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import Future
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+import metrics
+from config import BATCH_MAX_SIZE, BATCH_MAX_WAIT_MS, BATCH_MAX_TOKENS, MAX_QUEUED_REQUESTS
+from executor import InferenceExecutor, get_inference_executor
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class QueueFullError(Exception):
+    """Raised by submit() when the queue is at capacity"""
+
+    def __init__(self, queued: int, retry_after: int):
+        super().__init__(f"Request queue is full ({queued} waiting)")
+        self.queued = queued
+        self.retry_after = retry_after
+
+
+class _Reservation:
+    """Queue slot taken by BatchScheduler.reserve(), handed back exactly once"""
+
+    def __init__(self, scheduler: "BatchScheduler"):
+        self._scheduler = scheduler
+        self._lock = threading.Lock()
+        self._held = True
+
+    def release(self):
+        """Hand the slot back; later calls do nothing"""
+        with self._lock:
+            if not self._held:
+                return
+            self._held = False
+        self._scheduler.done()
+
+
+@dataclass
+class _PendingRequest:
+    text: str
+    max_length: Optional[int]
+    min_length: Optional[int]
+    model: Optional[str] = None
+    future: Future = field(default_factory=Future)
+    n_tokens: int = 0
+    enqueued_at: float = field(default_factory=time.monotonic)
+    # time.monotonic() after which nobody waits for the result any more
+    deadline: Optional[float] = None
+
+    @property
+    def group_key(self) -> tuple:
+        # Only requests with identical generation parameters can share a generate call
+        return (self.model, self.max_length, self.min_length)
+
+
+class BatchScheduler:
+    """Collect concurrent summarization requests and run them as batched generations"""
+
+    def __init__(
+        self,
+        summarizer,
+        max_batch_size: int = BATCH_MAX_SIZE,
+        max_wait_ms: int = BATCH_MAX_WAIT_MS,
+        max_batch_tokens: int = BATCH_MAX_TOKENS,
+        executor: Optional[InferenceExecutor] = None,
+        registry=None,
+        max_queued: int = MAX_QUEUED_REQUESTS
+    ):
+        self.summarizer = summarizer
+        # With a model registry, requests may name a model other than summarizer's
+        self.registry = registry
+        self.executor = executor or get_inference_executor()
+        # One slot per inference worker: while all workers are busy the
+        # collector waits, so queued requests merge into larger batches
+        self._slots = threading.Semaphore(self.executor.workers)
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0, max_wait_ms) / 1000
+        self.max_batch_tokens = max(1, max_batch_tokens)
+        self._queue = queue.Queue()
+        self._thread = None
+        # Admitted requests not yet picked up by a worker
+        self.max_queued = max(0, max_queued)
+        self._waiting = 0
+        self._waiting_lock = threading.Lock()
+        # Requests being generated right now
+        self._running = 0
+        self._batch_seconds = 1.0
+        self.batches_run = 0
+        self.requests_batched = 0
+        self.rejected = 0
+        self.expired = 0
+
+    def start(self):
+        """Start the background collector thread"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._run, name="batch-scheduler", daemon=True)
+        self._thread.start()
+        logger.info(
+            f"Batch scheduler started (max_batch_size={self.max_batch_size}, "
+            f"max_wait_ms={self.max_wait * 1000:.0f}, max_batch_tokens={self.max_batch_tokens})"
+        )
+
+    def stop(self):
+        """Stop the collector thread after the queued requests have been served"""
+        if self._thread is None:
+            return
+        self._queue.put(_STOP)
+        self._thread.join()
+        self._thread = None
+
+    def submit(
+        self,
+        text: str,
+        max_length: Optional[int] = None,
+        min_length: Optional[int] = None,
+        model: Optional[str] = None,
+        deadline: Optional[float] = None
+    ) -> Future:
+        """Queue a text for summarization and return a future for its summary
+        
+        Raises QueueFullError instead of queueing when max_queued requests
+        are already waiting. Requests still queued at their deadline fail
+        with TimeoutError without being generated.
+        """
+        if self.registry is not None:
+            model = self.registry.resolve(model)
+        self.admit()
+        request = _PendingRequest(
+            text=text, max_length=max_length, min_length=min_length, model=model, deadline=deadline
+        )
+        self._queue.put(request)
+        return request.future
+
+    def admit(self):
+        """Reserve a queue slot, raising QueueFullError if there is none
+        
+        submit() calls this itself; callers that queue work elsewhere use
+        reserve().
+        """
+        with self._waiting_lock:
+            if self.max_queued and self._waiting >= self.max_queued:
+                self.rejected += 1
+                metrics.ADMISSION_REJECTED.inc()
+                raise QueueFullError(self._waiting, self.retry_after())
+            self._waiting += 1
+            metrics.QUEUE_DEPTH.set(self._waiting)
+
+    def reserve(self) -> _Reservation:
+        """admit() for work queued outside the scheduler (long documents, streams, bulk calls)
+
+        The worker releases the slot when it starts and the caller releases
+        it again when the work ends or is abandoned; only the first release
+        counts, so a slot can neither leak nor be returned twice.
+        """
+        self.admit()
+        return _Reservation(self)
+
+    def done(self, count: int = 1):
+        """Release queue slots reserved by admit()"""
+        with self._waiting_lock:
+            self._waiting -= count
+            metrics.QUEUE_DEPTH.set(self._waiting)
+
+    @contextmanager
+    def running(self, count: int = 1):
+        """Count work as in progress while the block runs, see busy()"""
+        with self._waiting_lock:
+            self._running += count
+        try:
+            yield
+        finally:
+            with self._waiting_lock:
+                self._running -= count
+
+    def busy(self) -> bool:
+        """Whether interactive requests are queued or being generated"""
+        return self._waiting > 0 or self._running > 0
+
+    def retry_after(self) -> int:
+        """Seconds until the current queue has likely drained"""
+        batches = self._waiting / self.max_batch_size / self.executor.workers
+        return max(1, math.ceil(batches * self._batch_seconds))
+
+    def get_stats(self) -> dict:
+        """Get batching statistics"""
+        return {
+            "batches_run": self.batches_run,
+            "requests_batched": self.requests_batched,
+            "avg_batch_size": self.requests_batched / self.batches_run if self.batches_run else 0,
+            "queued": self._waiting,
+            "max_queued": self.max_queued,
+            "rejected": self.rejected,
+            "expired": self.expired
+        }
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is _STOP:
+                break
+            self._slots.acquire()
+            pending, stop = self._collect(first)
+            for i, batch in enumerate(self._form_batches(pending)):
+                if i > 0:
+                    self._slots.acquire()
+                self._dispatch(batch)
+            if stop:
+                break
+        # Wait for in-flight batches before reporting the scheduler as stopped
+        for _ in range(self.executor.workers):
+            self._slots.acquire()
+        for _ in range(self.executor.workers):
+            self._slots.release()
+        logger.info("Batch scheduler stopped")
+
+    def _dispatch(self, batch: List[_PendingRequest]):
+        try:
+            future = self.executor.submit(self._execute, batch)
+        except Exception as e:
+            self._slots.release()
+            self.done(len(batch))
+            for request in batch:
+                if request.future.set_running_or_notify_cancel():
+                    request.future.set_exception(e)
+            return
+        future.add_done_callback(lambda _: self._slots.release())
+
+    def _collect(self, first: _PendingRequest):
+        """Gather requests until the wait window, batch size or token budget runs out"""
+        self._measure(first)
+        pending = [first]
+        tokens = first.n_tokens
+        deadline = time.monotonic() + self.max_wait
+        while len(pending) < self.max_batch_size and tokens < self.max_batch_tokens:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is _STOP:
+                return pending, True
+            self._measure(item)
+            pending.append(item)
+            tokens += item.n_tokens
+        return pending, False
+
+    def _measure(self, request: _PendingRequest):
+        summarizer = self.summarizer
+        if self.registry is not None:
+            # Models that are not loaded yet are measured with the default tokenizer
+            candidate = self.registry.peek(request.model)
+            summarizer = candidate if candidate.is_loaded else self.registry.default_summarizer
+        try:
+            request.n_tokens = summarizer.count_tokens(request.text)
+        except Exception:
+            # Let the generate call surface the real error for this request
+            request.n_tokens = 0
+
+    def _form_batches(self, pending: List[_PendingRequest]) -> List[List[_PendingRequest]]:
+        """Group requests by generation parameters and prompt length to keep padding low"""
+        groups = defaultdict(list)
+        for request in pending:
+            groups[request.group_key].append(request)
+
+        batches = []
+        for requests in groups.values():
+            requests.sort(key=lambda r: r.n_tokens)
+            batch = []
+            for request in requests:
+                # Left padding makes every row as long as the longest prompt in the batch
+                padded_tokens = (len(batch) + 1) * max(request.n_tokens, 1)
+                if batch and (len(batch) >= self.max_batch_size or padded_tokens > self.max_batch_tokens):
+                    batches.append(batch)
+                    batch = []
+                batch.append(request)
+            if batch:
+                batches.append(batch)
+        return batches
+
+    def _execute(self, batch: List[_PendingRequest]):
+        self.done(len(batch))
+        # Skip requests whose caller has already gone away
+        batch = [r for r in batch if r.future.set_running_or_notify_cancel()]
+
+        started = time.monotonic()
+        live = []
+        for request in batch:
+            metrics.QUEUE_WAIT.observe(started - request.enqueued_at)
+            if request.deadline is not None and started >= request.deadline:
+                self.expired += 1
+                metrics.DEADLINE_EXPIRED.inc(stage="queued")
+                request.future.set_exception(TimeoutError("Request deadline passed while queued"))
+            else:
+                live.append(request)
+        batch = live
+        if not batch:
+            return
+
+        first = batch[0]
+        try:
+            with self.running(len(batch)), self._lease(first.model) as summarizer:
+                self._run_batch(summarizer, batch)
+        except Exception as e:
+            # Loading the requested model failed
+            for request in batch:
+                if not request.future.done():
+                    request.future.set_exception(e)
+
+    def _lease(self, model: Optional[str]):
+        if self.registry is None:
+            return nullcontext(self.summarizer)
+        return self.registry.lease(model)
+
+    def _run_batch(self, summarizer, batch: List[_PendingRequest]):
+        first = batch[0]
+        # Keep generating while anyone in the batch is still waiting
+        deadlines = [r.deadline for r in batch]
+        deadline = None if None in deadlines else max(deadlines)
+        started = time.monotonic()
+        try:
+            summaries = summarizer.summarize_batch(
+                [r.text for r in batch],
+                max_length=first.max_length,
+                min_length=first.min_length,
+                deadline=deadline
+            )
+        except TimeoutError as e:
+            self.expired += len(batch)
+            for request in batch:
+                request.future.set_exception(e)
+            return
+        except Exception as e:
+            if len(batch) == 1:
+                first.future.set_exception(e)
+                return
+            # One bad input must not fail its neighbours: retry them one by one
+            logger.warning(f"Batch of {len(batch)} failed ({e}), retrying individually")
+            for request in batch:
+                try:
+                    request.future.set_result(summarizer.summarize(
+                        request.text,
+                        max_length=request.max_length,
+                        min_length=request.min_length,
+                        deadline=request.deadline
+                    ))
+                except Exception as item_error:
+                    request.future.set_exception(item_error)
+            return
+
+        # Smoothed batch duration, used for Retry-After estimates
+        self._batch_seconds = 0.8 * self._batch_seconds + 0.2 * (time.monotonic() - started)
+        self.batches_run += 1
+        self.requests_batched += len(batch)
+        for request, summary in zip(batch, summaries):
+            request.future.set_result(summary)
@@ -0,0 +1,393 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for Summarify AI
+
+Two modes, both reproducible (fixed seed) and able to run fully offline
+with --stub, which swaps in the stub tokenizer/model from stub_model.py:
+
+  micro  In-process timings of the summarize stages: tokenize, generate,
+         post-process and log write, plus end-to-end and batched throughput.
+  http   Load generator against the API with configurable concurrency and
+         document-length mix. Starts its own server unless --url is given.
+
+    python benchmark.py micro --stub --output micro.json
+    python benchmark.py http --stub --concurrency 8 --requests 200 --output http.json
+    python benchmark.py http --stub --baseline http.json
+
+With --baseline, latency or throughput that is more than --tolerance worse
+than the stored run is reported and the exit code is 1.
+"""
+
+import argparse
+import json
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from typing import Dict, List
+
+from config import MAX_LENGTH, MIN_LENGTH
+from memory import current_rss_mb, peak_rss_mb
+
+WORDS = (
+    "the model system data process energy market policy research network city water climate "
+    "government company technology health science report growth change history language school "
+    "people between during because however several important economic public global local "
+    "analysis increase production develop support result impact region service industry "
+    "according including although results suggest significant recent study found new"
+).split()
+
+# Words per document for each length class
+DOC_LENGTHS = {"short": 60, "medium": 250, "long": 700}
+
+# Metrics compared against a baseline: name -> True when higher is better
+COMPARED_METRICS = {
+    "latency_p50": False,
+    "latency_p95": False,
+    "latency_p99": False,
+    "throughput": True,
+}
+
+
+def make_corpus(n: int, mix: Dict[str, float], seed: int) -> List[str]:
+    """Deterministic synthetic documents following a length mix"""
+    rng = random.Random(seed)
+    classes = list(mix)
+    weights = [mix[c] for c in classes]
+    corpus = []
+    for _ in range(n):
+        n_words = DOC_LENGTHS[rng.choices(classes, weights)[0]]
+        sentences = []
+        while sum(len(s.split()) for s in sentences) < n_words:
+            words = rng.choices(WORDS, k=rng.randint(8, 20))
+            sentences.append(" ".join(words).capitalize() + ".")
+        corpus.append(" ".join(sentences))
+    return corpus
+
+
+def parse_mix(value: str) -> Dict[str, float]:
+    """Parse "short=0.6,medium=0.3,long=0.1" """
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        if name not in DOC_LENGTHS:
+            raise argparse.ArgumentTypeError(f"Unknown document length '{name}', expected {', '.join(DOC_LENGTHS)}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def summarize_latencies(values: List[float]) -> dict:
+    """Mean and p50/p95/p99 of a list of durations in seconds"""
+    if not values:
+        return {"count": 0}
+    ordered = sorted(values)
+
+    def pct(p):
+        return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+
+    return {
+        "count": len(ordered),
+        "mean": statistics.mean(ordered),
+        "p50": pct(50),
+        "p95": pct(95),
+        "p99": pct(99),
+        "max": ordered[-1],
+    }
+
+
+def load_summarizer(stub: bool):
+    if stub:
+        from stub_model import StubSummarizer
+        return StubSummarizer()
+    from summarizer import TextSummarizer
+    return TextSummarizer()
+
+
+def run_micro(args) -> dict:
+    """Time each stage of TextSummarizer.summarize in-process"""
+    import torch
+    from transformers import StoppingCriteriaList
+    from request_log import JSONLLogBackend, RequestLogSink
+
+    rss_before = current_rss_mb()
+    summarizer = load_summarizer(args.stub)
+    summarizer.warm_up()
+    corpus = make_corpus(args.documents, args.mix, args.seed)
+
+    stages = {"tokenize": [], "generate": [], "postprocess": [], "log": []}
+    with tempfile.TemporaryDirectory() as tmp:
+        sink = RequestLogSink(backend=JSONLLogBackend(os.path.join(tmp, "bench_log.jsonl")))
+        for _ in range(args.iterations):
+            for text in corpus:
+                t0 = time.perf_counter()
+                inputs = summarizer._prepare_inputs(summarizer._encode_prompts([text]))
+                t1 = time.perf_counter()
+                prompt_length = inputs["input_ids"].shape[1]
+                kwargs = summarizer._generation_kwargs(args.max_length, args.min_length)
+                kwargs["stopping_criteria"] = StoppingCriteriaList(
+                    summarizer._summary_stop_criteria(prompt_length, args.min_length)
+                )
+                with torch.no_grad():
+                    output_ids = summarizer.model.generate(**inputs, **kwargs)
+                t2 = time.perf_counter()
+                generated = summarizer.tokenizer.batch_decode(output_ids[:, prompt_length:], skip_special_tokens=True)[0]
+                summary = summarizer._postprocess(generated)
+                t3 = time.perf_counter()
+                sink.log({
+                    "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
+                    "original_length": len(text),
+                    "summary_length": len(summary),
+                    "compression_ratio": 0,
+                    "processing_time": t3 - t0,
+                    "model_used": summarizer.model_name,
+                })
+                sink.flush()
+                t4 = time.perf_counter()
+                stages["tokenize"].append(t1 - t0)
+                stages["generate"].append(t2 - t1)
+                stages["postprocess"].append(t3 - t2)
+                stages["log"].append(t4 - t3)
+        sink.close()
+
+    end_to_end = []
+    for text in corpus:
+        start = time.perf_counter()
+        summarizer.summarize(text, max_length=args.max_length, min_length=args.min_length)
+        end_to_end.append(time.perf_counter() - start)
+
+    batch_start = time.perf_counter()
+    summarizer.summarize_batch(corpus, max_length=args.max_length, min_length=args.min_length)
+    batch_time = time.perf_counter() - batch_start
+
+    latency = summarize_latencies(end_to_end)
+    return {
+        "mode": "micro",
+        "model": summarizer.model_name,
+        "stages": {name: summarize_latencies(values) for name, values in stages.items()},
+        "end_to_end": latency,
+        "latency_p50": latency["p50"],
+        "latency_p95": latency["p95"],
+        "latency_p99": latency["p99"],
+        "throughput": len(end_to_end) / sum(end_to_end),
+        "batched_throughput": len(corpus) / batch_time,
+        "model_rss_mb": current_rss_mb() - rss_before,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _process_rss_mb(pid: int) -> float:
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return 0.0
+
+
+def start_server(stub: bool, tmp: str, timeout: float):
+    """Start the API in a subprocess and wait until /ready answers 200"""
+    port = _free_port()
+    env = dict(os.environ)
+    env.update({
+        "STUB_MODEL": "true" if stub else "false",
+        "REQUEST_LOG_PATH": os.path.join(tmp, "requests.jsonl"),
+        "STATS_SNAPSHOT_FILE": os.path.join(tmp, "stats.json"),
+        # Unique documents would never hit the cache anyway, keep it out of the numbers
+        "CACHE_ENABLED": "false",
+        "CACHE_DISK_PATH": "",
+        "NEAR_DUP_ENABLED": "false",
+    })
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        env=env,
+        cwd=os.path.dirname(os.path.abspath(__file__))
+    )
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Server exited with code {process.returncode}")
+        try:
+            with urllib.request.urlopen(f"{url}/ready", timeout=1) as response:
+                if response.status == 200:
+                    return process, url
+        except (urllib.error.URLError, OSError):
+            pass
+        time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError(f"Server was not ready after {timeout:.0f}s")
+
+
+def run_http(args) -> dict:
+    """Closed-loop load test: each of --concurrency clients sends requests back to back"""
+    corpus = make_corpus(args.requests, args.mix, args.seed)
+    tmp = tempfile.mkdtemp(prefix="summarify-bench-")
+    process = None
+    url = args.url
+    if url is None:
+        print("🚀 Starting server...")
+        process, url = start_server(args.stub, tmp, args.startup_timeout)
+
+    latencies = []
+    statuses: Dict[str, int] = {}
+    lock = threading.Lock()
+    next_index = iter(range(len(corpus)))
+    rss_samples = []
+    stop_sampling = threading.Event()
+
+    def client():
+        while True:
+            with lock:
+                i = next(next_index, None)
+            if i is None:
+                return
+            payload = json.dumps({
+                "text": corpus[i], "max_length": args.max_length, "min_length": args.min_length
+            }).encode("utf-8")
+            request = urllib.request.Request(
+                f"{url}/summarize", data=payload, headers={"Content-Type": "application/json"}
+            )
+            start = time.perf_counter()
+            try:
+                with urllib.request.urlopen(request, timeout=args.request_timeout) as response:
+                    response.read()
+                    status = str(response.status)
+            except urllib.error.HTTPError as e:
+                status = str(e.code)
+            except Exception as e:
+                status = type(e).__name__
+            elapsed = time.perf_counter() - start
+            with lock:
+                statuses[status] = statuses.get(status, 0) + 1
+                if status == "200":
+                    latencies.append(elapsed)
+
+    def sample_rss():
+        while not stop_sampling.wait(0.5):
+            rss_samples.append(_process_rss_mb(process.pid))
+
+    try:
+        if process is not None:
+            threading.Thread(target=sample_rss, daemon=True).start()
+        print(f"📡 Sending {len(corpus)} requests with concurrency {args.concurrency}...")
+        start = time.perf_counter()
+        clients = [threading.Thread(target=client) for _ in range(args.concurrency)]
+        for t in clients:
+            t.start()
+        for t in clients:
+            t.join()
+        wall_time = time.perf_counter() - start
+    finally:
+        stop_sampling.set()
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=30)
+
+    latency = summarize_latencies(latencies)
+    return {
+        "mode": "http",
+        "concurrency": args.concurrency,
+        "requests": len(corpus),
+        "statuses": statuses,
+        "errors": len(corpus) - statuses.get("200", 0),
+        "latency": latency,
+        "latency_p50": latency.get("p50", 0),
+        "latency_p95": latency.get("p95", 0),
+        "latency_p99": latency.get("p99", 0),
+        "throughput": statuses.get("200", 0) / wall_time if wall_time > 0 else 0,
+        "wall_time": wall_time,
+        "server_peak_rss_mb": max(rss_samples) if rss_samples else None,
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> List[str]:
+    """Metrics that are more than tolerance worse than the baseline"""
+    regressions = []
+    for name, higher_is_better in COMPARED_METRICS.items():
+        current, previous = results.get(name), baseline.get(name)
+        if not current or not previous:
+            continue
+        change = (current - previous) / previous
+        worse = -change if higher_is_better else change
+        marker = "❌" if worse > tolerance else "✅"
+        print(f"   {marker} {name}: {previous:.4f} -> {current:.4f} ({change:+.1%})")
+        if worse > tolerance:
+            regressions.append(name)
+    return regressions
+
+
+def print_results(results: dict):
+    print("-" * 50)
+    if results["mode"] == "micro":
+        for name, stage in results["stages"].items():
+            print(f"   {name:<12} p50 {stage['p50'] * 1000:9.2f} ms   p95 {stage['p95'] * 1000:9.2f} ms")
+        print(f"   batched throughput: {results['batched_throughput']:.2f} docs/s")
+    else:
+        print(f"   statuses: {results['statuses']}")
+        if results["server_peak_rss_mb"]:
+            print(f"   server peak RSS: {results['server_peak_rss_mb']:.0f} MB")
+    print(f"   latency p50/p95/p99: {results['latency_p50'] * 1000:.1f} / "
+          f"{results['latency_p95'] * 1000:.1f} / {results['latency_p99'] * 1000:.1f} ms")
+    print(f"   throughput: {results['throughput']:.2f} requests/s")
+    print("-" * 50)
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description="Summarify AI benchmark suite")
+    parser.add_argument("mode", choices=["micro", "http"])
+    parser.add_argument("--stub", action="store_true", help="Use the offline stub model")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix("short=0.6,medium=0.3,long=0.1"),
+                        help="Document length mix, e.g. short=0.6,medium=0.3,long=0.1")
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--max-length", type=int, default=MAX_LENGTH)
+    parser.add_argument("--min-length", type=int, default=MIN_LENGTH)
+    parser.add_argument("--documents", type=int, default=20, help="micro: documents per iteration")
+    parser.add_argument("--iterations", type=int, default=3, help="micro: passes over the documents")
+    parser.add_argument("--url", help="http: benchmark a running server instead of starting one")
+    parser.add_argument("--concurrency", type=int, default=4, help="http: concurrent clients")
+    parser.add_argument("--requests", type=int, default=100, help="http: total requests")
+    parser.add_argument("--request-timeout", type=float, default=300)
+    parser.add_argument("--startup-timeout", type=float, default=600)
+    parser.add_argument("--output", help="Write results to this JSON file")
+    parser.add_argument("--baseline", help="Compare against results stored by an earlier run")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="Allowed relative regression")
+    args = parser.parse_args()
+
+    results = run_micro(args) if args.mode == "micro" else run_http(args)
+    results["config"] = {
+        "stub": args.stub, "mix": args.mix, "seed": args.seed,
+        "max_length": args.max_length, "min_length": args.min_length,
+    }
+    print_results(results)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"📄 Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        print(f"📊 Comparing against {args.baseline} (tolerance {args.tolerance:.0%}):")
+        if compare(results, baseline, args.tolerance):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
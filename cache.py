@@ -0,0 +1,204 @@
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from config import CACHE_ENABLED, CACHE_MAX_BYTES, CACHE_DISK_PATH, CACHE_DISK_MAX_ENTRIES
+
+logger = logging.getLogger(__name__)
+
+# Rough per-entry bookkeeping cost (key string, OrderedDict node) on top of the summary itself
+ENTRY_OVERHEAD_BYTES = 200
+
+# Trim the disk tier every this many writes rather than on every insert
+DISK_TRIM_EVERY = 100
+
+
+def normalize_text(text: str) -> str:
+    """Collapse whitespace so trivially different copies share a cache entry"""
+    return " ".join(text.split())
+
+
+def make_key(text: str, max_length: Optional[int], min_length: Optional[int], model_name: str, mode: str = "") -> str:
+    """Cache key for a summarization request"""
+    raw = "\x00".join([normalize_text(text), str(max_length), str(min_length), model_name, mode])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class SummaryCache:
+    """In-memory LRU of summaries with a byte budget and an optional SQLite disk tier
+
+    The two tiers have separate locks, so memory lookups never wait for a
+    disk read or commit running on another thread.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = CACHE_MAX_BYTES,
+        disk_path: Optional[str] = CACHE_DISK_PATH,
+        disk_max_entries: int = CACHE_DISK_MAX_ENTRIES,
+        enabled: bool = CACHE_ENABLED
+    ):
+        self.enabled = enabled
+        self.max_bytes = max_bytes
+        self.disk_path = disk_path or None
+        self.disk_max_entries = disk_max_entries
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._disk_lock = threading.Lock()
+        # Opened on first use by each process, see _connect
+        self._conn = None
+        self._conn_pid = None
+        self._disk_writes = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str, memory_only: bool = False) -> Optional[str]:
+        """Return the cached summary for a key, or None
+
+        With memory_only=True the disk tier is not read and a miss is not
+        counted, so the event loop can try the memory tier first and only
+        hand misses to a thread; see main.cache_get.
+        """
+        if not self.enabled:
+            return None
+        with self._lock:
+            summary = self._entries.get(key)
+            if summary is not None:
+                self._entries.move_to_end(key)
+                self.memory_hits += 1
+                return summary
+        if memory_only:
+            return None
+
+        summary = self._disk_get(key)
+        with self._lock:
+            if summary is not None:
+                self.disk_hits += 1
+                self._memory_put(key, summary)
+            else:
+                self.misses += 1
+        return summary
+
+    def put(self, key: str, summary: str):
+        """Store a summary in memory and, if configured, on disk"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._memory_put(key, summary)
+        self._disk_put(key, summary)
+
+    def get_stats(self) -> dict:
+        """Hit/miss counters and current size"""
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": (self.memory_hits + self.disk_hits) / lookups if lookups else 0,
+                "disk_path": self.disk_path,
+            }
+
+    def close(self):
+        """Close the disk tier"""
+        with self._disk_lock:
+            if self._conn is not None and self._conn_pid == os.getpid():
+                self._conn.close()
+            self._conn = None
+
+    def _entry_size(self, key: str, summary: str) -> int:
+        return len(key) + len(summary.encode("utf-8")) + ENTRY_OVERHEAD_BYTES
+
+    def _memory_put(self, key: str, summary: str):
+        size = self._entry_size(key, summary)
+        if size > self.max_bytes:
+            return
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._bytes -= self._entry_size(key, previous)
+        self._entries[key] = summary
+        self._bytes += size
+        while self._bytes > self.max_bytes:
+            old_key, old_summary = self._entries.popitem(last=False)
+            self._bytes -= self._entry_size(old_key, old_summary)
+            self.evictions += 1
+
+    def _connect(self) -> Optional[sqlite3.Connection]:
+        """This process's disk tier connection, None without a disk tier
+
+        Opened lazily rather than in __init__: prefork.py imports main (and
+        creates the cache) before forking, and a SQLite connection must not
+        be used by a process other than the one that opened it. Callers
+        hold _disk_lock.
+        """
+        if not self.enabled or not self.disk_path:
+            return None
+        if self._conn_pid != os.getpid():
+            # Never touch a connection inherited from the parent
+            self._conn = None
+            self._conn_pid = os.getpid()
+            self._open_disk()
+        return self._conn
+
+    def _open_disk(self):
+        try:
+            self._conn = sqlite3.connect(self.disk_path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS summaries ("
+                "key TEXT PRIMARY KEY, summary TEXT NOT NULL, stored_at REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS summaries_stored_at ON summaries (stored_at)"
+            )
+            self._conn.commit()
+            logger.info(f"Summary cache disk tier at {self.disk_path}")
+        except Exception as e:
+            logger.error(f"Error opening summary cache at {self.disk_path}: {e}")
+            self._conn = None
+
+    def _disk_get(self, key: str) -> Optional[str]:
+        with self._disk_lock:
+            conn = self._connect()
+            if conn is None:
+                return None
+            try:
+                row = conn.execute("SELECT summary FROM summaries WHERE key = ?", (key,)).fetchone()
+                return row[0] if row is not None else None
+            except Exception as e:
+                logger.error(f"Error reading summary cache: {e}")
+                return None
+
+    def _disk_put(self, key: str, summary: str):
+        with self._disk_lock:
+            conn = self._connect()
+            if conn is None:
+                return
+            try:
+                with conn:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO summaries (key, summary, stored_at) VALUES (?, ?, ?)",
+                        (key, summary, time.time())
+                    )
+                    self._disk_writes += 1
+                    if self.disk_max_entries > 0 and self._disk_writes % DISK_TRIM_EVERY == 0:
+                        # Drop the oldest rows beyond the limit; hot entries live in memory anyway
+                        conn.execute(
+                            "DELETE FROM summaries WHERE key IN ("
+                            "SELECT key FROM summaries ORDER BY stored_at DESC LIMIT -1 OFFSET ?)",
+                            (self.disk_max_entries,)
+                        )
+            except Exception as e:
+                logger.error(f"Error writing summary cache: {e}")
@@ -6,12 +6,137 @@ load_dotenv()
 
 # Model Configuration
 MODEL_NAME = os.getenv("MODEL_NAME", "facebook/opt-125m")
-MAX_LENGTH = int(os.getenv("MAX_LENGTH", "512"))
-MIN_LENGTH = int(os.getenv("MIN_LENGTH", "50"))
+# Extra models requests can pick, as "alias=model,alias=model" (MODEL_NAME is always available)
+AVAILABLE_MODELS = os.getenv("AVAILABLE_MODELS", "")
+# Memory budget for loaded models in MB; least recently used models are unloaded to fit (0 = unlimited)
+MODEL_MEMORY_BUDGET_MB = float(os.getenv("MODEL_MEMORY_BUDGET_MB", "0"))
+# Summary length budgets in generated tokens: MAX_LENGTH is the hard cap, MIN_LENGTH
+# the target after which generation stops at the first sentence end
+MAX_LENGTH = int(os.getenv("MAX_LENGTH", "200"))
+MIN_LENGTH = int(os.getenv("MIN_LENGTH", "30"))
+# Stop once the summary is complete instead of decoding up to MAX_LENGTH
+EARLY_STOPPING = os.getenv("EARLY_STOPPING", "true").lower() == "true"
+# Greedy decoding makes summaries reproducible (and therefore cacheable);
+# set to false to sample with temperature/top_p instead
+DETERMINISTIC_GENERATION = os.getenv("DETERMINISTIC_GENERATION", "true").lower() == "true"
+# Prompt wrapped around every input, must contain {text} (empty = built-in template)
+PROMPT_TEMPLATE = os.getenv("PROMPT_TEMPLATE", "").replace("\\n", "\n")
+# Reuse the key/value cache of the constant text before {text} across requests
+PREFIX_CACHE_ENABLED = os.getenv("PREFIX_CACHE_ENABLED", "true").lower() == "true"
+# Small model that drafts tokens for the main model to verify (assisted generation, empty = off)
+DRAFT_MODEL_NAME = os.getenv("DRAFT_MODEL_NAME", "")
+# Load models from local snapshots under this directory, with memory-mapped
+# safetensors weights (empty = load from the model hub on every start)
+MODEL_SNAPSHOT_DIR = os.getenv("MODEL_SNAPSHOT_DIR", "")
+# Hub revision (branch, tag or commit) a missing snapshot is created from (empty = main)
+MODEL_REVISION = os.getenv("MODEL_REVISION", "")
+# Inference backend: eager (PyTorch), compile (torch.compile) or onnx (ONNX Runtime via optimum)
+INFERENCE_BACKEND = os.getenv("INFERENCE_BACKEND", "eager")
+# Where converted models (ONNX exports, compiled graphs) are kept between startups
+BACKEND_CACHE_DIR = os.getenv("BACKEND_CACHE_DIR", "backend_cache")
+# CPU inference precision: fp32, bf16 (needs AVX512-BF16/AMX) or int8 (dynamic quantization)
+PRECISION = os.getenv("PRECISION", "fp32")
 
 # Server Configuration
 HOST = os.getenv("HOST", "0.0.0.0")
 PORT = int(os.getenv("PORT", "8000"))
+RELOAD = os.getenv("RELOAD", "false").lower() == "true"
+# Worker processes forked from one preloaded model (run.py, Unix only)
+WORKERS = int(os.getenv("WORKERS", "1"))
+# Torch threads per worker (0 = split the available cores evenly)
+THREADS_PER_WORKER = int(os.getenv("THREADS_PER_WORKER", "0"))
+# Pin each worker to its own cores
+PIN_WORKER_CPUS = os.getenv("PIN_WORKER_CPUS", "true").lower() == "true"
+# Best worker/thread layout measured by autotune.py, applied at startup
+# (explicit WORKERS/THREADS_PER_WORKER/PIN_WORKER_CPUS settings win)
+TUNING_FILE = os.getenv("TUNING_FILE", "tuning.json")
+# Load the model in the background after the server starts listening
+LAZY_STARTUP = os.getenv("LAZY_STARTUP", "true").lower() == "true"
+WARMUP_ON_STARTUP = os.getenv("WARMUP_ON_STARTUP", "true").lower() == "true"
 
 # Logging Configuration
 LOG_FILE = os.getenv("LOG_FILE", "request_logs.xlsx")
+LOG_BACKEND = os.getenv("LOG_BACKEND", "jsonl")
+REQUEST_LOG_PATH = os.getenv("REQUEST_LOG_PATH", "request_logs.jsonl")
+LOG_FLUSH_INTERVAL = float(os.getenv("LOG_FLUSH_INTERVAL", "1.0"))
+LOG_FLUSH_BATCH = int(os.getenv("LOG_FLUSH_BATCH", "100"))
+LOG_ROTATE_BYTES = int(os.getenv("LOG_ROTATE_BYTES", str(50 * 1024 * 1024)))
+LOG_ROTATE_BACKUPS = int(os.getenv("LOG_ROTATE_BACKUPS", "5"))
+
+# Batching Configuration
+BATCH_MAX_SIZE = int(os.getenv("BATCH_MAX_SIZE", "8"))
+BATCH_MAX_WAIT_MS = int(os.getenv("BATCH_MAX_WAIT_MS", "20"))
+BATCH_MAX_TOKENS = int(os.getenv("BATCH_MAX_TOKENS", "4096"))
+# Documents accepted by one /summarize/batch call, larger calls get 413
+BATCH_MAX_DOCUMENTS = int(os.getenv("BATCH_MAX_DOCUMENTS", "256"))
+# Requests waiting for a batch before new ones are rejected with 429 (0 = unbounded)
+MAX_QUEUED_REQUESTS = int(os.getenv("MAX_QUEUED_REQUESTS", "64"))
+# Default per-request deadline in seconds, queued or generating (0 = none)
+REQUEST_TIMEOUT = float(os.getenv("REQUEST_TIMEOUT", "30"))
+# Largest "timeout" a client may ask for in seconds (0 = no limit)
+MAX_REQUEST_TIMEOUT = float(os.getenv("MAX_REQUEST_TIMEOUT", "300"))
+
+# Execution Configuration
+INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", "1"))
+
+# Statistics Configuration
+STATS_SNAPSHOT_FILE = os.getenv("STATS_SNAPSHOT_FILE", "stats_snapshot.json")
+STATS_SNAPSHOT_INTERVAL = float(os.getenv("STATS_SNAPSHOT_INTERVAL", "60"))
+
+# Cache Configuration
+CACHE_ENABLED = os.getenv("CACHE_ENABLED", "true").lower() == "true"
+CACHE_MAX_BYTES = int(os.getenv("CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+CACHE_DISK_PATH = os.getenv("CACHE_DISK_PATH", "")
+CACHE_DISK_MAX_ENTRIES = int(os.getenv("CACHE_DISK_MAX_ENTRIES", "100000"))
+
+# Near-Duplicate Configuration
+# Reuse the summary of an already summarized document whose estimated
+# (MinHash) similarity to the input is at least NEAR_DUP_THRESHOLD
+NEAR_DUP_ENABLED = os.getenv("NEAR_DUP_ENABLED", "true").lower() == "true"
+NEAR_DUP_THRESHOLD = float(os.getenv("NEAR_DUP_THRESHOLD", "0.9"))
+NEAR_DUP_MAX_BYTES = int(os.getenv("NEAR_DUP_MAX_BYTES", str(16 * 1024 * 1024)))
+NEAR_DUP_NUM_PERM = int(os.getenv("NEAR_DUP_NUM_PERM", "128"))
+NEAR_DUP_SHINGLE_WORDS = int(os.getenv("NEAR_DUP_SHINGLE_WORDS", "5"))
+
+# Long Document Configuration
+LONG_DOC_CHUNK_TOKENS = int(os.getenv("LONG_DOC_CHUNK_TOKENS", "768"))
+LONG_DOC_PARTIAL_TOKENS = int(os.getenv("LONG_DOC_PARTIAL_TOKENS", "128"))
+LONG_DOC_MAX_ROUNDS = int(os.getenv("LONG_DOC_MAX_ROUNDS", "4"))
+
+# Job Queue Configuration
+# SQLite file of the asynchronous job queue (POST /jobs)
+JOBS_DB_PATH = os.getenv("JOBS_DB_PATH", "jobs.db")
+# Threads working through the job queue per server process (0 = only accept jobs)
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "1"))
+# Times a job is retried after the server died while running it
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+# Finished jobs are deleted after this many hours (0 = keep forever)
+JOB_RETENTION_HOURS = float(os.getenv("JOB_RETENTION_HOURS", "168"))
+JOB_CALLBACK_TIMEOUT = float(os.getenv("JOB_CALLBACK_TIMEOUT", "10"))
+# Comma-separated hosts callbacks may go to; when empty, any host resolving only to public addresses
+JOB_CALLBACK_HOSTS = [h.strip().lower() for h in os.getenv("JOB_CALLBACK_HOSTS", "").split(",") if h.strip()]
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "1.0"))
+
+# Summary Modes
+# Largest input text in bytes (UTF-8) accepted by the summarize and job endpoints, larger gets 413 (0 = no limit)
+MAX_INPUT_BYTES = int(os.getenv("MAX_INPUT_BYTES", str(1024 * 1024)))
+# Default /summarize mode: abstractive (LLM), extractive (TextRank, no model) or
+# condensed (extractive pre-pass, then the LLM)
+SUMMARY_MODE = os.getenv("SUMMARY_MODE", "abstractive")
+# Word budget of the extractive pre-pass in condensed mode
+CONDENSE_MAX_WORDS = int(os.getenv("CONDENSE_MAX_WORDS", "450"))
+
+# Benchmark Configuration
+# Serve with the stub tokenizer/model from stub_model.py (offline benchmarks only)
+STUB_MODEL = os.getenv("STUB_MODEL", "false").lower() == "true"
+STUB_PREFILL_MS_PER_TOKEN = float(os.getenv("STUB_PREFILL_MS_PER_TOKEN", "0.05"))
+STUB_DECODE_MS_PER_STEP = float(os.getenv("STUB_DECODE_MS_PER_STEP", "2"))
+STUB_MAX_NEW_TOKENS = int(os.getenv("STUB_MAX_NEW_TOKENS", "32"))
+
+# Metrics Configuration
+# Serve the /debug/profiler routes (they expose code paths, keep off in production)
+PROFILER_ENABLED = os.getenv("PROFILER_ENABLED", "false").lower() == "true"
+# Sampling interval of the profiler switched on with POST /debug/profiler/start
+PROFILER_INTERVAL_MS = float(os.getenv("PROFILER_INTERVAL_MS", "10"))
+# Distinct stacks the profiler keeps, further ones are counted as "[other]"
+PROFILER_MAX_STACKS = int(os.getenv("PROFILER_MAX_STACKS", "10000"))
@@ -0,0 +1,46 @@
+import asyncio
+import functools
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Optional
+
+from config import INFERENCE_WORKERS
+
+logger = logging.getLogger(__name__)
+
+
+class InferenceExecutor:
+    """Dedicated thread pool that keeps blocking model work off the event loop"""
+
+    def __init__(self, workers: int = INFERENCE_WORKERS):
+        self.workers = max(1, workers)
+        self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="inference")
+        logger.info(f"Inference executor started with {self.workers} worker(s)")
+
+    def submit(self, fn, *args, **kwargs) -> Future:
+        """Schedule a blocking call on an inference worker"""
+        return self._pool.submit(fn, *args, **kwargs)
+
+    async def run(self, fn, *args, **kwargs):
+        """Run a blocking call on an inference worker and await its result"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._pool, functools.partial(fn, *args, **kwargs))
+
+    def shutdown(self, wait: bool = True):
+        """Stop accepting work and optionally wait for running calls"""
+        self._pool.shutdown(wait=wait)
+
+
+_executor: Optional[InferenceExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_inference_executor() -> InferenceExecutor:
+    """Return the process-wide inference executor, creating it on first use"""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = InferenceExecutor()
+    return _executor
@@ -0,0 +1,147 @@
+"""
+Extractive summarization with TF-IDF and TextRank
+
+Sentences are scored with TextRank over the TF-IDF cosine similarity graph
+and the best ones are returned in their original order. Everything is
+vectorized with NumPy, so a document takes milliseconds and no model is
+needed. The same scoring condenses long documents to their most salient
+sentences before they are summarized by the LLM.
+"""
+
+import re
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+")
+WORD = re.compile(r"[a-z0-9][a-z0-9'-]*")
+
+STOP_WORDS = frozenset("""
+a about above after again against all also am an and any are as at be because been before being
+below between both but by can could did do does doing down during each few for from further had
+has have having he her here hers herself him himself his how i if in into is it its itself just
+me more most my myself no nor not now of off on once only or other our ours ourselves out over
+own same she should so some such than that the their theirs them themselves then there these they
+this those through to too under until up very was we were what when where which while who whom
+why will with would you your yours yourself yourselves
+""".split())
+
+
+# Above this many sentences the n x n similarity graph gets expensive, and
+# sentences are scored by similarity to the document centroid instead
+MAX_GRAPH_SENTENCES = 1000
+# Vocabulary columns densified at a time while building the similarity graph
+GRAPH_BLOCK_WORDS = 4096
+
+
+def split_sentences(text: str) -> List[str]:
+    """Split text into sentences on terminal punctuation"""
+    return [s for s in SENTENCE_BOUNDARY.split(" ".join(text.split())) if s]
+
+
+def _tfidf(sentences: List[str]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """L2-normalized TF-IDF matrix in sparse (row, column, value) form, one row per sentence
+
+    Only the non-zero entries are kept, so memory grows with the length of the
+    text rather than with sentences x vocabulary.
+    """
+    vocabulary = {}
+    rows, cols = [], []
+    for i, sentence in enumerate(sentences):
+        for word in WORD.findall(sentence.lower()):
+            if word not in STOP_WORDS:
+                rows.append(i)
+                cols.append(vocabulary.setdefault(word, len(vocabulary)))
+
+    # Sum repeated words within a sentence into one entry
+    width = max(1, len(vocabulary))
+    entries, counts = np.unique(
+        np.array(rows, dtype=np.int64) * width + np.array(cols, dtype=np.int64), return_counts=True
+    )
+    rows, cols = entries // width, entries % width
+
+    document_frequency = np.bincount(cols, minlength=width)
+    idf = np.log((1 + len(sentences)) / (1 + document_frequency)) + 1
+    weights = (counts * idf[cols]).astype(np.float32)
+    norms = np.sqrt(np.bincount(rows, weights=weights ** 2, minlength=len(sentences)))
+    return rows, cols, weights / np.where(norms == 0, 1, norms)[rows].astype(np.float32)
+
+
+def _similarity(n: int, rows: np.ndarray, cols: np.ndarray, values: np.ndarray) -> np.ndarray:
+    """Cosine similarity of every pair of sentences, without the diagonal"""
+    # Words in a single sentence only add to the diagonal, which is dropped anyway
+    shared = np.bincount(cols)[cols] > 1
+    rows, cols, values = rows[shared], cols[shared], values[shared]
+    _, cols = np.unique(cols, return_inverse=True)
+    words = int(cols.max(initial=-1)) + 1
+
+    similarity = np.zeros((n, n), dtype=np.float32)
+    order = np.argsort(cols, kind="stable")
+    rows, cols, values = rows[order], cols[order], values[order]
+    bounds = np.searchsorted(cols, np.arange(0, words + GRAPH_BLOCK_WORDS, GRAPH_BLOCK_WORDS))
+    for start, end in zip(bounds[:-1], bounds[1:]):
+        if start == end:
+            continue
+        block = np.zeros((n, GRAPH_BLOCK_WORDS), dtype=np.float32)
+        block[rows[start:end], cols[start:end] % GRAPH_BLOCK_WORDS] = values[start:end]
+        similarity += block @ block.T
+    np.fill_diagonal(similarity, 0)
+    return similarity
+
+
+def score_sentences(sentences: List[str], damping: float = 0.85, iterations: int = 50, tolerance: float = 1e-6) -> np.ndarray:
+    """TextRank score of each sentence"""
+    n = len(sentences)
+    if n <= 2:
+        return np.ones(n, dtype=np.float32)
+
+    rows, cols, values = _tfidf(sentences)
+    if n > MAX_GRAPH_SENTENCES:
+        centroid = np.bincount(cols, weights=values) / n
+        return np.bincount(rows, weights=values * centroid[cols], minlength=n).astype(np.float32)
+
+    similarity = _similarity(n, rows, cols, values)
+    # Row-normalize into transition probabilities; isolated sentences link to everyone
+    out_weight = similarity.sum(axis=1, keepdims=True)
+    transition = np.where(out_weight > 0, similarity / np.where(out_weight == 0, 1, out_weight), 1 / n)
+
+    scores = np.full(n, 1 / n, dtype=np.float32)
+    for _ in range(iterations):
+        updated = (1 - damping) / n + damping * (transition.T @ scores)
+        if np.abs(updated - scores).sum() < tolerance:
+            scores = updated
+            break
+        scores = updated
+    return scores
+
+
+def select_sentences(text: str, max_words: int, max_sentences: Optional[int] = None) -> List[str]:
+    """Highest-scoring sentences that fit the word budget, in document order"""
+    sentences = split_sentences(text)
+    if not sentences:
+        return []
+
+    scores = score_sentences(sentences)
+    lengths = np.array([len(s.split()) for s in sentences])
+    chosen = []
+    words = 0
+    for index in np.argsort(-scores, kind="stable"):
+        if max_sentences is not None and len(chosen) >= max_sentences:
+            break
+        if chosen and words + lengths[index] > max_words:
+            continue
+        chosen.append(int(index))
+        words += lengths[index]
+    return [sentences[i] for i in sorted(chosen)]
+
+
+def summarize(text: str, max_words: int, max_sentences: Optional[int] = None) -> str:
+    """Extractive summary of at most max_words words (at least one sentence)"""
+    return " ".join(select_sentences(text, max_words, max_sentences))
+
+
+def condense(text: str, max_words: int) -> str:
+    """Shorten text to its most salient sentences if it is longer than max_words"""
+    if len(text.split()) <= max_words:
+        return text
+    return " ".join(select_sentences(text, max_words))
@@ -0,0 +1,440 @@
+"""
+Asynchronous summarization jobs backed by a SQLite queue
+
+POST /jobs stores a job and returns right away; a pool of job workers
+claims queued jobs by priority, summarizes them and optionally POSTs the
+result to a callback URL. Jobs survive restarts: a job that was running in
+a process that died is put back in the queue (up to JOB_MAX_ATTEMPTS
+times). Several server processes can share one queue file.
+
+Jobs are background work. Workers only claim a job while no interactive
+request is waiting, and a running job pauses between decode steps while
+interactive requests are queued or generating.
+"""
+
+import http.client
+import ipaddress
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+import uuid
+from typing import Callable, List, Optional
+
+import metrics
+from config import (
+    JOBS_DB_PATH, JOB_WORKERS, JOB_MAX_ATTEMPTS, JOB_RETENTION_HOURS, JOB_CALLBACK_TIMEOUT, JOB_POLL_INTERVAL,
+    JOB_CALLBACK_HOSTS
+)
+
+logger = logging.getLogger(__name__)
+
+JOB_STATUSES = ("queued", "running", "done", "failed")
+
+# Delivery attempts per callback, with exponential backoff between them
+CALLBACK_ATTEMPTS = 3
+
+# Purge old finished jobs at most this often (seconds)
+PURGE_INTERVAL = 3600
+
+
+def check_callback_url(url: str, allowed_hosts: List[str] = JOB_CALLBACK_HOSTS) -> Optional[str]:
+    """Raise ValueError unless the server may POST to url, return the address to connect to
+
+    With allowed_hosts, only those hosts are accepted and None is returned
+    (the host is resolved as usual). Otherwise every address the host
+    resolves to must be public, so a callback can't reach loopback, private
+    networks or link-local metadata endpoints, and the checked address is
+    returned: the callback must go to exactly that address, since resolving
+    the host again could give a different answer. Raises OSError when the
+    host can't be resolved.
+    """
+    parts = urllib.parse.urlsplit(url)
+    if parts.scheme not in ("http", "https") or not parts.hostname:
+        raise ValueError("callback_url must be an http(s) URL")
+    host = parts.hostname.lower()
+    if allowed_hosts:
+        if host not in allowed_hosts:
+            raise ValueError(f"Callback host {host} is not in JOB_CALLBACK_HOSTS")
+        return None
+    port = parts.port or (443 if parts.scheme == "https" else 80)
+    addresses = [sockaddr[0] for *_, sockaddr in socket.getaddrinfo(host, port, proto=socket.IPPROTO_TCP)]
+    for address in addresses:
+        if not ipaddress.ip_address(address).is_global:
+            raise ValueError(f"Callback host {host} resolves to non-public address {address}")
+    return addresses[0]
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    """Fail on redirects instead of following them to an unchecked host"""
+
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        return None
+
+
+class _PinnedConnection:
+    """Connects to a fixed address instead of resolving the host
+
+    The Host header and the TLS server name (and certificate check) still
+    use the host from the URL.
+    """
+
+    def __init__(self, *args, address: str, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._create_connection = lambda target, *rest: socket.create_connection((address, target[1]), *rest)
+
+
+class _PinnedHTTPConnection(_PinnedConnection, http.client.HTTPConnection):
+    pass
+
+
+class _PinnedHTTPSConnection(_PinnedConnection, http.client.HTTPSConnection):
+    pass
+
+
+class _PinnedHTTPHandler(urllib.request.HTTPHandler):
+    def __init__(self, address: str):
+        super().__init__()
+        self.address = address
+
+    def http_open(self, req):
+        return self.do_open(_PinnedHTTPConnection, req, address=self.address)
+
+
+class _PinnedHTTPSHandler(urllib.request.HTTPSHandler):
+    def __init__(self, address: str):
+        super().__init__()
+        self.address = address
+
+    def https_open(self, req):
+        return self.do_open(_PinnedHTTPSConnection, req, context=self._context, address=self.address)
+
+
+def _callback_opener(address: Optional[str]) -> urllib.request.OpenerDirector:
+    """Opener for one callback: no redirects, and only to address when one is given"""
+    if address is None:
+        return urllib.request.build_opener(_NoRedirect)
+    # No proxies either, a proxy would resolve the host itself
+    return urllib.request.build_opener(
+        urllib.request.ProxyHandler({}), _NoRedirect, _PinnedHTTPHandler(address), _PinnedHTTPSHandler(address)
+    )
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class JobStore:
+    """Jobs table in a SQLite file, safe to share between processes"""
+
+    def __init__(self, path: str = JOBS_DB_PATH, max_attempts: int = JOB_MAX_ATTEMPTS):
+        self.path = path
+        self.max_attempts = max(1, max_attempts)
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def open(self):
+        """Open the database; called after forking, never share the connection between processes"""
+        if self._conn is not None:
+            return
+        # Autocommit mode, so claim() can take the write lock with BEGIN IMMEDIATE
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id TEXT PRIMARY KEY, status TEXT NOT NULL, priority INTEGER NOT NULL, "
+            "text TEXT NOT NULL, max_length INTEGER, min_length INTEGER, model TEXT, "
+            "callback_url TEXT, callback_status TEXT, summary TEXT, error TEXT, attempts INTEGER NOT NULL, "
+            "created_at REAL NOT NULL, started_at REAL, finished_at REAL, worker_pid INTEGER, worker_token TEXT)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_queue ON jobs (status, priority DESC, created_at)")
+        logger.info(f"Job queue at {self.path}")
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def submit(
+        self,
+        text: str,
+        max_length: Optional[int] = None,
+        min_length: Optional[int] = None,
+        model: Optional[str] = None,
+        priority: int = 0,
+        callback_url: Optional[str] = None
+    ) -> dict:
+        """Queue a job and return it"""
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (id, status, priority, text, max_length, min_length, model, callback_url, "
+                "attempts, created_at) VALUES (?, 'queued', ?, ?, ?, ?, ?, ?, 0, ?)",
+                (job_id, priority, text, max_length, min_length, model, callback_url, time.time())
+            )
+        return self.get(job_id)
+
+    def get(self, job_id: str) -> Optional[dict]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return dict(row) if row is not None else None
+
+    def claim(self, worker_token: str) -> Optional[dict]:
+        """Mark the highest-priority queued job as running and return it, None if there is none"""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT id FROM jobs WHERE status = 'queued' ORDER BY priority DESC, created_at LIMIT 1"
+                ).fetchone()
+                if row is not None:
+                    self._conn.execute(
+                        "UPDATE jobs SET status = 'running', started_at = ?, attempts = attempts + 1, "
+                        "worker_pid = ?, worker_token = ? WHERE id = ?",
+                        (time.time(), os.getpid(), worker_token, row["id"])
+                    )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return self.get(row["id"]) if row is not None else None
+
+    def finish(self, job_id: str, summary: str):
+        self._finish(job_id, "done", summary=summary)
+
+    def fail(self, job_id: str, error: str):
+        self._finish(job_id, "failed", error=error)
+
+    def _finish(self, job_id: str, status: str, summary: Optional[str] = None, error: Optional[str] = None):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, summary = ?, error = ?, finished_at = ? WHERE id = ?",
+                (status, summary, error, time.time(), job_id)
+            )
+
+    def set_callback_status(self, job_id: str, callback_status: str):
+        with self._lock:
+            self._conn.execute("UPDATE jobs SET callback_status = ? WHERE id = ?", (callback_status, job_id))
+
+    def recover(self, worker_token: str) -> int:
+        """Requeue jobs left running by processes that no longer exist
+
+        A job counts as orphaned when its worker process is gone, or when
+        this process has the same pid but a different token (a restarted
+        container often gets the same pid again). Jobs that already used
+        up their attempts fail instead, so a job that crashes the server
+        can't do so forever.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, attempts, worker_pid, worker_token FROM jobs WHERE status = 'running'"
+            ).fetchall()
+            recovered = 0
+            for row in rows:
+                pid = row["worker_pid"]
+                if pid == os.getpid():
+                    orphaned = row["worker_token"] != worker_token
+                else:
+                    orphaned = pid is None or not _pid_alive(pid)
+                if not orphaned:
+                    continue
+                if row["attempts"] >= self.max_attempts:
+                    self._conn.execute(
+                        "UPDATE jobs SET status = 'failed', error = ?, finished_at = ? WHERE id = ?",
+                        (f"Interrupted {row['attempts']} times", time.time(), row["id"])
+                    )
+                else:
+                    self._conn.execute(
+                        "UPDATE jobs SET status = 'queued', started_at = NULL, worker_pid = NULL, "
+                        "worker_token = NULL WHERE id = ?",
+                        (row["id"],)
+                    )
+                recovered += 1
+        return recovered
+
+    def purge(self, older_than_hours: float = JOB_RETENTION_HOURS) -> int:
+        """Delete finished jobs older than the retention period"""
+        if older_than_hours <= 0:
+            return 0
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM jobs WHERE status IN ('done', 'failed') AND finished_at < ?",
+                (time.time() - older_than_hours * 3600,)
+            )
+        return cursor.rowcount
+
+    def counts(self) -> dict:
+        """Number of jobs in each status"""
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        counts = dict.fromkeys(JOB_STATUSES, 0)
+        counts.update({status: count for status, count in rows})
+        return counts
+
+
+class JobRunner:
+    """Pool of threads that work through the job queue"""
+
+    def __init__(
+        self,
+        store: JobStore,
+        run_job: Callable[[dict], str],
+        workers: int = JOB_WORKERS,
+        can_start: Callable[[], bool] = lambda: True,
+        poll_interval: float = JOB_POLL_INTERVAL
+    ):
+        self.store = store
+        self.run_job = run_job
+        self.workers = max(0, workers)
+        # Checked before claiming a job: model ready, no interactive requests waiting
+        self.can_start = can_start
+        self.poll_interval = poll_interval
+        self.token = None
+        self._threads = []
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._last_purge = None
+        self.completed = 0
+        self.failed = 0
+
+    def start(self):
+        """Open the store, requeue orphaned jobs and start the workers"""
+        self.store.open()
+        # New token per process start, see JobStore.recover
+        self.token = uuid.uuid4().hex
+        recovered = self.store.recover(self.token)
+        if recovered:
+            logger.info(f"Recovered {recovered} interrupted job(s)")
+        self._stop.clear()
+        self._threads = [
+            threading.Thread(target=self._run, name=f"job-worker-{i}", daemon=True)
+            for i in range(self.workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+        if self.workers:
+            logger.info(f"Job runner started with {self.workers} worker(s)")
+
+    def stop(self, timeout: float = 5.0):
+        """Stop claiming jobs; jobs still running are recovered on the next start"""
+        self._stop.set()
+        self._wake.set()
+        for thread in self._threads:
+            thread.join(timeout=timeout)
+        # A job still generating keeps the store open; it is requeued on the next start
+        if not any(thread.is_alive() for thread in self._threads):
+            self.store.close()
+        self._threads = []
+
+    def notify(self):
+        """Wake the workers, a job was just queued"""
+        self._wake.set()
+
+    def get_stats(self) -> dict:
+        return {**self.store.counts(), "workers": self.workers, "completed": self.completed, "failed": self.failed}
+
+    def _wait(self):
+        self._wake.wait(self.poll_interval)
+        self._wake.clear()
+
+    def _run(self):
+        while not self._stop.is_set():
+            if not self.can_start():
+                self._wait()
+                continue
+            try:
+                job = self.store.claim(self.token)
+            except Exception as e:
+                logger.error(f"Error claiming a job: {e}")
+                job = None
+            if job is None:
+                self._purge()
+                self._wait()
+                continue
+            self._process(job)
+
+    def _process(self, job: dict):
+        start = time.monotonic()
+        try:
+            summary = self.run_job(job)
+            self.store.finish(job["id"], summary)
+            self.completed += 1
+            metrics.JOBS_FINISHED.inc(status="done")
+            logger.info(f"Job {job['id']} done in {time.monotonic() - start:.1f}s")
+        except Exception as e:
+            logger.error(f"Job {job['id']} failed: {e}")
+            self.store.fail(job["id"], str(e))
+            self.failed += 1
+            metrics.JOBS_FINISHED.inc(status="failed")
+        if job["callback_url"]:
+            self._send_callback(self.store.get(job["id"]))
+
+    def _send_callback(self, job: dict):
+        """POST the finished job to its callback URL, retrying with backoff"""
+        payload = json.dumps(job_result(job)).encode("utf-8")
+        error = None
+        for attempt in range(CALLBACK_ATTEMPTS):
+            if attempt:
+                time.sleep(2 ** attempt)
+            request = urllib.request.Request(
+                job["callback_url"], data=payload, headers={"Content-Type": "application/json"}
+            )
+            try:
+                # Checked again right before sending: DNS may have changed since submit.
+                # The request then goes to the checked address, not a fresh lookup
+                address = check_callback_url(job["callback_url"])
+                with _callback_opener(address).open(request, timeout=JOB_CALLBACK_TIMEOUT) as response:
+                    response.read()
+                self.store.set_callback_status(job["id"], "delivered")
+                return
+            except ValueError as e:
+                logger.warning(f"Callback for job {job['id']} rejected: {e}")
+                self.store.set_callback_status(job["id"], f"rejected: {e}")
+                return
+            except (urllib.error.URLError, OSError) as e:
+                error = e
+        logger.warning(f"Callback for job {job['id']} failed: {error}")
+        self.store.set_callback_status(job["id"], f"failed: {error}")
+
+    def _purge(self):
+        now = time.monotonic()
+        if self._last_purge is not None and now - self._last_purge < PURGE_INTERVAL:
+            return
+        self._last_purge = now
+        try:
+            purged = self.store.purge()
+            if purged:
+                logger.info(f"Purged {purged} finished job(s)")
+        except Exception as e:
+            logger.error(f"Error purging jobs: {e}")
+
+
+def job_result(job: dict) -> dict:
+    """Public view of a job row, as returned by GET /jobs/{id} and sent to callbacks"""
+    return {
+        "job_id": job["id"],
+        "status": job["status"],
+        "priority": job["priority"],
+        "model": job["model"],
+        "summary": job["summary"],
+        "error": job["error"],
+        "attempts": job["attempts"],
+        "created_at": job["created_at"],
+        "started_at": job["started_at"],
+        "finished_at": job["finished_at"],
+        "callback_status": job["callback_status"],
+    }
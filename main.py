@@ -1,29 +1,202 @@
-from fastapi import FastAPI, HTTPException
-from fastapi.responses import HTMLResponse
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.responses import HTMLResponse, JSONResponse, PlainTextResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
-from pydantic import BaseModel
-import pandas as pd
+from pydantic import BaseModel, Field
+from starlette.background import BackgroundTask
+from contextlib import asynccontextmanager
 from datetime import datetime
-import os
-from typing import Optional
+from typing import List, Optional
+import asyncio
+import json
 import logging
+import threading
+import time
 
 from summarizer import TextSummarizer
-from config import LOG_FILE
+from model_registry import ModelRegistry
+from batcher import BatchScheduler, QueueFullError
+from executor import get_inference_executor
+from request_log import RequestLogSink
+from stats import StatsAggregator
+from cache import SummaryCache, make_key
+from jobs import JobStore, JobRunner, check_callback_url, job_result
+from near_duplicates import NearDuplicateIndex
+from tuning import configure_threads
+import metrics
+import extractive
+from config import (
+    MODEL_NAME, MAX_LENGTH, LONG_DOC_CHUNK_TOKENS, LAZY_STARTUP, WARMUP_ON_STARTUP, STUB_MODEL, REQUEST_TIMEOUT,
+    SUMMARY_MODE, CONDENSE_MAX_WORDS, BATCH_MAX_SIZE, BATCH_MAX_DOCUMENTS, MAX_REQUEST_TIMEOUT, MAX_INPUT_BYTES,
+    PROFILER_ENABLED
+)
+
+SUMMARY_MODES = ("abstractive", "extractive", "condensed")
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="Summarify AI", description="AI-powered text summarization tool")
+# Initialize the model registry; the default model is loaded in the lifespan hook,
+# other models on first use
+if STUB_MODEL:
+    from stub_model import StubSummarizer, STUB_MODEL_NAME
+    registry = ModelRegistry(StubSummarizer, default=STUB_MODEL_NAME)
+else:
+    registry = ModelRegistry(TextSummarizer, default=MODEL_NAME)
+summarizer = registry.default_summarizer
+batch_scheduler = BatchScheduler(summarizer, registry=registry)
+request_log = RequestLogSink()
+stats = StatsAggregator()
+summary_cache = SummaryCache()
+near_duplicates = NearDuplicateIndex()
+
+def run_job(job: dict) -> str:
+    """Summarize a queued job on a job worker thread"""
+    text, max_length, min_length, model = job["text"], job["max_length"], job["min_length"], job["model"]
+    target = registry.peek(model)
+    long_document = is_long_document(text)
+    key = result_cache_key(target, text, max_length, min_length, long_document)
+    summary = summary_cache.get(key)
+    metrics.CACHE_LOOKUPS.inc(result="miss" if summary is None else "hit")
+    scope = result_scope(target, max_length, min_length, long_document)
+    if summary is None:
+        match = find_near_duplicate(text, scope)
+        if match is not None:
+            summary = match[0]
+    if summary is None:
+        start = time.monotonic()
+        with registry.lease(model) as job_summarizer:
+            # Decoding pauses whenever interactive requests are waiting or running
+            summary = job_summarizer.summarize_long(
+                text, max_length=max_length, min_length=min_length, yield_to=batch_scheduler.busy
+            )
+        summary_cache.put(key, summary)
+        near_duplicates.add(text, scope, summary)
+        processing_time = time.monotonic() - start
+        log_request(
+            build_request_data(text),
+            build_response_data(text, summary, processing_time, False, target.model_name),
+            processing_time
+        )
+    return summary
+
+job_runner = JobRunner(
+    JobStore(),
+    run_job,
+    can_start=lambda: summarizer.is_ready and not batch_scheduler.busy()
+)
 
-# Initialize the summarizer
-summarizer = TextSummarizer()
+def load_model():
+    """Load and warm up the model, recording failures in summarizer.status"""
+    try:
+        registry.preload(warm_up=WARMUP_ON_STARTUP)
+    except Exception as e:
+        logger.error(f"Model failed to load: {e}")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Tuned thread count; a no-op in forked workers, which set their own
+    configure_threads()
+    batch_scheduler.start()
+    request_log.start()
+    stats.load(backfill=request_log.read_all)
+    stats.start()
+    job_runner.start()
+    if LAZY_STARTUP:
+        # Start serving health checks right away, load the model in the background
+        threading.Thread(target=load_model, name="model-loader", daemon=True).start()
+    else:
+        load_model()
+    
+    yield
+    
+    job_runner.stop()
+    batch_scheduler.stop()
+    get_inference_executor().shutdown()
+    request_log.close()
+    stats.close()
+    summary_cache.close()
+
+app = FastAPI(title="Summarify AI", description="AI-powered text summarization tool", lifespan=lifespan)
+
+@app.middleware("http")
+async def record_http_metrics(request: Request, call_next):
+    """Count requests and time them per route"""
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        # Label by route template, not the raw URL, to keep the series count bounded
+        route = request.scope.get("route")
+        path = route.path if route is not None else "unmatched"
+        metrics.HTTP_REQUESTS.inc(method=request.method, path=path, status=status)
+        metrics.HTTP_LATENCY.observe(time.perf_counter() - start, method=request.method, path=path)
+
+def require_ready():
+    """Reject work with 503 until the model is loaded and warmed up"""
+    if not summarizer.is_ready:
+        raise HTTPException(
+            status_code=503,
+            detail=f"Model is not ready (status: {summarizer.status})",
+            headers={"Retry-After": "5"}
+        )
+
+def require_text_size(text: str):
+    """Reject inputs over MAX_INPUT_BYTES with 413"""
+    # A character is at most 4 bytes in UTF-8, so short texts skip the encode
+    if MAX_INPUT_BYTES and len(text) * 4 > MAX_INPUT_BYTES and len(text.encode("utf-8")) > MAX_INPUT_BYTES:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Text is too large, at most {MAX_INPUT_BYTES} bytes"
+        )
+
+def request_deadline(timeout: Optional[float]) -> Optional[float]:
+    """time.monotonic() deadline for a client-supplied or the configured timeout
+    
+    Client timeouts are validated by the request models (positive, at most
+    MAX_REQUEST_TIMEOUT); only REQUEST_TIMEOUT=0 runs without a deadline.
+    """
+    if timeout is None:
+        timeout = REQUEST_TIMEOUT
+    return time.monotonic() + timeout if timeout > 0 else None
+
+async def run_admitted(fn, *args):
+    """Run fn on the inference executor, holding a queue slot until it starts
+    
+    Raises QueueFullError when the queue is full. The slot is handed back
+    when fn starts, or here if fn never runs (cancelled while queued).
+    """
+    slot = batch_scheduler.reserve()
+    def start():
+        slot.release()
+        return fn(*args)
+    try:
+        return await get_inference_executor().run(start)
+    finally:
+        slot.release()
+
+def resolve_model(name: Optional[str]) -> str:
+    """Full name of the requested model, 400 for unknown models"""
+    try:
+        return registry.resolve(name)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 class TextRequest(BaseModel):
     text: str
     max_length: Optional[int] = None
     min_length: Optional[int] = None
+    # None picks the long-document mode automatically for long inputs
+    long_document: Optional[bool] = None
+    # Alias or name from AVAILABLE_MODELS, None for the default model
+    model: Optional[str] = None
+    # Seconds the client is willing to wait (default REQUEST_TIMEOUT)
+    timeout: Optional[float] = Field(None, gt=0, le=MAX_REQUEST_TIMEOUT or None)
+    # abstractive, extractive or condensed (default SUMMARY_MODE)
+    mode: Optional[str] = None
 
 class SummaryResponse(BaseModel):
     original_text: str
@@ -32,34 +205,240 @@ class SummaryResponse(BaseModel):
     summary_length: int
     compression_ratio: float
     processing_time: float
+    cached: bool = False
+    model: Optional[str] = None
+    mode: str = "abstractive"
+    # Estimated similarity to the document whose summary was reused (None when generated)
+    similarity: Optional[float] = None
+
+class JobRequest(BaseModel):
+    text: str
+    max_length: Optional[int] = None
+    min_length: Optional[int] = None
+    model: Optional[str] = None
+    # Higher runs first; interactive requests always come before jobs
+    priority: int = 0
+    # Receives the finished job (the GET /jobs/{id} body) as a POST
+    callback_url: Optional[str] = None
+
+class JobResponse(BaseModel):
+    job_id: str
+    status: str
+    priority: int
+    model: Optional[str] = None
+    summary: Optional[str] = None
+    error: Optional[str] = None
+    attempts: int
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    callback_status: Optional[str] = None
+
+class BatchDocument(BaseModel):
+    text: str
+    max_length: Optional[int] = None
+    min_length: Optional[int] = None
+
+class BatchSummaryRequest(BaseModel):
+    documents: List[BatchDocument]
+    model: Optional[str] = None
+    # Seconds for the whole call (default REQUEST_TIMEOUT)
+    timeout: Optional[float] = Field(None, gt=0, le=MAX_REQUEST_TIMEOUT or None)
+
+class BatchItemResult(BaseModel):
+    index: int
+    summary: Optional[SummaryResponse] = None
+    error: Optional[str] = None
+
+class BatchSummaryResponse(BaseModel):
+    results: List[BatchItemResult]
+    succeeded: int
+    failed: int
+    processing_time: float
+
+def is_long_document(text: str) -> bool:
+    """Whether the text likely needs the long-document mode"""
+    # Cheap character-based guess (a token is roughly 3-4 characters);
+    # summarize_long checks the real token count before chunking
+    return len(text) > LONG_DOC_CHUNK_TOKENS * 3
+
+def result_mode(target, long_document: bool, condense: bool = False) -> str:
+    """Settings of the target summarizer and request mode that change the summary"""
+    mode = target.cache_tag
+    if long_document:
+        mode += ":long"
+    elif condense:
+        mode += f":condensed{CONDENSE_MAX_WORDS}"
+    return mode
+
+def result_cache_key(
+    target,
+    text: str,
+    max_length: Optional[int],
+    min_length: Optional[int],
+    long_document: bool,
+    condense: bool = False
+) -> str:
+    """Result cache key of a summary made by the target summarizer"""
+    return make_key(text, max_length, min_length, target.model_name, result_mode(target, long_document, condense))
+
+def result_scope(
+    target,
+    max_length: Optional[int],
+    min_length: Optional[int],
+    long_document: bool,
+    condense: bool = False
+) -> str:
+    """Near-duplicate scope: summaries are only reused between requests with the same settings"""
+    mode = result_mode(target, long_document, condense)
+    return "\x00".join([target.model_name, mode, str(max_length), str(min_length)])
+
+def find_near_duplicate(text: str, scope: str) -> Optional[tuple]:
+    """(summary, similarity) of a near-identical summarized document, None if there is none"""
+    if not near_duplicates.enabled:
+        return None
+    match = near_duplicates.lookup(text, scope)
+    metrics.NEAR_DUPLICATE_LOOKUPS.inc(result="miss" if match is None else "hit")
+    if match is not None:
+        metrics.NEAR_DUPLICATE_SIMILARITY.observe(match[1])
+    return match
+
+async def cache_get(key: str) -> Optional[str]:
+    """Result cache lookup that never blocks the event loop on the disk tier
+    
+    The memory tier is checked inline; misses go to a thread, which reads
+    the disk tier (if any) and counts the miss.
+    """
+    summary = summary_cache.get(key, memory_only=True)
+    if summary is None:
+        summary = await asyncio.get_running_loop().run_in_executor(None, summary_cache.get, key)
+    return summary
+
+async def generate_summary(
+    text: str,
+    max_length: Optional[int] = None,
+    min_length: Optional[int] = None,
+    long_document: Optional[bool] = None,
+    model: Optional[str] = None,
+    deadline: Optional[float] = None,
+    condense: bool = False
+):
+    """Return (summary, cached, similarity), serving repeated inputs from the result cache
+    
+    Inputs that are near-identical to an already summarized document (see
+    near_duplicates.py) get that document's summary; similarity is the
+    estimated similarity to it (1.0 for exact cache hits, None when the
+    summary was generated). With condense=True the text is first cut down to its most salient
+    sentences, so it fits a single prompt. Raises QueueFullError when the
+    server is at capacity and TimeoutError when the deadline passes before
+    the summary is ready.
+    """
+    if condense:
+        long_document = False
+    elif long_document is None:
+        long_document = is_long_document(text)
+    
+    target = registry.peek(model)
+    key = result_cache_key(target, text, max_length, min_length, long_document, condense)
+    summary = await cache_get(key)
+    metrics.CACHE_LOOKUPS.inc(result="miss" if summary is None else "hit")
+    if summary is not None:
+        return summary, True, 1.0
+    
+    scope = result_scope(target, max_length, min_length, long_document, condense)
+    loop = asyncio.get_running_loop()
+    # Shingling a long document takes a moment, keep it off the event loop
+    match = await loop.run_in_executor(None, find_near_duplicate, text, scope)
+    if match is not None:
+        summary, similarity = match
+        return summary, True, similarity
+    
+    original_text = text
+    if condense:
+        text = await asyncio.get_running_loop().run_in_executor(None, extractive.condense, text, CONDENSE_MAX_WORDS)
+    
+    if long_document:
+        # Long documents are batched internally chunk by chunk, but still
+        # count against the queue limit while they wait for a worker
+        def summarize_long():
+            with batch_scheduler.running(), registry.lease(model) as long_summarizer:
+                return long_summarizer.summarize_long(
+                    text, max_length=max_length, min_length=min_length, deadline=deadline
+                )
+        summary = await run_admitted(summarize_long)
+    else:
+        summary = await asyncio.wrap_future(batch_scheduler.submit(
+            text,
+            max_length=max_length,
+            min_length=min_length,
+            model=model,
+            deadline=deadline
+        ))
+    # The disk tier commits on write, keep that off the event loop
+    loop.run_in_executor(None, summary_cache.put, key, summary)
+    loop.run_in_executor(None, near_duplicates.add, original_text, scope, summary)
+    return summary, False, None
+
+def build_response_data(
+    text: str,
+    summary: str,
+    processing_time: float,
+    cached: bool,
+    model: str,
+    mode: str = "abstractive",
+    similarity: Optional[float] = None
+) -> dict:
+    """Calculate response metrics for a finished summary"""
+    original_length = len(text)
+    summary_length = len(summary)
+    compression_ratio = (1 - summary_length / original_length) * 100 if original_length > 0 else 0
+    return {
+        "original_text": text,
+        "summary": summary,
+        "original_length": original_length,
+        "summary_length": summary_length,
+        "compression_ratio": compression_ratio,
+        "processing_time": processing_time,
+        "cached": cached,
+        "model": model,
+        "mode": mode,
+        "similarity": similarity
+    }
+
+def build_request_data(text: str) -> dict:
+    """Request fields kept for the log"""
+    return {
+        "original_length": len(text),
+        "text": text[:100] + "..." if len(text) > 100 else text
+    }
+
+def sse_event(data: dict, event: Optional[str] = None) -> str:
+    """Format a Server-Sent Events message"""
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data)}\n\n"
 
 def log_request(request_data: dict, response_data: dict, processing_time: float):
-    """Log request and response data to Excel file"""
+    """Queue request and response data for the request log and update statistics"""
+    log_requests([(request_data, response_data, processing_time)])
+
+def log_requests(records: List[tuple]):
+    """Log several (request_data, response_data, processing_time) records in one write"""
     try:
-        # Create log entry
-        log_entry = {
-            'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-            'original_length': request_data.get('original_length', 0),
-            'summary_length': response_data.get('summary_length', 0),
-            'compression_ratio': response_data.get('compression_ratio', 0),
-            'processing_time': processing_time,
-            'model_used': summarizer.model_name
-        }
-        
-        # Check if log file exists
-        if os.path.exists(LOG_FILE):
-            # Read existing data
-            df = pd.read_excel(LOG_FILE)
-            # Append new entry
-            df = pd.concat([df, pd.DataFrame([log_entry])], ignore_index=True)
-        else:
-            # Create new DataFrame
-            df = pd.DataFrame([log_entry])
-        
-        # Save to Excel
-        df.to_excel(LOG_FILE, index=False)
-        logger.info(f"Request logged to {LOG_FILE}")
-        
+        timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        log_entries = [
+            {
+                'timestamp': timestamp,
+                'original_length': request_data.get('original_length', 0),
+                'summary_length': response_data.get('summary_length', 0),
+                'compression_ratio': response_data.get('compression_ratio', 0),
+                'processing_time': processing_time,
+                'model_used': response_data.get('model') or summarizer.model_name
+            }
+            for request_data, response_data, processing_time in records
+        ]
+        request_log.log_many(log_entries)
+        for log_entry in log_entries:
+            stats.record(log_entry)
     except Exception as e:
         logger.error(f"Error logging request: {e}")
 
@@ -67,7 +446,9 @@ def log_request(request_data: dict, response_data: dict, processing_time: float)
 async def dashboard():
     """Display dashboard with statistics"""
     try:
-        if not os.path.exists(LOG_FILE):
+        current_stats = stats.get_stats()
+        total = current_stats["total"]
+        if not total["total_requests"]:
             return """
             <!DOCTYPE html>
             <html>
@@ -93,14 +474,12 @@ async def dashboard():
             </html>
             """
         
-        # Read log data
-        df = pd.read_excel(LOG_FILE)
-        
-        # Calculate statistics
-        total_requests = len(df)
-        avg_response_length = df['summary_length'].mean() if total_requests > 0 else 0
-        avg_compression_ratio = df['compression_ratio'].mean() if total_requests > 0 else 0
-        avg_processing_time = df['processing_time'].mean() if total_requests > 0 else 0
+        total_requests = total["total_requests"]
+        avg_response_length = total["avg_summary_length"]
+        avg_compression_ratio = total["avg_compression_ratio"]
+        avg_processing_time = total["avg_processing_time"]
+        last_hour = current_stats["last_hour"]
+        last_day = current_stats["last_day"]
         
         return f"""
         <!DOCTYPE html>
@@ -140,6 +519,36 @@ async def dashboard():
                         <div class="stat-number">{avg_processing_time:.2f}s</div>
                         <div class="stat-label">Avg Processing Time</div>
                     </div>
+                    <div class="stat-card">
+                        <div class="stat-number">{total["p50_processing_time"]:.2f}s</div>
+                        <div class="stat-label">P50 Processing Time</div>
+                    </div>
+                    <div class="stat-card">
+                        <div class="stat-number">{total["p95_processing_time"]:.2f}s</div>
+                        <div class="stat-label">P95 Processing Time</div>
+                    </div>
+                    <div class="stat-card">
+                        <div class="stat-number">{total["p99_processing_time"]:.2f}s</div>
+                        <div class="stat-label">P99 Processing Time</div>
+                    </div>
+                </div>
+                <div class="stats">
+                    <div class="stat-card">
+                        <div class="stat-number">{last_hour["total_requests"]}</div>
+                        <div class="stat-label">Requests (Last Hour)</div>
+                    </div>
+                    <div class="stat-card">
+                        <div class="stat-number">{last_hour["p95_processing_time"]:.2f}s</div>
+                        <div class="stat-label">P95 (Last Hour)</div>
+                    </div>
+                    <div class="stat-card">
+                        <div class="stat-number">{last_day["total_requests"]}</div>
+                        <div class="stat-label">Requests (Last Day)</div>
+                    </div>
+                    <div class="stat-card">
+                        <div class="stat-number">{last_day["p95_processing_time"]:.2f}s</div>
+                        <div class="stat-label">P95 (Last Day)</div>
+                    </div>
                 </div>
                 <div class="api-info">
                     <h3>📡 API Usage</h3>
@@ -166,53 +575,404 @@ async def summarize_text(request: TextRequest):
     try:
         if not request.text.strip():
             raise HTTPException(status_code=400, detail="Text cannot be empty")
+        require_text_size(request.text)
+        mode = request.mode or SUMMARY_MODE
+        if mode not in SUMMARY_MODES:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown mode '{mode}', expected one of: {', '.join(SUMMARY_MODES)}"
+            )
         
         # Set custom parameters if provided
         max_length = request.max_length if request.max_length else None
         min_length = request.min_length if request.min_length else None
         
+        if mode == "extractive":
+            # No model involved, so this works even while the model is loading
+            start_time = datetime.now()
+            max_words = (max_length or MAX_LENGTH) * 3 // 4
+            summary = await asyncio.get_running_loop().run_in_executor(
+                None, extractive.summarize, request.text, max_words
+            )
+            processing_time = (datetime.now() - start_time).total_seconds()
+            response_data = build_response_data(request.text, summary, processing_time, False, "extractive", mode)
+            log_request(build_request_data(request.text), response_data, processing_time)
+            metrics.SUMMARY_MODE_REQUESTS.inc(mode=mode)
+            return SummaryResponse(**response_data)
+        
+        require_ready()
+        model = resolve_model(request.model)
+        deadline = request_deadline(request.timeout)
+        
         # Generate summary
         start_time = datetime.now()
-        summary = summarizer.summarize(
-            request.text, 
-            max_length=max_length, 
-            min_length=min_length
+        summary, cached, similarity = await generate_summary(
+            request.text,
+            max_length=max_length,
+            min_length=min_length,
+            long_document=request.long_document,
+            model=model,
+            deadline=deadline,
+            condense=mode == "condensed"
         )
         end_time = datetime.now()
         processing_time = (end_time - start_time).total_seconds()
         
-        # Calculate metrics
-        original_length = len(request.text)
-        summary_length = len(summary)
-        compression_ratio = (1 - summary_length / original_length) * 100 if original_length > 0 else 0
-        
-        # Prepare response
-        response_data = {
-            "original_text": request.text,
-            "summary": summary,
-            "original_length": original_length,
-            "summary_length": summary_length,
-            "compression_ratio": compression_ratio,
-            "processing_time": processing_time
-        }
-        
-        # Log the request
-        request_data = {
-            "original_length": original_length,
-            "text": request.text[:100] + "..." if len(request.text) > 100 else request.text
-        }
-        log_request(request_data, response_data, processing_time)
+        response_data = build_response_data(request.text, summary, processing_time, cached, model, mode, similarity)
+        metrics.SUMMARY_MODE_REQUESTS.inc(mode=mode)
+        log_request(build_request_data(request.text), response_data, processing_time)
         
         return SummaryResponse(**response_data)
         
+    except HTTPException:
+        raise
+    except QueueFullError as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+    except TimeoutError as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         logger.error(f"Error in summarization: {e}")
         raise HTTPException(status_code=500, detail=f"Summarization failed: {str(e)}")
 
+@app.post("/summarize/batch", response_model=BatchSummaryResponse)
+async def summarize_batch(request: BatchSummaryRequest):
+    """Summarize many documents in one call
+    
+    Documents are tokenized together and generated in length-sorted batches,
+    one inference task per batch, so interactive requests can run between
+    them. Long documents go through the chunked long-document mode. Each
+    result carries either a summary or an error, so one bad document does
+    not fail the others.
+    """
+    if not request.documents:
+        raise HTTPException(status_code=400, detail="No documents provided")
+    if BATCH_MAX_DOCUMENTS and len(request.documents) > BATCH_MAX_DOCUMENTS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Too many documents ({len(request.documents)}), at most {BATCH_MAX_DOCUMENTS} per call"
+        )
+    for doc in request.documents:
+        require_text_size(doc.text)
+    require_ready()
+    model = resolve_model(request.model)
+    target = registry.peek(model)
+    deadline = request_deadline(request.timeout)
+    
+    start_time = datetime.now()
+    documents = request.documents
+    summaries = [None] * len(documents)
+    errors = [None] * len(documents)
+    cached = [False] * len(documents)
+    long_document = [is_long_document(doc.text) for doc in documents]
+    keys = [
+        result_cache_key(target, doc.text, doc.max_length, doc.min_length, long_document[i])
+        for i, doc in enumerate(documents)
+    ]
+    
+    misses = []
+    for i, key in enumerate(keys):
+        summary = summary_cache.get(key, memory_only=True)
+        if summary is not None:
+            summaries[i], cached[i] = summary, True
+        else:
+            misses.append(i)
+    if misses:
+        # One thread hop for the disk tier lookups of all memory misses
+        found = await asyncio.get_running_loop().run_in_executor(
+            None, lambda: [summary_cache.get(keys[i]) for i in misses]
+        )
+        for i, summary in zip(misses, found):
+            if summary is not None:
+                summaries[i], cached[i] = summary, True
+        misses = [i for i in misses if summaries[i] is None]
+    
+    # Similar lengths and identical parameters next to each other keep padding low
+    short = sorted(
+        (i for i in misses if not long_document[i]),
+        key=lambda i: (documents[i].max_length or 0, documents[i].min_length or 0, len(documents[i].text))
+    )
+    batches = [short[start:start + BATCH_MAX_SIZE] for start in range(0, len(short), BATCH_MAX_SIZE)]
+    
+    def summarize_documents(indices: List[int]) -> list:
+        with batch_scheduler.running(len(indices)), registry.lease(model) as batch_summarizer:
+            return batch_summarizer.summarize_many(
+                [(documents[i].text, documents[i].max_length, documents[i].min_length) for i in indices],
+                deadline=deadline
+            )
+    
+    def summarize_long_document(i: int):
+        try:
+            with batch_scheduler.running(), registry.lease(model) as long_summarizer:
+                return long_summarizer.summarize_long(
+                    documents[i].text,
+                    max_length=documents[i].max_length,
+                    min_length=documents[i].min_length,
+                    deadline=deadline
+                )
+        except Exception as e:
+            return e
+    
+    new_entries = []
+    try:
+        # One task at a time, each admitted like an interactive request: the
+        # executor is FIFO, so interactive batches queued meanwhile run
+        # before the next part of this call
+        for indices in batches + [[i] for i in misses if long_document[i]]:
+            if deadline is not None and time.monotonic() >= deadline:
+                metrics.DEADLINE_EXPIRED.inc(stage="queued")
+                outputs = [TimeoutError("Request deadline passed while queued")] * len(indices)
+            elif long_document[indices[0]]:
+                outputs = [await run_admitted(summarize_long_document, indices[0])]
+            else:
+                outputs = await run_admitted(summarize_documents, indices)
+            for i, output in zip(indices, outputs):
+                if isinstance(output, Exception):
+                    errors[i] = f"Summarization failed: {str(output)}"
+                else:
+                    summaries[i] = output
+                    new_entries.append((keys[i], output))
+    except QueueFullError as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+    except Exception as e:
+        logger.error(f"Error in batch summarization: {e}")
+        raise HTTPException(status_code=500, detail=f"Summarization failed: {str(e)}")
+    finally:
+        # Also keeps what was done before a failure, so a retry is served from the cache
+        if new_entries:
+            def cache_results():
+                for key, summary in new_entries:
+                    summary_cache.put(key, summary)
+            asyncio.get_running_loop().run_in_executor(None, cache_results)
+    
+    processing_time = (datetime.now() - start_time).total_seconds()
+    results = []
+    log_records = []
+    for i, doc in enumerate(documents):
+        if summaries[i] is None:
+            results.append(BatchItemResult(index=i, error=errors[i]))
+            continue
+        response_data = build_response_data(doc.text, summaries[i], processing_time, cached[i], model)
+        log_records.append((build_request_data(doc.text), response_data, processing_time))
+        results.append(BatchItemResult(index=i, summary=SummaryResponse(**response_data)))
+    
+    # One bulk write for the whole call
+    log_requests(log_records)
+    
+    return BatchSummaryResponse(
+        results=results,
+        succeeded=len(log_records),
+        failed=len(documents) - len(log_records),
+        processing_time=processing_time
+    )
+
+@app.post("/summarize/stream")
+async def summarize_stream(request: TextRequest, http_request: Request):
+    """Stream the summary as Server-Sent Events while it is generated
+    
+    Sends one "data" message per generated piece of text, then a "summary"
+    event with the cleaned summary and the usual response fields. Generation
+    is cancelled when the client disconnects and ends with an "error" event
+    when the deadline passes.
+    """
+    if not request.text.strip():
+        raise HTTPException(status_code=400, detail="Text cannot be empty")
+    require_text_size(request.text)
+    require_ready()
+    model = resolve_model(request.model)
+    deadline = request_deadline(request.timeout)
+    
+    start_time = datetime.now()
+    target = registry.peek(model)
+    key = make_key(
+        request.text, request.max_length, request.min_length,
+        target.model_name, target.cache_tag
+    )
+    summary = await cache_get(key)
+    cached = summary is not None
+    slot = None
+    if not cached:
+        # Admitted like /summarize; the slot is handed back once generation starts
+        try:
+            slot = batch_scheduler.reserve()
+        except QueueFullError as e:
+            raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+    
+    async def events():
+        summary_text = summary
+        if cached:
+            yield sse_event({"token": summary_text})
+        else:
+            loop = asyncio.get_running_loop()
+            cancel_event = threading.Event()
+            try:
+                stream_summarizer = await loop.run_in_executor(None, registry.acquire, model)
+            except Exception as e:
+                slot.release()
+                logger.error(f"Error loading model {model}: {e}")
+                yield sse_event({"detail": f"Summarization failed: {str(e)}"}, event="error")
+                return
+            # The generating thread hands pieces to the loop, so an open stream
+            # never keeps a thread waiting on it
+            pieces = asyncio.Queue()
+            generation = None
+            generated = []
+            first_token_time = None
+            try:
+                generation = asyncio.wrap_future(stream_summarizer.stream_to(
+                    request.text,
+                    lambda piece: loop.call_soon_threadsafe(pieces.put_nowait, piece),
+                    max_length=request.max_length,
+                    min_length=request.min_length,
+                    cancel_event=cancel_event,
+                    deadline=deadline,
+                    on_start=slot.release
+                ))
+                while True:
+                    piece = await pieces.get()
+                    if piece is None:
+                        break
+                    if await http_request.is_disconnected():
+                        logger.info("Client disconnected, cancelling generation")
+                        return
+                    if first_token_time is None:
+                        first_token_time = (datetime.now() - start_time).total_seconds()
+                        logger.info(f"Time to first token: {first_token_time:.3f}s")
+                    generated.append(piece)
+                    yield sse_event({"token": piece})
+                await generation
+            except TimeoutError as e:
+                yield sse_event({"detail": str(e)}, event="error")
+                return
+            except Exception as e:
+                logger.error(f"Error in streaming summarization: {e}")
+                yield sse_event({"detail": f"Summarization failed: {str(e)}"}, event="error")
+                return
+            finally:
+                # Also reached when the response task is cancelled on disconnect
+                cancel_event.set()
+                if generation is not None and not generation.done():
+                    # Drops the generation if it has not started yet
+                    generation.cancel()
+                slot.release()
+                registry.release(stream_summarizer)
+            
+            summary_text = stream_summarizer.finish_stream("".join(generated))
+            loop.run_in_executor(None, summary_cache.put, key, summary_text)
+        
+        processing_time = (datetime.now() - start_time).total_seconds()
+        response_data = build_response_data(request.text, summary_text, processing_time, cached, model)
+        log_request(build_request_data(request.text), response_data, processing_time)
+        yield sse_event(response_data, event="summary")
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        # Hands the slot back even if the client leaves before events() starts
+        background=BackgroundTask(slot.release) if slot is not None else None
+    )
+
+@app.post("/jobs", response_model=JobResponse, status_code=202)
+async def submit_job(request: JobRequest):
+    """Queue a summarization to run in the background, poll GET /jobs/{id} for the result"""
+    if not request.text.strip():
+        raise HTTPException(status_code=400, detail="Text cannot be empty")
+    require_text_size(request.text)
+    model = resolve_model(request.model)
+    loop = asyncio.get_running_loop()
+    if request.callback_url:
+        try:
+            # Resolves the host, keep that off the event loop
+            await loop.run_in_executor(None, check_callback_url, request.callback_url)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except OSError as e:
+            raise HTTPException(status_code=400, detail=f"Cannot resolve callback_url host: {e}")
+    job = await loop.run_in_executor(
+        None,
+        lambda: job_runner.store.submit(
+            request.text,
+            max_length=request.max_length,
+            min_length=request.min_length,
+            model=model,
+            priority=request.priority,
+            callback_url=request.callback_url
+        )
+    )
+    job_runner.notify()
+    return JobResponse(**job_result(job))
+
+@app.get("/jobs/{job_id}", response_model=JobResponse)
+async def get_job(job_id: str):
+    """Status of a job, with its summary once it is done"""
+    job = await asyncio.get_running_loop().run_in_executor(None, job_runner.store.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return JobResponse(**job_result(job))
+
+@app.get("/stats")
+async def get_stats():
+    """Overall and time-windowed request statistics"""
+    return {
+        **stats.get_stats(),
+        "cache": summary_cache.get_stats(),
+        "near_duplicates": near_duplicates.get_stats(),
+        "batching": batch_scheduler.get_stats(),
+        "jobs": await asyncio.get_running_loop().run_in_executor(None, job_runner.get_stats)
+    }
+
+@app.get("/models")
+async def get_models():
+    """Available models, which are loaded, their memory use and load/eviction counts"""
+    return registry.get_model_info()
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Per-stage latency histograms and counters in the Prometheus text format"""
+    metrics.QUEUE_DEPTH.set(batch_scheduler.get_stats()["queued"])
+    # With several workers, add the others' values from their latest statistics snapshots
+    return PlainTextResponse(metrics.REGISTRY.render(stats.peer_metrics()), media_type="text/plain; version=0.0.4")
+
+def require_profiler():
+    """Answer 404 on the /debug routes unless PROFILER_ENABLED is set"""
+    if not PROFILER_ENABLED:
+        raise HTTPException(status_code=404, detail="Not Found")
+
+@app.post("/debug/profiler/start")
+async def start_profiler(interval_ms: Optional[float] = Query(None, ge=1)):
+    """Start sampling the stacks of all threads (discards earlier samples)"""
+    require_profiler()
+    metrics.PROFILER.start(interval_ms=interval_ms)
+    return metrics.PROFILER.get_status()
+
+@app.post("/debug/profiler/stop")
+async def stop_profiler():
+    """Stop sampling, the collected stacks stay available"""
+    require_profiler()
+    await asyncio.get_running_loop().run_in_executor(None, metrics.PROFILER.stop)
+    return metrics.PROFILER.get_status()
+
+@app.get("/debug/profiler", response_class=PlainTextResponse)
+async def get_profile(limit: int = Query(0, ge=0)):
+    """Sampled stacks in collapsed format, ready for flamegraph.pl or speedscope"""
+    require_profiler()
+    return PlainTextResponse(metrics.PROFILER.collapsed(limit))
+
 @app.get("/health")
 async def health_check():
-    """Health check endpoint"""
-    return {"status": "healthy", "model_loaded": summarizer.is_loaded}
+    """Liveness check, reports the model status (loading, warming, ready or failed)"""
+    return {
+        "status": "healthy",
+        "model_status": summarizer.status,
+        "model_loaded": summarizer.is_loaded,
+        "ready": summarizer.is_ready
+    }
+
+@app.get("/ready")
+async def readiness_check():
+    """Readiness probe: 200 once the model is warmed up, 503 before that"""
+    body = {"ready": summarizer.is_ready, "model_status": summarizer.status}
+    return JSONResponse(content=body, status_code=200 if summarizer.is_ready else 503)
 
 if __name__ == "__main__":
     import uvicorn
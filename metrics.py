@@ -0,0 +1,334 @@
+"""
+Prometheus-format metrics and a sampling profiler for Summarify AI
+
+Metrics are plain counters, gauges and histograms kept in memory and
+rendered in the Prometheus text exposition format by GET /metrics. The
+profiler samples every thread's stack at a fixed interval while it is
+switched on and reports collapsed stacks (flame graph input).
+"""
+
+import bisect
+import collections
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from config import PROFILER_INTERVAL_MS, PROFILER_MAX_STACKS
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+RATE_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+
+def _format_labels(labelnames: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def render(self, peers: Iterable[list] = ()) -> List[str]:
+        """Exposition lines, with the values of other processes (see state()) added in"""
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            values = self._merged(peers)
+        lines.extend(self._samples(values))
+        return lines
+
+    def state(self) -> list:
+        """Current values in a JSON-serializable form"""
+        raise NotImplementedError
+
+    def _merged(self, peers: Iterable[list]):
+        raise NotImplementedError
+
+    def _samples(self, values) -> List[str]:
+        raise NotImplementedError
+
+
+class _ValueMetric(_Metric):
+    """Metric with one number per label set; values from other processes are summed"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def state(self) -> list:
+        with self._lock:
+            return [[list(key), value] for key, value in self._values.items()]
+
+    def _merged(self, peers: Iterable[list]) -> Dict[Tuple[str, ...], float]:
+        values = dict(self._values)
+        for state in peers:
+            for labels, value in state:
+                key = tuple(labels)
+                values[key] = values.get(key, 0) + value
+        return values
+
+    def _samples(self, values) -> List[str]:
+        return [f"{self.name}{_format_labels(self.labelnames, k)} {v}" for k, v in values.items()]
+
+
+class Counter(_ValueMetric):
+    """Monotonically increasing value"""
+
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_ValueMetric):
+    """Value that can go up and down"""
+
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    """Observations counted into cumulative buckets"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                # Per-bucket counts (last slot is +Inf), sum, count
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the duration of a with block"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def state(self) -> list:
+        with self._lock:
+            return [[list(key), list(counts), total, count] for key, (counts, total, count) in self._series.items()]
+
+    def _merged(self, peers: Iterable[list]) -> Dict[Tuple[str, ...], list]:
+        series = {key: [list(counts), total, count] for key, (counts, total, count) in self._series.items()}
+        for state in peers:
+            for labels, counts, total, count in state:
+                merged = series.setdefault(tuple(labels), [[0] * (len(self.buckets) + 1), 0.0, 0])
+                merged[0] = [a + b for a, b in zip(merged[0], counts)]
+                merged[1] += total
+                merged[2] += count
+        return series
+
+    def _samples(self, series) -> List[str]:
+        lines = []
+        for key, (counts, total, count) in series.items():
+            cumulative = 0
+            for bound, bucket_count in zip(list(self.buckets) + ["+Inf"], counts):
+                cumulative += bucket_count
+                le = f'le="{bound}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Collection of metrics rendered together"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (), buckets=LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def state(self) -> Dict[str, list]:
+        """Values of every metric, for another process to merge into its render()"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return {metric.name: metric.state() for metric in metrics}
+
+    def render(self, peers: Iterable[Dict[str, list]] = ()) -> str:
+        """All metrics in the Prometheus text exposition format
+
+        peers are state() dicts of other processes (forked workers); their
+        counters, gauges and histograms are summed with this process's.
+        """
+        with self._lock:
+            metrics = list(self._metrics.values())
+        peers = list(peers)
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render([peer[metric.name] for peer in peers if metric.name in peer]))
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+# Hot-path stages
+QUEUE_WAIT = REGISTRY.histogram("summarify_queue_wait_seconds", "Time requests wait in the batch queue")
+BATCH_SIZE = REGISTRY.histogram("summarify_batch_size", "Requests per generate call", buckets=(1, 2, 4, 8, 16, 32, 64))
+TOKENIZE_TIME = REGISTRY.histogram("summarify_tokenize_seconds", "Time spent tokenizing and padding prompts")
+PREFILL_TIME = REGISTRY.histogram("summarify_prefill_seconds", "Time until the first token of a generate call")
+DECODE_TIME = REGISTRY.histogram("summarify_decode_seconds", "Time spent generating tokens after the first one")
+GENERATE_TIME = REGISTRY.histogram("summarify_generate_seconds", "Total time of generate calls")
+TOKENS_PER_SECOND = REGISTRY.histogram(
+    "summarify_decode_tokens_per_second", "Generated tokens per second of decode time", buckets=RATE_BUCKETS
+)
+GENERATED_TOKENS = REGISTRY.counter("summarify_generated_tokens_total", "Tokens generated")
+POSTPROCESS_TIME = REGISTRY.histogram("summarify_postprocess_seconds", "Time spent extracting and cleaning summaries")
+LOG_WRITE_TIME = REGISTRY.histogram("summarify_log_write_seconds", "Time spent flushing the request log")
+QUEUE_DEPTH = REGISTRY.gauge("summarify_queue_depth", "Requests waiting in the batch queue")
+ADMISSION_REJECTED = REGISTRY.counter("summarify_admission_rejected_total", "Requests rejected because the queue was full")
+DEADLINE_EXPIRED = REGISTRY.counter(
+    "summarify_deadline_expired_total", "Requests whose deadline passed, by where they were dropped", ("stage",)
+)
+SUMMARY_MODE_REQUESTS = REGISTRY.counter("summarify_summary_mode_requests_total", "Summaries served per mode", ("mode",))
+JOBS_FINISHED = REGISTRY.counter("summarify_jobs_total", "Background jobs finished", ("status",))
+CACHE_LOOKUPS = REGISTRY.counter("summarify_cache_lookups_total", "Result cache lookups", ("result",))
+NEAR_DUPLICATE_LOOKUPS = REGISTRY.counter(
+    "summarify_near_duplicate_lookups_total", "Near-duplicate index lookups", ("result",)
+)
+NEAR_DUPLICATE_SIMILARITY = REGISTRY.histogram(
+    "summarify_near_duplicate_similarity", "Estimated similarity of reused near-duplicate summaries",
+    buckets=(0.8, 0.85, 0.9, 0.95, 0.98, 1.0)
+)
+
+# HTTP layer
+HTTP_REQUESTS = REGISTRY.counter("summarify_http_requests_total", "HTTP requests", ("method", "path", "status"))
+HTTP_LATENCY = REGISTRY.histogram("summarify_http_request_seconds", "HTTP request latency", ("method", "path"))
+
+
+class SamplingProfiler:
+    """Periodically samples the stacks of all threads while running
+
+    At most max_stacks distinct stacks are kept; samples of further stacks
+    are counted under OTHER_STACK, so memory stays bounded however long it runs.
+    """
+
+    OTHER_STACK = "[other]"
+
+    def __init__(self, interval_ms: float = PROFILER_INTERVAL_MS, max_stacks: int = PROFILER_MAX_STACKS):
+        self.interval = interval_ms / 1000
+        self.max_stacks = max(1, max_stacks)
+        self._counts = collections.Counter()
+        self._samples = 0
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+        self._started_at = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, interval_ms: Optional[float] = None, reset: bool = True):
+        """Start sampling (no-op if already running)"""
+        if interval_ms is not None and interval_ms <= 0:
+            raise ValueError("interval_ms must be positive")
+        if self.running:
+            return
+        if interval_ms:
+            self.interval = interval_ms / 1000
+        if reset:
+            self._counts.clear()
+            self._samples = 0
+        self._stopped.clear()
+        self._started_at = time.time()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop sampling, keeping the collected stacks"""
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def collapsed(self, limit: int = 0) -> str:
+        """Collapsed stacks ("frame;frame;frame count"), most frequent first"""
+        items = self._counts.most_common(limit or None)
+        return "\n".join(f"{stack} {count}" for stack, count in items) + ("\n" if items else "")
+
+    def get_status(self) -> dict:
+        return {
+            "running": self.running,
+            "interval_ms": self.interval * 1000,
+            "samples": self._samples,
+            "unique_stacks": len(self._counts),
+            "started_at": self._started_at,
+        }
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stopped.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({code.co_filename.rsplit('/', 1)[-1]}:{frame.f_lineno})")
+                    frame = frame.f_back
+                key = ";".join(reversed(stack))
+                if key not in self._counts and len(self._counts) >= self.max_stacks:
+                    key = self.OTHER_STACK
+                self._counts[key] += 1
+            self._samples += 1
+
+
+PROFILER = SamplingProfiler()
@@ -0,0 +1,191 @@
+import gc
+import logging
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, Optional
+
+from config import MODEL_NAME, AVAILABLE_MODELS, MODEL_MEMORY_BUDGET_MB
+
+logger = logging.getLogger(__name__)
+
+
+def parse_models(spec: str) -> Dict[str, str]:
+    """Parse "alias=model,alias=model" into {alias: model name}"""
+    models = {}
+    for item in spec.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        alias, _, name = item.partition("=")
+        alias, name = alias.strip(), name.strip()
+        models[alias] = name or alias
+    return models
+
+
+class ModelRegistry:
+    """Named summarizers loaded on demand within a memory budget
+
+    Requests pick a model by alias or full name. A model is loaded the first
+    time it is used; when loading would exceed the budget, the least recently
+    used models that are not serving a request are unloaded first. The
+    default model is pinned and never evicted.
+    """
+
+    def __init__(
+        self,
+        factory: Callable,
+        models: Optional[Dict[str, str]] = None,
+        default: str = MODEL_NAME,
+        memory_budget_mb: float = MODEL_MEMORY_BUDGET_MB
+    ):
+        self.aliases = dict(models if models is not None else parse_models(AVAILABLE_MODELS))
+        self.default = default
+        self.memory_budget_mb = memory_budget_mb
+        self._summarizers = OrderedDict()
+        for name in [default] + [n for n in self.aliases.values() if n != default]:
+            self._summarizers[name] = factory(load=False, model_name=name)
+        self._footprints: Dict[str, float] = {}
+        self._leases: Dict[str, int] = {name: 0 for name in self._summarizers}
+        self._lock = threading.Lock()
+        self._load_locks = {name: threading.Lock() for name in self._summarizers}
+        self.loads = 0
+        self.evictions = 0
+
+    @property
+    def default_summarizer(self):
+        return self._summarizers[self.default]
+
+    def resolve(self, name: Optional[str] = None) -> str:
+        """Full model name for an alias or name (None means the default model)"""
+        if not name:
+            return self.default
+        if name in self._summarizers:
+            return name
+        if name in self.aliases:
+            return self.aliases[name]
+        raise ValueError(f"Unknown model '{name}', expected one of: {', '.join(self.names())}")
+
+    def names(self) -> list:
+        """Aliases and model names requests may use"""
+        return list(dict.fromkeys(list(self.aliases) + list(self._summarizers)))
+
+    def peek(self, name: Optional[str] = None):
+        """Summarizer for a model without loading it"""
+        return self._summarizers[self.resolve(name)]
+
+    def acquire(self, name: Optional[str] = None):
+        """Return a loaded summarizer, loading it if needed; pair with release()"""
+        model_name = self.resolve(name)
+        summarizer = self._summarizers[model_name]
+        with self._lock:
+            self._leases[model_name] += 1
+            self._summarizers.move_to_end(model_name)
+        try:
+            if not summarizer.is_loaded:
+                self._load(model_name)
+        except Exception:
+            self.release(summarizer)
+            raise
+        return summarizer
+
+    def release(self, summarizer):
+        """Mark a summarizer returned by acquire() as no longer in use"""
+        with self._lock:
+            for name, candidate in self._summarizers.items():
+                if candidate is summarizer:
+                    self._leases[name] -= 1
+                    break
+
+    @contextmanager
+    def lease(self, name: Optional[str] = None) -> Iterator:
+        """Loaded summarizer that cannot be evicted inside the with block"""
+        summarizer = self.acquire(name)
+        try:
+            yield summarizer
+        finally:
+            self.release(summarizer)
+
+    def preload(self, name: Optional[str] = None, warm_up: bool = True, ready: bool = True):
+        """Load a model ahead of its first request (ready=False: weights only)"""
+        self._load(self.resolve(name), warm_up=warm_up, ready=ready)
+
+    def get_model_info(self) -> dict:
+        """Loaded models, their memory footprint and load/eviction counts"""
+        return {
+            "default_model": self.default,
+            "aliases": self.aliases,
+            "memory_budget_mb": self.memory_budget_mb,
+            "memory_used_mb": self._memory_used(),
+            "loads": self.loads,
+            "evictions": self.evictions,
+            "models": [
+                {
+                    **summarizer.get_model_info(),
+                    "memory_mb": self._footprints.get(name),
+                    "in_use": self._leases[name],
+                }
+                for name, summarizer in self._summarizers.items()
+            ],
+        }
+
+    def _load(self, model_name: str, warm_up: Optional[bool] = None, ready: bool = True):
+        summarizer = self._summarizers[model_name]
+        # One loader per model; other requests for it wait here
+        if warm_up is None:
+            # Warm up the default model; others are loaded by the request that needs them
+            warm_up = model_name == self.default
+        with self._load_locks[model_name]:
+            if summarizer.is_ready:
+                return
+            if summarizer.is_loaded:
+                # Weights loaded earlier with ready=False, e.g. before forking workers
+                summarizer.load(warm_up=warm_up, ready=ready)
+                return
+            # Make room before loading, from the size measured at an earlier load
+            # or estimated from the weights on disk / the model config
+            footprint = self._footprints.get(model_name) or summarizer.estimate_mb()
+            self._evict_for(model_name, footprint)
+
+            start = time.time()
+            summarizer.load(warm_up=warm_up, ready=ready)
+            # The weights themselves, not whatever else the process allocated meanwhile
+            # (the first load also imports torch and transformers)
+            measured = summarizer.parameter_mb()
+            self._footprints[model_name] = max(footprint, measured)
+            self.loads += 1
+            logger.info(f"Loaded {model_name} ({self._footprints[model_name]:.0f} MB) in {time.time() - start:.1f}s")
+
+            if measured > footprint:
+                # Bigger than estimated, make up the difference now
+                self._evict_for(model_name, 0)
+
+    def _memory_used(self) -> float:
+        return sum(
+            self._footprints.get(name, 0)
+            for name, summarizer in self._summarizers.items()
+            if summarizer.is_loaded
+        )
+
+    def _evict_for(self, model_name: str, needed_mb: float):
+        """Unload least recently used models until needed_mb more fits the budget"""
+        if self.memory_budget_mb <= 0:
+            return
+        with self._lock:
+            candidates = [
+                name for name, summarizer in self._summarizers.items()
+                if summarizer.is_loaded and name not in (model_name, self.default) and not self._leases[name]
+            ]
+        for name in candidates:
+            if self._memory_used() + needed_mb <= self.memory_budget_mb:
+                return
+            with self._lock:
+                if self._leases[name]:
+                    continue
+                self._summarizers[name].unload()
+            self.evictions += 1
+            logger.info(f"Evicted {name} to stay within the {self.memory_budget_mb:.0f} MB model budget")
+            gc.collect()
+        if self._memory_used() + needed_mb > self.memory_budget_mb:
+            logger.warning(f"Models in use exceed the {self.memory_budget_mb:.0f} MB budget")
@@ -0,0 +1,201 @@
+"""
+Near-duplicate detection with MinHash and locality-sensitive hashing
+
+Documents from feeds often differ only in whitespace, timestamps, tracking
+footers or other boilerplate, which the exact-match result cache misses.
+Each summarized input is reduced to a MinHash signature of its word
+shingles; signatures are split into bands and hashed into LSH buckets, so
+a lookup only compares against documents that share at least one band.
+The fraction of equal signature positions estimates the Jaccard similarity
+of the shingle sets, and a stored summary is reused when it reaches the
+threshold.
+
+Summaries are only reused within the same scope (model and generation
+settings). Entries are evicted least recently used to a memory budget.
+"""
+
+import re
+import threading
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+import numpy as np
+
+from config import NEAR_DUP_ENABLED, NEAR_DUP_THRESHOLD, NEAR_DUP_MAX_BYTES, NEAR_DUP_NUM_PERM, NEAR_DUP_SHINGLE_WORDS
+
+# Mersenne prime for the universal hash family, 31 bits so a * x + b fits in uint64
+MERSENNE_PRIME = (1 << 31) - 1
+
+# Shingles hashed per step of the signature, bounds the num_perm x block temporaries
+SIGNATURE_BLOCK = 1024
+
+# Bookkeeping per entry (bucket references, dict nodes) on top of signature and summary
+ENTRY_OVERHEAD_BYTES = 400
+
+WORD = re.compile(r"\w+")
+DIGITS = re.compile(r"\d+")
+
+
+def shingles(text: str, size: int) -> Set[str]:
+    """Overlapping word n-grams of the normalized text
+
+    Digit runs are collapsed so dates, times and tracking numbers don't
+    count as differences.
+    """
+    return set(_iter_shingles(text, size))
+
+
+def _iter_shingles(text: str, size: int) -> Iterator[str]:
+    words = WORD.findall(DIGITS.sub("0", text.lower()))
+    if len(words) <= size:
+        yield " ".join(words)
+        return
+    for i in range(len(words) - size + 1):
+        yield " ".join(words[i:i + size])
+
+
+def choose_bands(num_perm: int, threshold: float, recall: float = 0.99) -> Tuple[int, int]:
+    """(bands, rows) for the LSH buckets
+
+    The most rows per band (fewest false candidates) that still make a
+    document at the threshold a candidate with the given probability; the
+    exact signature comparison then filters the candidates.
+    """
+    options = [(num_perm // rows, rows) for rows in range(1, num_perm + 1) if num_perm % rows == 0]
+    good = [(bands, rows) for bands, rows in options if 1 - (1 - threshold ** rows) ** bands >= recall]
+    return max(good, key=lambda option: option[1]) if good else (num_perm, 1)
+
+
+@dataclass
+class _Entry:
+    scope: str
+    signature: np.ndarray
+    summary: str
+    size: int
+
+
+class NearDuplicateIndex:
+    """MinHash/LSH index of summarized inputs"""
+
+    def __init__(
+        self,
+        threshold: float = NEAR_DUP_THRESHOLD,
+        max_bytes: int = NEAR_DUP_MAX_BYTES,
+        num_perm: int = NEAR_DUP_NUM_PERM,
+        shingle_words: int = NEAR_DUP_SHINGLE_WORDS,
+        enabled: bool = NEAR_DUP_ENABLED,
+        seed: int = 1
+    ):
+        self.enabled = enabled
+        self.threshold = threshold
+        self.max_bytes = max_bytes
+        self.num_perm = num_perm
+        self.shingle_words = shingle_words
+        self.bands, self.rows = choose_bands(num_perm, threshold)
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+        self._entries: "OrderedDict[int, _Entry]" = OrderedDict()
+        self._buckets: List[Dict[tuple, Set[int]]] = [{} for _ in range(self.bands)]
+        self._next_id = 0
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def signature(self, text: str) -> np.ndarray:
+        """MinHash signature of the text's shingles
+
+        Repeated shingles don't change a minimum, so they are hashed as they
+        come instead of being collected into a set first, and the permutations
+        are applied SIGNATURE_BLOCK shingles at a time with a running minimum.
+        """
+        hashes = np.fromiter(
+            (zlib.crc32(s.encode("utf-8")) for s in _iter_shingles(text, self.shingle_words)),
+            dtype=np.uint64
+        ) % np.uint64(MERSENNE_PRIME)
+        signature = np.full(self.num_perm, MERSENNE_PRIME, dtype=np.uint64)
+        for start in range(0, len(hashes), SIGNATURE_BLOCK):
+            block = hashes[start:start + SIGNATURE_BLOCK]
+            permuted = (self._a[:, None] * block[None, :] + self._b[:, None]) % np.uint64(MERSENNE_PRIME)
+            np.minimum(signature, permuted.min(axis=1), out=signature)
+        return signature.astype(np.uint32)
+
+    def lookup(self, text: str, scope: str) -> Optional[Tuple[str, float]]:
+        """(summary, estimated similarity) of the most similar stored document above the threshold"""
+        if not self.enabled:
+            return None
+        signature = self.signature(text)
+        with self._lock:
+            best, best_similarity = None, 0.0
+            for entry_id in self._candidates(signature, scope):
+                similarity = float(np.mean(self._entries[entry_id].signature == signature))
+                if similarity > best_similarity:
+                    best, best_similarity = entry_id, similarity
+            if best is None or best_similarity < self.threshold:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(best)
+            self.hits += 1
+            return self._entries[best].summary, best_similarity
+
+    def add(self, text: str, scope: str, summary: str):
+        """Index a summarized document"""
+        if not self.enabled:
+            return
+        signature = self.signature(text)
+        size = signature.nbytes + len(summary.encode("utf-8")) + len(scope) + ENTRY_OVERHEAD_BYTES
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            entry_id = self._next_id
+            self._next_id += 1
+            self._entries[entry_id] = _Entry(scope, signature, summary, size)
+            for band, key in enumerate(self._band_keys(signature, scope)):
+                self._buckets[band].setdefault(key, set()).add(entry_id)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                self._evict_oldest()
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "threshold": self.threshold,
+                "bands": self.bands,
+                "rows": self.rows,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0,
+            }
+
+    def _band_keys(self, signature: np.ndarray, scope: str) -> List[tuple]:
+        return [
+            (scope, signature[band * self.rows:(band + 1) * self.rows].tobytes())
+            for band in range(self.bands)
+        ]
+
+    def _candidates(self, signature: np.ndarray, scope: str) -> Set[int]:
+        candidates = set()
+        for band, key in enumerate(self._band_keys(signature, scope)):
+            candidates.update(self._buckets[band].get(key, ()))
+        return candidates
+
+    def _evict_oldest(self):
+        entry_id, entry = self._entries.popitem(last=False)
+        for band, key in enumerate(self._band_keys(entry.signature, entry.scope)):
+            bucket = self._buckets[band].get(key)
+            if bucket is not None:
+                bucket.discard(entry_id)
+                if not bucket:
+                    del self._buckets[band][key]
+        self._bytes -= entry.size
+        self.evictions += 1
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Precision comparison for Summarify AI
+
+Runs a fixed corpus through TextSummarizer in each precision mode (fp32,
+bf16, int8) and reports latency, throughput, resident memory and how
+similar each mode's summaries are to the fp32 ones (ROUGE-L F1).
+
+    python precision_report.py
+    python precision_report.py --modes fp32 int8 --corpus docs.jsonl --output report.json
+"""
+
+import argparse
+import json
+import multiprocessing
+import statistics
+import sys
+import time
+from typing import List
+
+from config import MAX_LENGTH, MIN_LENGTH
+
+DEFAULT_CORPUS = [
+    "Machine learning is a subset of artificial intelligence that gives systems the ability to learn and "
+    "improve from experience without being explicitly programmed. It focuses on programs that can access "
+    "data and use it to learn for themselves, looking for patterns in data to make better decisions.",
+    "Climate change refers to long-term shifts in global temperatures and weather patterns. Since the 1800s "
+    "human activities have been the main driver of climate change, primarily due to burning fossil fuels "
+    "like coal, oil and gas, which generates greenhouse gas emissions that trap the sun's heat.",
+    "The Internet of Things describes the network of physical objects that are embedded with sensors, "
+    "software and other technologies for the purpose of connecting and exchanging data with other devices "
+    "and systems over the internet. These devices range from household objects to industrial tools.",
+    "Photosynthesis is the process used by plants, algae and certain bacteria to turn sunlight, carbon "
+    "dioxide and water into glucose and oxygen. It takes place mainly in the chloroplasts of leaf cells "
+    "and provides the energy that nearly all life on Earth depends on, directly or indirectly.",
+    "The printing press, invented by Johannes Gutenberg around 1440, made it possible to produce books "
+    "quickly and cheaply. It spread literacy across Europe, helped fuel the Renaissance and the "
+    "Reformation, and laid the foundations of the modern knowledge-based economy.",
+]
+
+
+def rouge_l_f1(candidate: str, reference: str) -> float:
+    """ROUGE-L F1 between two texts, computed on lowercase word tokens"""
+    a = candidate.lower().split()
+    b = reference.lower().split()
+    if not a or not b:
+        return 1.0 if a == b else 0.0
+
+    # Longest common subsequence, one row at a time
+    previous = [0] * (len(b) + 1)
+    for word in a:
+        current = [0]
+        for j, other in enumerate(b, 1):
+            current.append(previous[j - 1] + 1 if word == other else max(previous[j], current[j - 1]))
+        previous = current
+    lcs = previous[-1]
+    if lcs == 0:
+        return 0.0
+    precision = lcs / len(a)
+    recall = lcs / len(b)
+    return 2 * precision * recall / (precision + recall)
+
+
+def load_corpus(path: str) -> List[str]:
+    """Read texts from a JSONL file (a "text" field per line) or a plain file (one text per paragraph)"""
+    with open(path, encoding="utf-8") as f:
+        if path.endswith(".jsonl"):
+            return [json.loads(line)["text"] for line in f if line.strip()]
+        return [p.strip() for p in f.read().split("\n\n") if p.strip()]
+
+
+def measure_mode(precision: str, corpus: List[str], max_length: int, min_length: int, runs: int) -> dict:
+    """Load the model in one precision mode and time it on the corpus (runs in its own process)"""
+    from memory import current_rss_mb, peak_rss_mb
+    from summarizer import TextSummarizer
+
+    baseline_rss = current_rss_mb()
+    load_start = time.time()
+    summarizer = TextSummarizer(precision=precision)
+    load_time = time.time() - load_start
+    # Greedy decoding so differences come from precision, not sampling
+    summarizer.deterministic = True
+    summarizer.warm_up()
+
+    latencies = []
+    summaries = []
+    for _ in range(runs):
+        summaries = []
+        for text in corpus:
+            start = time.time()
+            summaries.append(summarizer.summarize(text, max_length=max_length, min_length=min_length))
+            latencies.append(time.time() - start)
+
+    batch_start = time.time()
+    summarizer.summarize_batch(corpus, max_length=max_length, min_length=min_length)
+    batch_time = time.time() - batch_start
+
+    latencies.sort()
+    return {
+        "precision": summarizer.precision,
+        "requested_precision": precision,
+        "load_time": load_time,
+        "latency_mean": statistics.mean(latencies),
+        "latency_p50": latencies[len(latencies) // 2],
+        "latency_p95": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))],
+        "throughput_sequential": len(latencies) / sum(latencies),
+        "throughput_batched": len(corpus) / batch_time,
+        "model_rss_mb": current_rss_mb() - baseline_rss,
+        "peak_rss_mb": peak_rss_mb(),
+        "summaries": summaries,
+    }
+
+
+def print_report(results: List[dict]):
+    print("-" * 96)
+    print(f"{'mode':<6} {'load s':>7} {'mean s':>8} {'p50 s':>8} {'p95 s':>8} "
+          f"{'docs/s':>7} {'batch/s':>8} {'model MB':>9} {'peak MB':>8} {'ROUGE-L':>8}")
+    for r in results:
+        print(f"{r['precision']:<6} {r['load_time']:>7.1f} {r['latency_mean']:>8.3f} {r['latency_p50']:>8.3f} "
+              f"{r['latency_p95']:>8.3f} {r['throughput_sequential']:>7.2f} {r['throughput_batched']:>8.2f} "
+              f"{r['model_rss_mb']:>9.0f} {r['peak_rss_mb']:>8.0f} {r['similarity_to_fp32']:>8.3f}")
+    print("-" * 96)
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description="Compare Summarify AI precision modes")
+    parser.add_argument("--modes", nargs="+", default=["fp32", "bf16", "int8"], help="Precision modes to compare")
+    parser.add_argument("--corpus", help="JSONL file or blank-line separated text file (default: built-in corpus)")
+    parser.add_argument("--runs", type=int, default=2, help="Passes over the corpus per mode")
+    parser.add_argument("--max-length", type=int, default=MAX_LENGTH)
+    parser.add_argument("--min-length", type=int, default=MIN_LENGTH)
+    parser.add_argument("--output", help="Write the full results (including summaries) to this JSON file")
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus) if args.corpus else DEFAULT_CORPUS
+    modes = list(dict.fromkeys(["fp32"] + args.modes))
+    print(f"🔬 Comparing {', '.join(modes)} on {len(corpus)} documents x {args.runs} run(s)")
+
+    # A fresh process per mode so memory numbers don't include other modes' models
+    context = multiprocessing.get_context("spawn")
+    results = []
+    for mode in modes:
+        print(f"⏳ Measuring {mode}...")
+        with context.Pool(processes=1) as pool:
+            try:
+                results.append(pool.apply(measure_mode, (mode, corpus, args.max_length, args.min_length, args.runs)))
+            except Exception as e:
+                print(f"❌ {mode} failed: {e}")
+                if mode == "fp32":
+                    sys.exit(1)
+
+    reference = results[0]["summaries"]
+    for r in results:
+        scores = [rouge_l_f1(s, ref) for s, ref in zip(r["summaries"], reference)]
+        r["similarity_to_fp32"] = statistics.mean(scores) if scores else 0.0
+        if r["precision"] != r["requested_precision"]:
+            print(f"⚠️  {r['requested_precision']} is not supported here, measured {r['precision']} instead")
+
+    print_report(results)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"📄 Full results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
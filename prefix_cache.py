@@ -0,0 +1,97 @@
+import logging
+import threading
+from typing import Dict, List, Tuple
+
+import torch
+
+logger = logging.getLogger(__name__)
+
+
+def _cache_layers(past_key_values) -> List[Tuple[torch.Tensor, torch.Tensor]]:
+    """Per-layer (key, value) tensors of a transformers cache object"""
+    if hasattr(past_key_values, "layers"):
+        return [(layer.keys, layer.values) for layer in past_key_values.layers]
+    return [(past_key_values[i][0], past_key_values[i][1]) for i in range(len(past_key_values))]
+
+
+class PrefixKVCache:
+    """Key/value cache of constant prompt prefixes, computed once per prefix
+
+    Every summarization prompt starts with the same instruction. Its
+    attention keys and values are computed once and each generation starts
+    from a copy, so only the document part of the prompt is prefilled.
+    """
+
+    def __init__(self, model, tokenizer, device: str):
+        self.model = model
+        self.tokenizer = tokenizer
+        self.device = device
+        self._entries: Dict[str, Tuple[List[int], list]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.prefill_tokens_saved = 0
+
+    def get(self, prefix: str) -> Tuple[List[int], list]:
+        """Token ids and per-layer key/value tensors for a prefix"""
+        entry = self._entries.get(prefix)
+        if entry is None:
+            with self._lock:
+                entry = self._entries.get(prefix)
+                if entry is None:
+                    entry = self._entries[prefix] = self._compute(prefix)
+        return entry
+
+    def build_inputs(self, prefix: str, suffix_ids: List[List[int]], pad_token_id: int) -> dict:
+        """generate() inputs for a batch of prompts that all start with prefix
+
+        Rows are laid out as [prefix][padding][suffix]: the cached prefix is
+        shared by every row and padding sits between prefix and document,
+        masked out by the attention mask.
+        """
+        from transformers import DynamicCache
+
+        prefix_ids, layers = self.get(prefix)
+        batch_size = len(suffix_ids)
+        width = max(len(ids) for ids in suffix_ids)
+
+        input_ids = []
+        attention_mask = []
+        for ids in suffix_ids:
+            padding = width - len(ids)
+            input_ids.append(prefix_ids + [pad_token_id] * padding + ids)
+            attention_mask.append([1] * len(prefix_ids) + [0] * padding + [1] * len(ids))
+
+        # generate() extends the cache in place, so each call gets its own copy
+        past_key_values = DynamicCache()
+        for layer_idx, (keys, values) in enumerate(layers):
+            past_key_values.update(
+                keys.repeat(batch_size, 1, 1, 1),
+                values.repeat(batch_size, 1, 1, 1),
+                layer_idx
+            )
+
+        self.hits += batch_size
+        self.prefill_tokens_saved += batch_size * len(prefix_ids)
+        return {
+            "input_ids": torch.tensor(input_ids, device=self.device),
+            "attention_mask": torch.tensor(attention_mask, device=self.device),
+            "past_key_values": past_key_values,
+        }
+
+    def get_stats(self) -> dict:
+        return {
+            "prefixes": len(self._entries),
+            "hits": self.hits,
+            "prefill_tokens_saved": self.prefill_tokens_saved,
+        }
+
+    def _compute(self, prefix: str) -> Tuple[List[int], list]:
+        prefix_ids = self.tokenizer(prefix)["input_ids"]
+        with torch.no_grad():
+            outputs = self.model(
+                input_ids=torch.tensor([prefix_ids], device=self.device),
+                use_cache=True
+            )
+        layers = [(k.detach(), v.detach()) for k, v in _cache_layers(outputs.past_key_values)]
+        logger.info(f"Cached key/values for a {len(prefix_ids)}-token prompt prefix")
+        return prefix_ids, layers
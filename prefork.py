@@ -0,0 +1,188 @@
+"""
+Multi-worker serving with model weights shared between processes
+
+The parent process loads the model once, then forks the workers. Forked
+workers share the parent's memory pages copy-on-write, and inference never
+writes to the weights (eval mode, no gradients), so N workers cost about
+one model's memory. Each worker serves the same listening socket and gets
+its own slice of the CPU cores for torch threads.
+
+Unix only (fork); run.py falls back to a single worker elsewhere.
+"""
+
+import gc
+import logging
+import os
+import signal
+import socket
+import sys
+import time
+from typing import Dict, List, Optional
+
+from config import HOST, PORT, WORKERS, THREADS_PER_WORKER, PIN_WORKER_CPUS
+
+logger = logging.getLogger(__name__)
+
+
+def available_cpus() -> List[int]:
+    """CPU ids this process may run on"""
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def numa_nodes() -> List[List[int]]:
+    """CPU ids of each NUMA node, restricted to the CPUs this process may use"""
+    allowed = set(available_cpus())
+    nodes = []
+    base = "/sys/devices/system/node"
+    try:
+        names = sorted(n for n in os.listdir(base) if n.startswith("node") and n[4:].isdigit())
+    except OSError:
+        return [sorted(allowed)]
+    for name in names:
+        try:
+            with open(os.path.join(base, name, "cpulist")) as f:
+                cpulist = f.read().strip()
+        except OSError:
+            continue
+        cpus = []
+        for part in filter(None, cpulist.split(",")):
+            first, _, last = part.partition("-")
+            cpus.extend(range(int(first), int(last or first) + 1))
+        cpus = [cpu for cpu in cpus if cpu in allowed]
+        if cpus:
+            nodes.append(cpus)
+    return nodes or [sorted(allowed)]
+
+
+def plan_threads(workers: int, threads_per_worker: int = 0, cpus: Optional[List[int]] = None) -> List[List[int]]:
+    """Split the CPUs into one disjoint slice per worker
+
+    threads_per_worker=0 divides the CPUs evenly. CPUs are ordered node by
+    node, so slices stay within one NUMA node where they fit. If more
+    threads are asked for than there are CPUs, slices wrap around and overlap.
+    """
+    cpus = cpus or [cpu for node in numa_nodes() for cpu in node]
+    threads = threads_per_worker or max(1, len(cpus) // workers)
+    return [
+        [cpus[(worker * threads + i) % len(cpus)] for i in range(threads)]
+        for worker in range(workers)
+    ]
+
+
+def bind_socket(host: str = HOST, port: int = PORT) -> socket.socket:
+    """Listening socket created before forking, shared by every worker"""
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+def preload():
+    """Import the app and load the default model in the parent process"""
+    import main
+
+    # Workers warm up after forking; a forward pass here would start torch's
+    # thread pool, which does not survive fork
+    main.registry.preload(ready=False)
+    # Move everything allocated so far out of the garbage collector's reach,
+    # so collections in the workers don't write to (and copy) shared pages
+    gc.collect()
+    gc.freeze()
+    return main
+
+
+def configure_worker(cpus: List[int], pin: bool = PIN_WORKER_CPUS):
+    """Give the current process len(cpus) torch threads, pinned to cpus if pin is set"""
+    from tuning import configure_threads
+
+    if pin and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cpus)
+    # Marks the threads as set, so the lifespan hook keeps this count
+    configure_threads(len(cpus))
+
+
+def run_worker(worker_id: int, sock: socket.socket, cpus: List[int], pin: bool = PIN_WORKER_CPUS, workers: int = 1):
+    """Body of a forked worker process, never returns"""
+    import uvicorn
+    import main
+
+    configure_worker(cpus, pin)
+
+    # Each worker writes its own request log and statistics snapshot, and reports everyone's
+    main.request_log.share(worker_id)
+    main.stats.share(worker_id, workers)
+
+    logger.info(f"Worker {worker_id} (pid {os.getpid()}) using {len(cpus)} thread(s) on CPUs {cpus}")
+    config = uvicorn.Config(main.app, log_level="info")
+    server = uvicorn.Server(config)
+    server.run(sockets=[sock])
+    os._exit(0)
+
+
+def serve(workers: int = WORKERS, threads_per_worker: int = THREADS_PER_WORKER, pin: bool = PIN_WORKER_CPUS):
+    """Preload the model, fork the workers and restart any that die"""
+    start = time.time()
+    preload()
+    logger.info(f"Model preloaded in {time.time() - start:.1f}s, forking {workers} workers")
+
+    sock = bind_socket()
+    plan = plan_threads(workers, threads_per_worker)
+    children: Dict[int, int] = {}
+    stopping = False
+
+    def spawn(worker_id: int):
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            try:
+                run_worker(worker_id, sock, plan[worker_id], pin, workers)
+            finally:
+                os._exit(1)
+        children[pid] = worker_id
+
+    def shutdown(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+
+    for worker_id in range(workers):
+        spawn(worker_id)
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        worker_id = children.pop(pid, None)
+        if worker_id is None or stopping:
+            continue
+        logger.warning(f"Worker {worker_id} (pid {pid}) exited with status {status}, restarting")
+        # Forked from the preloaded parent, so a restart doesn't reload weights
+        spawn(worker_id)
+
+    sock.close()
+    logger.info("All workers stopped")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    if not hasattr(os, "fork"):
+        print("❌ Multi-worker serving needs os.fork (Linux or macOS)")
+        sys.exit(1)
+    from tuning import worker_settings
+    serve(*worker_settings())
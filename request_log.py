@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""
+Buffered, append-only request log for Summarify AI
+
+Entries are buffered in memory and flushed by a background thread to a
+JSONL or SQLite backend, so logging never adds file I/O to a request.
+Run `python request_log.py export [output.xlsx]` to get a spreadsheet.
+"""
+
+import glob
+import heapq
+import json
+import logging
+import os
+import re
+import sqlite3
+import sys
+import threading
+from typing import Iterator, List, Optional
+
+import metrics
+from config import (
+    LOG_BACKEND, REQUEST_LOG_PATH, LOG_FILE, LOG_FLUSH_INTERVAL, LOG_FLUSH_BATCH,
+    LOG_ROTATE_BYTES, LOG_ROTATE_BACKUPS
+)
+
+logger = logging.getLogger(__name__)
+
+LOG_COLUMNS = [
+    "timestamp", "original_length", "summary_length",
+    "compression_ratio", "processing_time", "model_used"
+]
+
+
+def worker_log_path(path: str, worker_id: int) -> str:
+    """Log file of one forked worker (worker 0 writes to the configured path)"""
+    return path if worker_id == 0 else f"{path}.worker{worker_id}"
+
+
+class LogBackend:
+    """Storage for request log entries
+
+    Forked workers each write (and rotate) their own file, see share();
+    read_all() reads every worker's entries.
+    """
+
+    def __init__(self, path: str, rotate_bytes: int = LOG_ROTATE_BYTES, backups: int = LOG_ROTATE_BACKUPS):
+        self.base_path = path
+        self.path = path
+        self.rotate_bytes = rotate_bytes
+        self.backups = backups
+
+    def share(self, worker_id: int):
+        """Write to this worker's own file, so workers never append to or rotate the same one"""
+        self.close()
+        self.path = worker_log_path(self.base_path, worker_id)
+
+    def write(self, entries: List[dict]):
+        """Append entries to storage"""
+        raise NotImplementedError
+
+    def read(self, path: str) -> Iterator[dict]:
+        """Yield the entries stored in a single file"""
+        raise NotImplementedError
+
+    def close(self):
+        """Release any open handles"""
+
+    def files(self, path: Optional[str] = None) -> List[str]:
+        """Log files of one writer (default: this one) from oldest to newest, including rotated ones"""
+        path = path or self.path
+        rotated = [f"{path}.{i}" for i in range(self.backups, 0, -1)]
+        return [p for p in rotated + [path] if os.path.exists(p)]
+
+    def writer_paths(self) -> List[str]:
+        """Active log file of every worker that has written one"""
+        pattern = re.compile(re.escape(self.base_path) + r"\.worker\d+")
+        workers = [p for p in glob.glob(glob.escape(self.base_path) + ".worker*") if pattern.fullmatch(p)]
+        return [self.base_path] + sorted(workers)
+
+    def read_all(self) -> Iterator[dict]:
+        """Yield every stored entry of every worker, oldest first"""
+        streams = [self._read_files(self.files(path)) for path in self.writer_paths()]
+        yield from heapq.merge(*streams, key=lambda entry: entry.get("timestamp") or "")
+
+    def _read_files(self, paths: List[str]) -> Iterator[dict]:
+        for path in paths:
+            yield from self.read(path)
+
+    def rotate_if_needed(self):
+        """Roll the active file over once it grows past the size limit"""
+        if self.rotate_bytes <= 0 or not os.path.exists(self.path):
+            return
+        if os.path.getsize(self.path) < self.rotate_bytes:
+            return
+        self.close()
+        for i in range(self.backups, 0, -1):
+            source = self.path if i == 1 else f"{self.path}.{i - 1}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{i}")
+        if self.backups <= 0:
+            os.remove(self.path)
+        logger.info(f"Rotated request log {self.path}")
+
+
+class JSONLLogBackend(LogBackend):
+    """One JSON object per line, appended to the active file"""
+
+    def write(self, entries: List[dict]):
+        self.rotate_if_needed()
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write("".join(json.dumps(entry) + "\n" for entry in entries))
+
+    def read(self, path: str) -> Iterator[dict]:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+
+
+class SQLiteLogBackend(LogBackend):
+    """Entries stored as rows of a single SQLite table"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._conn = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS requests (" + ", ".join(LOG_COLUMNS) + ")"
+            )
+        return self._conn
+
+    def write(self, entries: List[dict]):
+        self.rotate_if_needed()
+        conn = self._connect()
+        placeholders = ", ".join("?" for _ in LOG_COLUMNS)
+        with conn:
+            conn.executemany(
+                f"INSERT INTO requests VALUES ({placeholders})",
+                [tuple(entry.get(c) for c in LOG_COLUMNS) for entry in entries]
+            )
+
+    def read(self, path: str) -> Iterator[dict]:
+        conn = sqlite3.connect(path)
+        try:
+            for row in conn.execute("SELECT " + ", ".join(LOG_COLUMNS) + " FROM requests ORDER BY rowid"):
+                yield dict(zip(LOG_COLUMNS, row))
+        finally:
+            conn.close()
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+BACKENDS = {
+    "jsonl": JSONLLogBackend,
+    "sqlite": SQLiteLogBackend,
+}
+
+
+def create_backend(name: str = LOG_BACKEND, path: str = REQUEST_LOG_PATH) -> LogBackend:
+    """Create a log backend by name"""
+    try:
+        return BACKENDS[name](path)
+    except KeyError:
+        raise ValueError(f"Unknown log backend '{name}', expected one of: {', '.join(BACKENDS)}")
+
+
+class RequestLogSink:
+    """Buffer log entries in memory and flush them to a backend in the background"""
+
+    def __init__(
+        self,
+        backend: Optional[LogBackend] = None,
+        flush_interval: float = LOG_FLUSH_INTERVAL,
+        flush_batch: int = LOG_FLUSH_BATCH
+    ):
+        self.backend = backend or create_backend()
+        self.flush_interval = flush_interval
+        self.flush_batch = max(1, flush_batch)
+        self._buffer = []
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Start the background flush thread"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name="request-log", daemon=True)
+        self._thread.start()
+
+    def log(self, entry: dict):
+        """Queue an entry; never blocks on I/O"""
+        self.log_many([entry])
+
+    def log_many(self, entries: List[dict]):
+        """Queue several entries at once"""
+        with self._lock:
+            self._buffer.extend(entries)
+            should_flush = len(self._buffer) >= self.flush_batch
+        if should_flush:
+            self._wakeup.set()
+
+    def flush(self):
+        """Write all buffered entries to the backend"""
+        with self._lock:
+            entries, self._buffer = self._buffer, []
+        if not entries:
+            return
+        with self._write_lock, metrics.LOG_WRITE_TIME.time():
+            try:
+                self.backend.write(entries)
+            except Exception as e:
+                logger.error(f"Error writing {len(entries)} log entries: {e}")
+
+    def share(self, worker_id: int):
+        """Act as one of several forked workers, each with its own log file"""
+        with self._write_lock:
+            self.backend.share(worker_id)
+
+    def read_all(self) -> Iterator[dict]:
+        """Yield every entry, flushing the buffer first"""
+        self.flush()
+        with self._write_lock:
+            entries = list(self.backend.read_all())
+        return iter(entries)
+
+    def close(self):
+        """Stop the flush thread and write what is left"""
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+        self.backend.close()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+
+def export_to_excel(output: str = LOG_FILE, backend: Optional[LogBackend] = None) -> int:
+    """Write every logged request to an Excel file and return the row count"""
+    import pandas as pd
+
+    backend = backend or create_backend()
+    df = pd.DataFrame(list(backend.read_all()), columns=LOG_COLUMNS)
+    df.to_excel(output, index=False)
+    return len(df)
+
+
+def main():
+    """Command line entry point"""
+    if len(sys.argv) < 2 or sys.argv[1] != "export":
+        print("Usage: python request_log.py export [output.xlsx]")
+        sys.exit(1)
+
+    output = sys.argv[2] if len(sys.argv) > 2 else LOG_FILE
+    rows = export_to_excel(output)
+    print(f"✅ Exported {rows} requests to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,7 +6,8 @@ Startup script for Summarify AI
 import uvicorn
 import sys
 import os
-from config import HOST, PORT
+from config import HOST, PORT, RELOAD
+from tuning import worker_settings
 
 def main():
     """Main entry point"""
@@ -16,12 +17,24 @@ def main():
     print(f"🔧 API docs: http://{HOST}:{PORT}/docs")
     print("-" * 50)
     
+    workers, threads_per_worker, pin = worker_settings()
     try:
+        if workers > 1 and not RELOAD:
+            if hasattr(os, "fork"):
+                import logging
+                from prefork import serve
+                logging.basicConfig(level=logging.INFO)
+                print(f"👥 {workers} workers sharing one copy of the model")
+                serve(workers, threads_per_worker, pin)
+                return
+            print("⚠️  WORKERS > 1 needs os.fork, starting a single worker")
         uvicorn.run(
             "main:app",
             host=HOST,
             port=PORT,
-            reload=True,
+            # The reloader runs the app in a second process that loads the
+            # model again, so only use it while developing
+            reload=RELOAD,
             log_level="info"
         )
     except KeyboardInterrupt:
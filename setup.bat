@@ -50,8 +50,8 @@ if not exist ".env" (
     echo 📝 Creating .env file...
     echo # Model Configuration > .env
     echo MODEL_NAME=facebook/opt-125m >> .env
-    echo MAX_LENGTH=512 >> .env
-    echo MIN_LENGTH=50 >> .env
+    echo MAX_LENGTH=200 >> .env
+    echo MIN_LENGTH=30 >> .env
     echo. >> .env
     echo # Server Configuration >> .env
     echo HOST=0.0.0.0 >> .env
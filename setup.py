@@ -36,8 +36,8 @@ def create_env_file():
         print("📝 Creating .env file...")
         env_content = """# Model Configuration
 MODEL_NAME=facebook/opt-125m
-MAX_LENGTH=512
-MIN_LENGTH=50
+MAX_LENGTH=200
+MIN_LENGTH=30
 
 # Server Configuration
 HOST=0.0.0.0
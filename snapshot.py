@@ -0,0 +1,155 @@
+"""
+Local model snapshots with memory-mapped safetensors weights
+
+With MODEL_SNAPSHOT_DIR set, each model is resolved to a snapshot directory
+under it: config, tokenizer and safetensors weights in the dtype being
+served. A missing snapshot is created once from the model hub (pinned to
+MODEL_REVISION if given) and never refreshed, so later startups read only
+local files and work offline.
+
+Weights are mapped straight from the safetensors files (copy-on-write)
+instead of being read into freshly allocated memory. Inference never writes
+to them, so the pages stay in the page cache and are shared by every
+process serving the same snapshot.
+"""
+
+import json
+import logging
+import os
+import shutil
+import struct
+import time
+from typing import TYPE_CHECKING, Dict, Optional
+
+from config import MODEL_SNAPSHOT_DIR, MODEL_REVISION
+
+if TYPE_CHECKING:
+    import torch
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_INFO = "snapshot.json"
+
+# safetensors dtype names -> torch dtype attribute names
+SAFETENSORS_DTYPES = {
+    "F64": "float64", "F32": "float32", "F16": "float16", "BF16": "bfloat16",
+    "I64": "int64", "I32": "int32", "I16": "int16", "I8": "int8", "U8": "uint8", "BOOL": "bool",
+}
+
+
+def snapshot_path(model_name: str, dtype) -> str:
+    """Snapshot directory of a model in one dtype"""
+    dtype_name = str(dtype).replace("torch.", "")
+    return os.path.join(MODEL_SNAPSHOT_DIR, f"{model_name.replace('/', '--')}--{dtype_name}")
+
+
+def is_snapshot(path: str) -> bool:
+    return os.path.isfile(os.path.join(path, SNAPSHOT_INFO))
+
+
+def snapshot_info(path: str) -> Optional[dict]:
+    """Contents of a snapshot's info file, None for other paths"""
+    if not is_snapshot(path):
+        return None
+    with open(os.path.join(path, SNAPSHOT_INFO), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def snapshot_weights_mb(path: str) -> float:
+    """Size of a snapshot's safetensors weights in MB"""
+    return sum(
+        os.path.getsize(os.path.join(path, name))
+        for name in os.listdir(path)
+        if name.endswith(".safetensors")
+    ) / (1024 * 1024)
+
+
+def ensure_snapshot(model_name: str, dtype) -> str:
+    """Path of the model's local snapshot, created from the hub on first use"""
+    path = snapshot_path(model_name, dtype)
+    if is_snapshot(path):
+        return path
+
+    from transformers import AutoModelForCausalLM, AutoTokenizer
+
+    start = time.time()
+    logger.info(f"Creating local snapshot of {model_name} in {path} (first start only)")
+    revision = MODEL_REVISION or None
+    tokenizer = AutoTokenizer.from_pretrained(model_name, revision=revision)
+    model = AutoModelForCausalLM.from_pretrained(model_name, revision=revision, dtype=dtype, low_cpu_mem_usage=True)
+
+    # Write next to the target and move it in place, so a crash never leaves a half snapshot
+    staging = f"{path}.tmp{os.getpid()}"
+    model.save_pretrained(staging, safe_serialization=True)
+    tokenizer.save_pretrained(staging)
+    with open(os.path.join(staging, SNAPSHOT_INFO), "w", encoding="utf-8") as f:
+        json.dump({
+            "model": model_name,
+            "revision": getattr(model.config, "_commit_hash", None) or revision,
+            "dtype": str(dtype).replace("torch.", ""),
+            "created_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+        }, f, indent=2)
+    del model
+    try:
+        os.replace(staging, path)
+    except OSError:
+        # Another process created the snapshot first
+        shutil.rmtree(staging, ignore_errors=True)
+    logger.info(f"Snapshot of {model_name} created in {time.time() - start:.1f}s")
+    return path
+
+
+def mmap_safetensors(path: str) -> Dict[str, "torch.Tensor"]:
+    """Tensors of a safetensors file as views of a private mapping of the file"""
+    import torch
+
+    with open(path, "rb") as f:
+        header_size = struct.unpack("<Q", f.read(8))[0]
+        header = json.loads(f.read(header_size))
+    data_start = 8 + header_size
+    storage = torch.UntypedStorage.from_file(path, shared=False, nbytes=os.path.getsize(path))
+
+    tensors = {}
+    for name, entry in header.items():
+        if name == "__metadata__":
+            continue
+        dtype = getattr(torch, SAFETENSORS_DTYPES[entry["dtype"]])
+        begin, end = entry["data_offsets"]
+        offset = data_start + begin
+        itemsize = torch.empty(0, dtype=dtype).element_size()
+        if offset % itemsize:
+            # Misaligned for a typed view; copy this one tensor out of the mapping
+            raw = torch.empty(0, dtype=torch.uint8).set_(storage, offset, (end - begin,))
+            tensors[name] = raw.clone().view(dtype).reshape(entry["shape"])
+            continue
+        tensor = torch.empty(0, dtype=dtype)
+        tensor.set_(storage, offset // itemsize, entry["shape"])
+        tensors[name] = tensor
+    return tensors
+
+
+def load_mmap_model(path: str, dtype):
+    """Causal LM from a snapshot with its weights mapped from the safetensors files"""
+    from accelerate import init_empty_weights
+    from transformers import AutoConfig, AutoModelForCausalLM
+
+    config = AutoConfig.from_pretrained(path, local_files_only=True)
+    # Parameters on the meta device, buffers allocated normally
+    with init_empty_weights(include_buffers=False):
+        model = AutoModelForCausalLM.from_config(config, dtype=dtype)
+
+    state_dict = {}
+    for name in sorted(os.listdir(path)):
+        if name.endswith(".safetensors"):
+            state_dict.update(mmap_safetensors(os.path.join(path, name)))
+    if any(tensor.dtype != dtype for tensor in state_dict.values() if tensor.is_floating_point()):
+        raise ValueError(f"Snapshot {path} is not stored in {dtype}")
+
+    model.load_state_dict(state_dict, strict=False, assign=True)
+    # save_pretrained drops tied copies (lm_head), point them back at the embeddings
+    model.tie_weights()
+    missing = [name for name, param in model.named_parameters() if param.is_meta]
+    if missing:
+        raise ValueError(f"Snapshot {path} is missing weights: {', '.join(missing[:5])}")
+    model.eval()
+    return model
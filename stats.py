@@ -0,0 +1,291 @@
+import json
+import logging
+import math
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional
+
+import metrics
+from config import STATS_SNAPSHOT_FILE, STATS_SNAPSHOT_INTERVAL
+
+logger = logging.getLogger(__name__)
+
+# Processing times go into log-spaced histogram bins, each bin is ~5% wide, so
+# percentiles are accurate to a few percent at a fixed memory cost
+HISTOGRAM_MIN = 0.001
+HISTOGRAM_GROWTH = 1.05
+PERCENTILES = (50, 95, 99)
+
+SUMMED_FIELDS = ("summary_length", "compression_ratio", "processing_time")
+
+
+def _bin_index(value: float) -> int:
+    if value <= HISTOGRAM_MIN:
+        return 0
+    return int(math.log(value / HISTOGRAM_MIN) / math.log(HISTOGRAM_GROWTH)) + 1
+
+
+def _bin_value(index: int) -> float:
+    # Geometric midpoint of the bin
+    if index == 0:
+        return HISTOGRAM_MIN
+    return HISTOGRAM_MIN * HISTOGRAM_GROWTH ** (index - 0.5)
+
+
+class Aggregate:
+    """Counters, sums and a processing-time histogram for a set of requests"""
+
+    def __init__(self):
+        self.count = 0
+        self.sums = {name: 0.0 for name in SUMMED_FIELDS}
+        self.histogram: Dict[int, int] = {}
+
+    def add(self, entry: dict):
+        self.count += 1
+        for name in SUMMED_FIELDS:
+            self.sums[name] += float(entry.get(name, 0) or 0)
+        index = _bin_index(float(entry.get("processing_time", 0) or 0))
+        self.histogram[index] = self.histogram.get(index, 0) + 1
+
+    def merge(self, other: "Aggregate"):
+        self.count += other.count
+        for name in SUMMED_FIELDS:
+            self.sums[name] += other.sums[name]
+        for index, count in other.histogram.items():
+            self.histogram[index] = self.histogram.get(index, 0) + count
+
+    def percentile(self, pct: float) -> float:
+        if not self.count:
+            return 0.0
+        rank = math.ceil(pct / 100 * self.count)
+        seen = 0
+        for index in sorted(self.histogram):
+            seen += self.histogram[index]
+            if seen >= rank:
+                return _bin_value(index)
+        return _bin_value(max(self.histogram))
+
+    def summary(self) -> dict:
+        count = self.count
+        result = {
+            "total_requests": count,
+            "avg_summary_length": self.sums["summary_length"] / count if count else 0,
+            "avg_compression_ratio": self.sums["compression_ratio"] / count if count else 0,
+            "avg_processing_time": self.sums["processing_time"] / count if count else 0,
+        }
+        for pct in PERCENTILES:
+            result[f"p{pct}_processing_time"] = self.percentile(pct)
+        return result
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "sums": self.sums,
+            "histogram": {str(k): v for k, v in self.histogram.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Aggregate":
+        aggregate = cls()
+        aggregate.count = data.get("count", 0)
+        aggregate.sums.update(data.get("sums", {}))
+        aggregate.histogram = {int(k): v for k, v in data.get("histogram", {}).items()}
+        return aggregate
+
+
+class TimeWindow:
+    """Rolling window made of fixed-size time buckets"""
+
+    def __init__(self, bucket_seconds: int, n_buckets: int):
+        self.bucket_seconds = bucket_seconds
+        self.n_buckets = n_buckets
+        self.buckets: Dict[int, Aggregate] = {}
+
+    def add(self, entry: dict, timestamp: float):
+        key = int(timestamp // self.bucket_seconds)
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            bucket = self.buckets[key] = Aggregate()
+            self._prune(key)
+        bucket.add(entry)
+
+    def view(self, now: float) -> Aggregate:
+        oldest = int(now // self.bucket_seconds) - self.n_buckets + 1
+        merged = Aggregate()
+        for key, bucket in self.buckets.items():
+            if key >= oldest:
+                merged.merge(bucket)
+        return merged
+
+    def _prune(self, current: int):
+        for key in [k for k in self.buckets if k <= current - self.n_buckets]:
+            del self.buckets[key]
+
+    def to_dict(self) -> dict:
+        return {str(k): v.to_dict() for k, v in self.buckets.items()}
+
+    def load(self, data: dict):
+        self.buckets = {int(k): Aggregate.from_dict(v) for k, v in data.items()}
+
+
+def _make_windows() -> Dict[str, TimeWindow]:
+    return {
+        "last_hour": TimeWindow(bucket_seconds=60, n_buckets=60),
+        "last_day": TimeWindow(bucket_seconds=3600, n_buckets=24),
+    }
+
+
+def _read_snapshot(path: str) -> dict:
+    """Aggregates (and metric values, if saved) stored in a snapshot file"""
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    windows = _make_windows()
+    for name, window in windows.items():
+        window.load(data.get("windows", {}).get(name, {}))
+    return {
+        "total": Aggregate.from_dict(data.get("total", {})),
+        "windows": windows,
+        "metrics": data.get("metrics", {}),
+    }
+
+
+class StatsAggregator:
+    """Incrementally maintained request statistics for the dashboard"""
+
+    def __init__(self, snapshot_file: str = STATS_SNAPSHOT_FILE, snapshot_interval: float = STATS_SNAPSHOT_INTERVAL):
+        self.snapshot_file = snapshot_file
+        self.snapshot_interval = snapshot_interval
+        self.total = Aggregate()
+        self.windows = _make_windows()
+        # Set by share() in multi-worker servers
+        self.worker_id = 0
+        self.peer_files: List[str] = []
+        self._peers: List[dict] = []
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def record(self, entry: dict, timestamp: Optional[float] = None):
+        """Add a finished request to every aggregate"""
+        timestamp = time.time() if timestamp is None else timestamp
+        with self._lock:
+            self.total.add(entry)
+            for window in self.windows.values():
+                window.add(entry, timestamp)
+
+    def get_stats(self) -> dict:
+        """Overall and time-windowed statistics, including the other workers' latest snapshots"""
+        now = time.time()
+        with self._lock:
+            sources = [(self.total, self.windows)] + [(peer["total"], peer["windows"]) for peer in self._peers]
+            total = Aggregate()
+            for aggregate, _ in sources:
+                total.merge(aggregate)
+            stats = {"total": total.summary()}
+            for name in self.windows:
+                merged = Aggregate()
+                for _, windows in sources:
+                    merged.merge(windows[name].view(now))
+                stats[name] = merged.summary()
+        return stats
+
+    def peer_metrics(self) -> List[dict]:
+        """The other workers' metric values as of their latest snapshot, see metrics.MetricsRegistry.render"""
+        with self._lock:
+            return [peer["metrics"] for peer in self._peers if peer["metrics"]]
+
+    def share(self, worker_id: int, workers: int):
+        """Act as one of several forked workers that write to the same request log
+
+        Each worker persists its own snapshot (worker 0 the configured file,
+        the others numbered copies) with its metric values, and merges the
+        other workers' snapshots into get_stats() and peer_metrics(), so any
+        worker can answer for all of them. The other workers' figures are
+        reread after every snapshot, so they lag by up to snapshot_interval.
+        """
+        base = self.snapshot_file
+        files = [base] + [f"{base}.{i}" for i in range(1, workers)]
+        self.worker_id = worker_id
+        self.snapshot_file = files[worker_id]
+        self.peer_files = files[:worker_id] + files[worker_id + 1:]
+
+    def load(self, backfill: Optional[Callable[[], Iterable[dict]]] = None) -> bool:
+        """Restore the last snapshot, or rebuild from log entries if there is none
+
+        The request log holds every worker's requests, so only worker 0
+        rebuilds from it, and only when no worker has a snapshot yet.
+        """
+        if os.path.exists(self.snapshot_file):
+            try:
+                snapshot = _read_snapshot(self.snapshot_file)
+                with self._lock:
+                    self.total = snapshot["total"]
+                    self.windows = snapshot["windows"]
+                logger.info(f"Loaded statistics snapshot from {self.snapshot_file}")
+                return True
+            except Exception as e:
+                logger.error(f"Error loading statistics snapshot: {e}")
+
+        if backfill is not None and self.worker_id == 0 and not any(os.path.exists(p) for p in self.peer_files):
+            for entry in backfill():
+                try:
+                    timestamp = datetime.strptime(entry["timestamp"], "%Y-%m-%d %H:%M:%S").timestamp()
+                except (KeyError, TypeError, ValueError):
+                    timestamp = None
+                self.record(entry, timestamp)
+            logger.info(f"Rebuilt statistics from {self.total.count} logged requests")
+        return False
+
+    def save(self):
+        """Persist a snapshot atomically"""
+        with self._lock:
+            data = {
+                "saved_at": time.time(),
+                "total": self.total.to_dict(),
+                "windows": {name: window.to_dict() for name, window in self.windows.items()},
+            }
+        if self.peer_files:
+            data["metrics"] = metrics.REGISTRY.state()
+        tmp_file = f"{self.snapshot_file}.tmp"
+        try:
+            with open(tmp_file, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp_file, self.snapshot_file)
+        except Exception as e:
+            logger.error(f"Error saving statistics snapshot: {e}")
+
+    def start(self):
+        """Start periodic snapshotting"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stopped.clear()
+        self._load_peers()
+        self._thread = threading.Thread(target=self._run, name="stats-snapshot", daemon=True)
+        self._thread.start()
+
+    def close(self):
+        """Stop snapshotting and write a final snapshot"""
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.save()
+
+    def _load_peers(self):
+        peers = []
+        for path in self.peer_files:
+            if not os.path.exists(path):
+                continue
+            try:
+                peers.append(_read_snapshot(path))
+            except Exception as e:
+                logger.warning(f"Error reading statistics snapshot {path}: {e}")
+        with self._lock:
+            self._peers = peers
+
+    def _run(self):
+        while not self._stopped.wait(self.snapshot_interval):
+            self.save()
+            self._load_peers()
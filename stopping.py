@@ -0,0 +1,104 @@
+import threading
+import time
+
+from transformers import StoppingCriteria
+
+
+class CancelCriteria(StoppingCriteria):
+    """Stop generating as soon as the cancel event is set"""
+
+    def __init__(self, cancel_event: threading.Event):
+        self.cancel_event = cancel_event
+
+    def __call__(self, input_ids, scores, **kwargs) -> bool:
+        return self.cancel_event.is_set()
+
+
+class DeadlineCriteria(StoppingCriteria):
+    """Stop generating once a time.monotonic() deadline has passed"""
+
+    def __init__(self, deadline: float):
+        self.deadline = deadline
+        self.expired = False
+
+    def __call__(self, input_ids, scores, **kwargs) -> bool:
+        if not self.expired and time.monotonic() >= self.deadline:
+            self.expired = True
+        return self.expired
+
+
+class YieldCriteria(StoppingCriteria):
+    """Never stops generation, pauses between decode steps while should_yield() is true
+
+    Background generations use this to hand the CPU to interactive requests.
+    """
+
+    def __init__(self, should_yield, poll: float = 0.01):
+        self.should_yield = should_yield
+        self.poll = poll
+
+    def __call__(self, input_ids, scores, **kwargs) -> bool:
+        while self.should_yield():
+            time.sleep(self.poll)
+        return False
+
+
+class StepTimer(StoppingCriteria):
+    """Never stops generation, records when the first and last decode steps finished
+
+    Stopping criteria run once per generated token, so the first call marks
+    the end of prefill and the calls after it cover decoding.
+    """
+
+    def __init__(self):
+        self.first_step = None
+        self.last_step = None
+        self.steps = 0
+
+    def __call__(self, input_ids, scores, **kwargs) -> bool:
+        now = time.perf_counter()
+        if self.first_step is None:
+            self.first_step = now
+        self.last_step = now
+        self.steps += 1
+        return False
+
+
+class SummaryStopCriteria(StoppingCriteria):
+    """Stop each row as soon as its summary is complete
+
+    A row is finished once it has generated at least min_new_tokens and its
+    last token ends a sentence, or as soon as it starts a new prompt block
+    (any of stop_strings). Only the last few tokens of each row are decoded
+    per step.
+    """
+
+    SENTENCE_END = (".", "!", "?")
+
+    def __init__(self, tokenizer, prompt_length: int, min_new_tokens: int, stop_strings, window: int = 8):
+        self.tokenizer = tokenizer
+        self.prompt_length = prompt_length
+        self.min_new_tokens = min_new_tokens
+        self.stop_strings = list(stop_strings)
+        self.window = window
+        self.done = None
+
+    def __call__(self, input_ids, scores, **kwargs):
+        import torch
+
+        if self.done is None:
+            self.done = torch.zeros(input_ids.shape[0], dtype=torch.bool, device=input_ids.device)
+        generated = input_ids.shape[1] - self.prompt_length
+        if generated <= 0:
+            return self.done.clone()
+
+        start = max(self.prompt_length, input_ids.shape[1] - self.window)
+        tails = self.tokenizer.batch_decode(input_ids[:, start:], skip_special_tokens=True)
+        for row, tail in enumerate(tails):
+            if self.done[row]:
+                continue
+            if any(stop in tail for stop in self.stop_strings):
+                self.done[row] = True
+            elif generated >= self.min_new_tokens and tail.rstrip().endswith(self.SENTENCE_END):
+                self.done[row] = True
+        return self.done.clone()
@@ -0,0 +1,139 @@
+"""
+Stub tokenizer and model for offline benchmarks
+
+StubSummarizer behaves like TextSummarizer but never touches the model
+hub: words are tokens, and "generation" echoes words from the prompt after
+a configurable per-token delay. It exercises every layer around the model
+(batching, caching, logging, HTTP) so their overhead can be measured
+without downloading weights.
+"""
+
+import time
+from typing import List
+
+import torch
+
+from config import STUB_PREFILL_MS_PER_TOKEN, STUB_DECODE_MS_PER_STEP, STUB_MAX_NEW_TOKENS
+from summarizer import TextSummarizer
+
+STUB_MODEL_NAME = "stub"
+
+
+class StubTokenizer:
+    """Whitespace tokenizer with a vocabulary that grows as words are seen"""
+
+    pad_token = "<pad>"
+    eos_token = "</s>"
+    pad_token_id = 0
+    eos_token_id = 1
+    padding_side = "left"
+
+    def __init__(self):
+        self._ids = {self.pad_token: 0, self.eos_token: 1}
+        self._words = [self.pad_token, self.eos_token]
+
+    def _encode(self, text: str, add_special_tokens: bool) -> List[int]:
+        ids = [self.eos_token_id] if add_special_tokens else []
+        for word in text.split():
+            if word not in self._ids:
+                self._ids[word] = len(self._words)
+                self._words.append(word)
+            ids.append(self._ids[word])
+        return ids
+
+    def __call__(self, text, add_special_tokens: bool = True, return_tensors=None, padding: bool = False, **kwargs):
+        if isinstance(text, str):
+            return {"input_ids": self._encode(text, add_special_tokens)}
+        encoded = {"input_ids": [self._encode(t, add_special_tokens) for t in text]}
+        if return_tensors == "pt":
+            return self.pad(encoded, return_tensors="pt")
+        return encoded
+
+    def pad(self, encoded: dict, return_tensors=None, **kwargs) -> "_StubBatch":
+        rows = encoded["input_ids"]
+        width = max(len(r) for r in rows)
+        input_ids = [[self.pad_token_id] * (width - len(r)) + r for r in rows]
+        attention_mask = [[0] * (width - len(r)) + [1] * len(r) for r in rows]
+        return _StubBatch(input_ids=torch.tensor(input_ids), attention_mask=torch.tensor(attention_mask))
+
+    def decode(self, ids, skip_special_tokens: bool = False, **kwargs) -> str:
+        if hasattr(ids, "tolist"):
+            ids = ids.tolist()
+        special = (self.pad_token_id, self.eos_token_id)
+        return " ".join(self._words[i] for i in ids if not (skip_special_tokens and i in special))
+
+    def batch_decode(self, rows, skip_special_tokens: bool = False, **kwargs) -> List[str]:
+        return [self.decode(r, skip_special_tokens=skip_special_tokens) for r in rows]
+
+
+class _StubBatch(dict):
+    def to(self, device):
+        return _StubBatch({k: v.to(device) for k, v in self.items()})
+
+
+class StubModel:
+    """Echoes prompt words back, sleeping to mimic prefill and decode cost"""
+
+    def __init__(self, tokenizer: StubTokenizer):
+        self.tokenizer = tokenizer
+
+    def eval(self):
+        return self
+
+    def generate(self, input_ids, attention_mask=None, max_length=None, max_new_tokens=None,
+                 stopping_criteria=None, **kwargs):
+        batch_size, width = input_ids.shape
+        budget = max_new_tokens if max_new_tokens is not None else (max_length or width) - width
+        new_tokens = max(1, min(STUB_MAX_NEW_TOKENS, budget))
+
+        # Reuse the first words of each prompt and end with a full stop
+        period = self.tokenizer._encode(".", add_special_tokens=False)[0]
+        generated = []
+        for row in input_ids.tolist():
+            words = [i for i in row if i > 1][:new_tokens - 1] or [period]
+            words += [period] * (new_tokens - len(words))
+            words[-1] = period
+            generated.append(words)
+        generated = torch.tensor(generated, dtype=input_ids.dtype)
+
+        prompt_tokens = int(attention_mask.sum()) if attention_mask is not None else batch_size * width
+        time.sleep(prompt_tokens * STUB_PREFILL_MS_PER_TOKEN / 1000)
+        # Like generate(), rows that meet a stopping criterion are padded from then on
+        done = torch.zeros(batch_size, dtype=torch.bool)
+        steps = new_tokens
+        for step in range(new_tokens):
+            if step:
+                time.sleep(STUB_DECODE_MS_PER_STEP / 1000)
+                generated[done, step] = self.tokenizer.pad_token_id
+            if stopping_criteria is not None:
+                sequences = torch.cat([input_ids, generated[:, :step + 1]], dim=1)
+                for criteria in stopping_criteria:
+                    done = done | torch.as_tensor(criteria(sequences, None), dtype=torch.bool)
+                if bool(done.all()):
+                    steps = step + 1
+                    break
+        return torch.cat([input_ids, generated[:, :steps]], dim=1)
+
+
+class StubSummarizer(TextSummarizer):
+    """TextSummarizer backed by the stub tokenizer and model"""
+
+    def __init__(self, load: bool = True, precision=None, model_name: str = STUB_MODEL_NAME):
+        super().__init__(load=load, precision=precision, model_name=model_name)
+
+    def estimate_mb(self) -> float:
+        # The stub has no weights
+        return 0.0
+
+    def _load_model(self):
+        start_time = time.time()
+        self.status = "loading"
+        self.device = "cpu"
+        self.tokenizer = StubTokenizer()
+        self.model = StubModel(self.tokenizer)
+        # The stub has no attention layers to cache
+        self.prefix_cache = None
+        self.is_loaded = True
+        self.status = "loaded"
+        self.load_time = time.time() - start_time
+        self.load_count += 1
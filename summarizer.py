@@ -1,66 +1,322 @@
-import torch
-from transformers import AutoTokenizer, AutoModelForCausalLM, pipeline
+import hashlib
 import logging
-from typing import Optional
-from config import MODEL_NAME, MAX_LENGTH, MIN_LENGTH
+import re
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Iterator, List, Optional, Tuple, Union
+from config import (
+    MODEL_NAME, MAX_LENGTH, MIN_LENGTH, DETERMINISTIC_GENERATION, BATCH_MAX_SIZE, PRECISION,
+    LONG_DOC_CHUNK_TOKENS, LONG_DOC_PARTIAL_TOKENS, LONG_DOC_MAX_ROUNDS,
+    PROMPT_TEMPLATE, PREFIX_CACHE_ENABLED, EARLY_STOPPING, DRAFT_MODEL_NAME, INFERENCE_BACKEND,
+    MODEL_SNAPSHOT_DIR
+)
+from backends import EagerBackend, get_backend
+from executor import get_inference_executor
+from memory import PeakRSSSampler
+import metrics
+
+PROMPT_INSTRUCTION = "Summarize the following text in a concise way:"
+DEFAULT_PROMPT_TEMPLATE = PROMPT_INSTRUCTION + "\n\n{text}\n\nSummary:"
+
+SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+")
 
 logger = logging.getLogger(__name__)
 
+WARMUP_TEXT = "The quick brown fox jumps over the lazy dog. It was a sunny day in the park."
+
+PRECISIONS = ("fp32", "bf16", "int8")
+
+# Bytes per weight, for footprint estimates made before torch is imported
+DTYPE_BYTES = {"float32": 4, "bfloat16": 2}
+
+def cpu_supports_bf16() -> bool:
+    """Whether the CPU has native bfloat16 instructions (AVX512-BF16 or AMX)"""
+    try:
+        with open("/proc/cpuinfo") as f:
+            flags = f.read()
+    except OSError:
+        return False
+    return "avx512_bf16" in flags or "amx_bf16" in flags
+
+def estimate_parameters(config) -> Tuple[int, int]:
+    """Approximate (embedding, layer) parameter counts of a decoder-only model from its config"""
+    hidden = getattr(config, "hidden_size", None) or getattr(config, "n_embd", None) or config.d_model
+    layers = getattr(config, "num_hidden_layers", None) or config.n_layer
+    ffn = (
+        getattr(config, "intermediate_size", None) or getattr(config, "ffn_dim", None)
+        or getattr(config, "n_inner", None) or 4 * hidden
+    )
+    positions = getattr(config, "max_position_embeddings", None) or getattr(config, "n_positions", None) or 0
+    # Gated (SwiGLU) MLPs have a third matrix
+    mlp_matrices = 3 if getattr(config, "hidden_act", None) == "silu" else 2
+    embeddings = (config.vocab_size + positions) * hidden
+    return embeddings, layers * (4 * hidden * hidden + mlp_matrices * hidden * ffn)
+
 class TextSummarizer:
-    def __init__(self):
-        self.model_name = MODEL_NAME
+    # torch and transformers are imported on first load rather than at module
+    # import time, so the server can start answering health checks right away
+    def __init__(self, load: bool = True, precision: Optional[str] = None, model_name: Optional[str] = None):
+        self.model_name = model_name or MODEL_NAME
+        self.precision = (precision or PRECISION).lower()
+        if self.precision not in PRECISIONS:
+            raise ValueError(f"Unknown precision '{self.precision}', expected one of: {', '.join(PRECISIONS)}")
+        self.backend = get_backend(INFERENCE_BACKEND)
         self.tokenizer = None
         self.model = None
-        self.summarizer_pipeline = None
+        self.device = "cpu"
+        self.deterministic = DETERMINISTIC_GENERATION
         self.is_loaded = False
-        self._load_model()
+        self.status = "not_loaded"
+        self.load_time = None
+        self.load_peak_rss_mb = None
+        self.load_rss_delta_mb = None
+        # Local snapshot the model was loaded from (MODEL_SNAPSHOT_DIR), None when loaded from the hub
+        self.snapshot = None
+        self.prompt_template = PROMPT_TEMPLATE or DEFAULT_PROMPT_TEMPLATE
+        if "{text}" not in self.prompt_template:
+            raise ValueError("PROMPT_TEMPLATE must contain a {text} placeholder")
+        self.prompt_prefix, self.prompt_suffix = self.prompt_template.split("{text}", 1)
+        # Text that opens a new prompt block ("\nSummarize", "Summary:"); once the
+        # model emits it the summary is over
+        instruction_words = self.prompt_prefix.split()
+        self.stop_strings = [
+            s for s in (
+                "\n" + instruction_words[0] if instruction_words else "",
+                self.prompt_suffix.strip()
+            ) if s.strip()
+        ]
+        self.prefix_cache = None
+        self.assistant = None
+        self.load_count = 0
+        self.unload_count = 0
+        if load:
+            self._load_model()
     
     def _load_model(self):
-        """Load the LLaMA/OPT model and tokenizer"""
+        """Load the LLaMA/OPT model and tokenizer, recording load time and peak memory"""
+        with PeakRSSSampler() as rss:
+            self._load_weights()
+        self.load_peak_rss_mb = rss.peak_mb
+        self.load_rss_delta_mb = rss.delta_mb
+        logger.info(f"Peak RSS while loading: {rss.peak_mb:.0f} MB (+{rss.delta_mb:.0f} MB)")
+    
+    def _load_weights(self):
+        """Load the tokenizer and model weights"""
         try:
-            logger.info(f"Loading model: {self.model_name}")
+            self.status = "loading"
+            start_time = time.time()
+            if self.precision not in self.backend.precisions:
+                logger.warning(f"The {self.backend.name} backend does not support {self.precision}, falling back to fp32")
+                self.precision = "fp32"
+            logger.info(f"Loading model: {self.model_name} ({self.precision}, {self.backend.name} backend)")
+            import torch
+            from transformers import AutoTokenizer
             
             # Check if CUDA is available
-            device = "cuda" if torch.cuda.is_available() else "cpu"
-            logger.info(f"Using device: {device}")
+            self.device = "cuda" if torch.cuda.is_available() else "cpu"
+            logger.info(f"Using device: {self.device}")
             
-            # Pick dtype depending on device
-            dtype = torch.float16 if device == "cuda" else torch.float32
+            # Pick dtype depending on device and precision mode
+            if self.device == "cuda":
+                dtype = torch.float16
+            elif self.precision == "bf16" and cpu_supports_bf16():
+                dtype = torch.bfloat16
+            else:
+                if self.precision == "bf16":
+                    logger.warning("CPU has no native bf16 support, falling back to fp32")
+                    self.precision = "fp32"
+                dtype = torch.float32
             
             # Load tokenizer and model
-            self.tokenizer = AutoTokenizer.from_pretrained(self.model_name)
-            self.model = AutoModelForCausalLM.from_pretrained(
-                self.model_name,
-                dtype=dtype,
-                device_map="auto" if device == "cuda" else None
-            )
+            source = self._model_source(self.model_name, dtype)
+            self.tokenizer = AutoTokenizer.from_pretrained(source, local_files_only=self.snapshot is not None)
+            self.model = self.backend.load(source, self.device, dtype, self.precision)
+            if self.device == "cuda":
+                self.precision = "fp16"
             
-            # Move model to CPU manually if needed
-            if device == "cpu":
-                self.model = self.model.to(device)
+            if DRAFT_MODEL_NAME and DRAFT_MODEL_NAME != self.model_name and self.backend.supports_assisted:
+                self.assistant = self._load_assistant(DRAFT_MODEL_NAME, dtype)
             
-            # Create summarization pipeline
-            self.summarizer_pipeline = pipeline(
-                "text-generation",
-                model=self.model,
-                tokenizer=self.tokenizer,
-                device=0 if device == "cuda" else -1
-            )
+            # Decoder-only models must be left-padded so that every prompt in
+            # a batch ends right where generation starts
+            self.tokenizer.padding_side = "left"
+            if self.tokenizer.pad_token is None:
+                self.tokenizer.pad_token = self.tokenizer.eos_token
+            
+            if PREFIX_CACHE_ENABLED and self.prompt_prefix and self.backend.supports_prefix_cache:
+                from prefix_cache import PrefixKVCache
+                self.prefix_cache = PrefixKVCache(self.model, self.tokenizer, self.device)
             
             self.is_loaded = True
-            logger.info("Model loaded successfully!")
+            self.status = "loaded"
+            self.load_time = time.time() - start_time
+            self.load_count += 1
+            logger.info(f"Model loaded successfully in {self.load_time:.1f}s!")
             
         except Exception as e:
             logger.error(f"Error loading model: {e}")
             self.is_loaded = False
+            self.status = "failed"
             raise e
     
-    def summarize(self, text: str, max_length: Optional[int] = None, min_length: Optional[int] = None) -> str:
+    def load(self, warm_up: bool = True, ready: bool = True):
+        """Load the model if needed and optionally run a warm-up generation
+        
+        With ready=False only the weights are loaded; a later load() call
+        warms up and marks the model ready.
+        """
+        if not self.is_loaded:
+            self._load_model()
+        if not ready:
+            return
+        if warm_up:
+            self.warm_up()
+        self.status = "ready"
+    
+    def unload(self):
+        """Drop the model and tokenizer so their memory can be reclaimed"""
+        if not self.is_loaded:
+            return
+        self.is_loaded = False
+        self.status = "not_loaded"
+        self.model = None
+        self.tokenizer = None
+        self.prefix_cache = None
+        self.assistant = None
+        self.unload_count += 1
+        if self.device == "cuda":
+            import torch
+            torch.cuda.empty_cache()
+        logger.info(f"Unloaded model: {self.model_name}")
+    
+    def _model_source(self, model_name: str, dtype) -> str:
+        """Where to load a model from: its local snapshot in snapshot mode, else the hub name"""
+        if not MODEL_SNAPSHOT_DIR or self.device != "cpu":
+            return model_name
+        from snapshot import ensure_snapshot, snapshot_info
+        path = ensure_snapshot(model_name, dtype)
+        if model_name == self.model_name:
+            self.snapshot = {"path": path, **snapshot_info(path)}
+        return path
+    
+    def parameter_mb(self) -> float:
+        """Size of the model's weights in MB"""
+        return self.backend.memory_mb(self.model)
+    
+    def estimate_mb(self) -> float:
+        """Size the model's weights will have once loaded in MB, without loading them
+        
+        Read from the safetensors files of an existing local snapshot, otherwise
+        estimated from the parameter count in the model config. 0 if neither
+        can be read.
+        """
+        dtype = "bfloat16" if self.precision == "bf16" and cpu_supports_bf16() else "float32"
+        try:
+            if MODEL_SNAPSHOT_DIR and self.precision != "int8":
+                from snapshot import is_snapshot, snapshot_path, snapshot_weights_mb
+                path = snapshot_path(self.model_name, dtype)
+                if is_snapshot(path):
+                    return snapshot_weights_mb(path)
+            from transformers import AutoConfig
+            embeddings, layers = estimate_parameters(AutoConfig.from_pretrained(self.model_name))
+        except Exception as e:
+            logger.warning(f"Cannot estimate the size of {self.model_name}: {e}")
+            return 0.0
+        if self.precision == "int8":
+            # Dynamic quantization stores the Linear layers' weights as int8
+            return (embeddings * DTYPE_BYTES[dtype] + layers) / (1024 * 1024)
+        return (embeddings + layers) * DTYPE_BYTES[dtype] / (1024 * 1024)
+    
+    def _load_assistant(self, draft_name: str, dtype):
+        """Load the draft model for assisted generation, None if it can't assist this model"""
+        from assisted import AssistedDecoder
+        
+        logger.info(f"Loading draft model: {draft_name}")
+        # The draft model is small, so it always runs eagerly
+        draft_model = EagerBackend().load(self._model_source(draft_name, dtype), self.device, dtype, self.precision)
+        # Drafts are checked token by token, so both models need the same vocabulary
+        if draft_model.config.vocab_size != self.model.config.vocab_size:
+            logger.warning(f"Draft model {draft_name} has a different vocabulary, assisted generation disabled")
+            return None
+        return AssistedDecoder(self.model, draft_model, draft_name)
+    
+    def warm_up(self):
+        """Run one short generation so the first real request doesn't pay for lazy initialization"""
+        self.status = "warming"
+        start_time = time.time()
+        try:
+            self.summarize_batch([WARMUP_TEXT], max_length=8, min_length=1)
+            logger.info(f"Warm-up generation took {time.time() - start_time:.2f}s")
+            if self.assistant is not None:
+                self._calibrate_assistant()
+        except Exception as e:
+            # A failed warm-up only costs first-request latency
+            logger.warning(f"Warm-up generation failed: {e}")
+    
+    def _calibrate_assistant(self, tokens: int = 32):
+        """Time a fixed-length generation with and without the draft model"""
+        import torch
+        
+        inputs = self._assisted_inputs(WARMUP_TEXT)
+        kwargs = self._generation_kwargs(tokens, tokens)
+        with torch.no_grad():
+            start = time.perf_counter()
+            self.model.generate(**inputs, **kwargs)
+            baseline = time.perf_counter() - start
+            before = self.assistant.snapshot()
+            start = time.perf_counter()
+            self.model.generate(**inputs, **kwargs, assistant_model=self.assistant.draft_model)
+            self.assistant.record(before, tokens, time.perf_counter() - start)
+        self.assistant.baseline_ms_per_token = baseline * 1000 / tokens
+        logger.info(f"Assisted generation: {self.assistant.get_stats()['speedup']:.2f}x decode speed at warm-up")
+    
+    @property
+    def is_ready(self) -> bool:
+        """Whether the model is loaded and warmed up"""
+        return self.is_loaded and self.status == "ready"
+    
+    def summarize(
+        self,
+        text: str,
+        max_length: Optional[int] = None,
+        min_length: Optional[int] = None,
+        deadline: Optional[float] = None,
+        yield_to: Optional[Callable[[], bool]] = None
+    ) -> str:
         """Summarize the input text using the loaded model"""
+        return self.summarize_batch(
+            [text], max_length=max_length, min_length=min_length, deadline=deadline, yield_to=yield_to
+        )[0]
+    
+    async def summarize_async(self, text: str, max_length: Optional[int] = None, min_length: Optional[int] = None) -> str:
+        """Summarize on the inference executor without blocking the event loop"""
+        return await get_inference_executor().run(
+            self.summarize, text, max_length=max_length, min_length=min_length
+        )
+    
+    def summarize_batch(
+        self,
+        texts: List[str],
+        max_length: Optional[int] = None,
+        min_length: Optional[int] = None,
+        deadline: Optional[float] = None,
+        yield_to: Optional[Callable[[], bool]] = None
+    ) -> List[str]:
+        """Summarize several texts with a single batched generate call
+        
+        max_length/min_length are budgets of generated tokens, independent
+        of the input length. Generation is aborted with TimeoutError once
+        the deadline (a time.monotonic() value) passes. While yield_to()
+        returns True, decoding pauses between tokens (background work).
+        """
         if not self.is_loaded:
             raise RuntimeError("Model not loaded. Please check the model loading process.")
         
-        if not text.strip():
+        if not texts:
+            return []
+        
+        if any(not text.strip() for text in texts):
             raise ValueError("Input text cannot be empty")
         
         try:
@@ -68,45 +324,456 @@ class TextSummarizer:
             max_len = max_length or MAX_LENGTH
             min_len = min_length or MIN_LENGTH
             
-            # Create a prompt for summarization
-            prompt = f"Summarize the following text in a concise way:\n\n{text}\n\nSummary:"
+            with metrics.TOKENIZE_TIME.time():
+                if self.assistant is not None and len(texts) == 1:
+                    inputs = self._assisted_inputs(texts[0])
+                else:
+                    inputs = self._prepare_inputs(self._encode_prompts(texts))
+            return self._generate(inputs, max_len, min_len, deadline, yield_to)
             
-            # Generate summary
-            result = self.summarizer_pipeline(
-                prompt,
-                max_length=max_len,
-                min_length=min_len,
-                do_sample=True,
-                temperature=0.7,
-                top_p=0.9,
-                num_return_sequences=1,
-                pad_token_id=self.tokenizer.eos_token_id,
+        except Exception as e:
+            logger.error(f"Error during summarization: {e}")
+            raise e
+    
+    def summarize_many(
+        self,
+        requests: List[Tuple[str, Optional[int], Optional[int]]],
+        batch_size: int = BATCH_MAX_SIZE,
+        deadline: Optional[float] = None
+    ) -> List[Union[str, Exception]]:
+        """Summarize many (text, max_length, min_length) requests
+        
+        All prompts are tokenized in one pass, then generated in batches of
+        similar length that share generation parameters. Returns one entry
+        per request: the summary, or the exception that request raised
+        (TimeoutError for requests not finished by the deadline).
+        """
+        if not self.is_loaded:
+            raise RuntimeError("Model not loaded. Please check the model loading process.")
+        
+        results: List[Union[str, Exception, None]] = [None] * len(requests)
+        valid = []
+        for i, (text, _, _) in enumerate(requests):
+            if not text or not text.strip():
+                results[i] = ValueError("Input text cannot be empty")
+            else:
+                valid.append(i)
+        
+        if not valid:
+            return results
+        
+        with metrics.TOKENIZE_TIME.time():
+            token_ids = dict(zip(valid, self._encode_prompts([requests[i][0] for i in valid])))
+        
+        # Group by generation parameters, then sort by length to keep padding low
+        groups = {}
+        for i in valid:
+            _, max_length, min_length = requests[i]
+            groups.setdefault((max_length or MAX_LENGTH, min_length or MIN_LENGTH), []).append(i)
+        
+        for (max_len, min_len), indices in groups.items():
+            indices.sort(key=lambda i: len(token_ids[i]))
+            for start in range(0, len(indices), batch_size):
+                batch = indices[start:start + batch_size]
+                try:
+                    with metrics.TOKENIZE_TIME.time():
+                        inputs = self._prepare_inputs([token_ids[i] for i in batch])
+                    summaries = self._generate(inputs, max_len, min_len, deadline)
+                except TimeoutError as e:
+                    for i in batch:
+                        results[i] = e
+                    continue
+                except Exception as e:
+                    if len(batch) == 1:
+                        results[batch[0]] = e
+                        continue
+                    # Isolate the failing document by retrying one at a time
+                    logger.warning(f"Batch of {len(batch)} failed ({e}), retrying individually")
+                    for i in batch:
+                        try:
+                            results[i] = self.summarize(
+                                requests[i][0], max_length=max_len, min_length=min_len, deadline=deadline
+                            )
+                        except Exception as item_error:
+                            results[i] = item_error
+                    continue
+                for i, summary in zip(batch, summaries):
+                    results[i] = summary
+        
+        return results
+    
+    def _encode_prompts(self, texts: List[str]) -> List[List[int]]:
+        """Token ids of each prompt, without the cached prefix when the prefix cache is on"""
+        if self.prefix_cache is not None:
+            return self.tokenizer(
+                [text + self.prompt_suffix for text in texts],
+                add_special_tokens=False,
                 truncation=True
+            )["input_ids"]
+        return self.tokenizer([self._build_prompt(text) for text in texts], truncation=True)["input_ids"]
+    
+    def _prepare_inputs(self, token_ids: List[List[int]]) -> dict:
+        """Pad encoded prompts into generate() inputs on the model device"""
+        if self.prefix_cache is not None:
+            return self.prefix_cache.build_inputs(self.prompt_prefix, token_ids, self.tokenizer.pad_token_id)
+        return self.tokenizer.pad({"input_ids": token_ids}, return_tensors="pt").to(self.device)
+    
+    def _assisted_inputs(self, text: str) -> dict:
+        """Full-prompt inputs for assisted generation, which keeps its own caches instead of the prefix cache"""
+        return self.tokenizer([self._build_prompt(text)], return_tensors="pt", truncation=True).to(self.device)
+    
+    def _generate(
+        self,
+        inputs: dict,
+        max_len: int,
+        min_len: int,
+        deadline: Optional[float] = None,
+        yield_to: Optional[Callable[[], bool]] = None
+    ) -> List[str]:
+        """Run generate on prepared inputs and post-process each output"""
+        import torch
+        from transformers import StoppingCriteriaList
+        from stopping import DeadlineCriteria, StepTimer, YieldCriteria
+        
+        if deadline is not None and time.monotonic() >= deadline:
+            raise TimeoutError("Request deadline passed before generation started")
+        
+        prompt_length = inputs["input_ids"].shape[1]
+        timer = StepTimer()
+        criteria = [timer] + self._summary_stop_criteria(prompt_length, min_len)
+        deadline_criteria = None
+        if deadline is not None:
+            deadline_criteria = DeadlineCriteria(deadline)
+            criteria.append(deadline_criteria)
+        if yield_to is not None:
+            criteria.append(YieldCriteria(yield_to))
+        kwargs = self._generation_kwargs(max_len, min_len)
+        kwargs["stopping_criteria"] = StoppingCriteriaList(criteria)
+        # Assisted generation works on one sequence at a time and without the
+        # prefix cache; everything else decodes normally
+        assisted = (
+            self.assistant is not None
+            and inputs["input_ids"].shape[0] == 1
+            and "past_key_values" not in inputs
+        )
+        if assisted:
+            kwargs["assistant_model"] = self.assistant.draft_model
+            before = self.assistant.snapshot()
+        
+        start = time.perf_counter()
+        with torch.no_grad():
+            output_ids = self.model.generate(**inputs, **kwargs)
+        end = time.perf_counter()
+        self._record_generation(timer, start, end, inputs, output_ids)
+        if assisted:
+            self.assistant.record(before, output_ids.shape[1] - prompt_length, end - start)
+        
+        if deadline_criteria is not None and deadline_criteria.expired:
+            metrics.DEADLINE_EXPIRED.inc(stage="decode")
+            raise TimeoutError("Request deadline passed during generation")
+        
+        with metrics.POSTPROCESS_TIME.time():
+            # Decode only the generated part, the prompt never needs to be stripped
+            generated_texts = self.tokenizer.batch_decode(output_ids[:, prompt_length:], skip_special_tokens=True)
+            return [self._postprocess(generated_text) for generated_text in generated_texts]
+    
+    def _summary_stop_criteria(self, prompt_length: int, min_len: int) -> list:
+        """Criteria that end each row once its summary is complete (empty when early stopping is off)"""
+        if not EARLY_STOPPING:
+            return []
+        from stopping import SummaryStopCriteria
+        return [SummaryStopCriteria(self.tokenizer, prompt_length, min_len, self.stop_strings)]
+    
+    def _record_generation(self, timer, start: float, end: float, inputs: dict, output_ids):
+        """Split a generate call into prefill and decode time for the metrics"""
+        batch_size = output_ids.shape[0]
+        # Rows that stopped early are padded up to the longest one
+        generated = int((output_ids[:, inputs["input_ids"].shape[1]:] != self.tokenizer.pad_token_id).sum())
+        metrics.BATCH_SIZE.observe(batch_size)
+        metrics.GENERATE_TIME.observe(end - start)
+        metrics.GENERATED_TOKENS.inc(generated)
+        if timer.first_step is None:
+            # The model never called the stopping criteria
+            return
+        metrics.PREFILL_TIME.observe(timer.first_step - start)
+        decode_time = end - timer.first_step
+        metrics.DECODE_TIME.observe(decode_time)
+        if decode_time > 0 and timer.steps > 1:
+            metrics.TOKENS_PER_SECOND.observe(batch_size * (timer.steps - 1) / decode_time)
+    
+    def stream_summary(
+        self,
+        text: str,
+        max_length: Optional[int] = None,
+        min_length: Optional[int] = None,
+        cancel_event: Optional[threading.Event] = None
+    ) -> Iterator[str]:
+        """Yield generated text pieces as the model produces them
+        
+        Generation runs on the inference executor. Setting cancel_event (or
+        closing the iterator) stops decoding at the next token. The pieces
+        are raw model output; pass their concatenation to finish_stream()
+        for the cleaned summary.
+        """
+        from transformers import TextIteratorStreamer
+        
+        cancel_event = cancel_event or threading.Event()
+        streamer = TextIteratorStreamer(self.tokenizer, skip_prompt=True, skip_special_tokens=True)
+        future = self._start_stream(text, max_length, min_length, cancel_event, streamer)
+        try:
+            for piece in streamer:
+                if piece:
+                    yield piece
+        finally:
+            cancel_event.set()
+        
+        error = future.exception()
+        if error is not None:
+            logger.error(f"Error during streaming summarization: {error}")
+            raise error
+    
+    def stream_to(
+        self,
+        text: str,
+        emit: Callable[[Optional[str]], None],
+        max_length: Optional[int] = None,
+        min_length: Optional[int] = None,
+        cancel_event: Optional[threading.Event] = None,
+        deadline: Optional[float] = None,
+        on_start: Optional[Callable[[], None]] = None
+    ) -> Future:
+        """Stream like stream_summary, but push pieces to emit() instead of blocking a reader
+        
+        emit(piece) is called on the inference thread for every generated
+        piece and emit(None) once generation ends, however it ends, so it
+        must not block (loop.call_soon_threadsafe, for example). on_start()
+        is called when an inference worker picks the generation up. The
+        returned future fails with the generation error, if any, and with
+        TimeoutError once the deadline (a time.monotonic() value) passes.
+        """
+        from transformers import TextStreamer
+        
+        class CallbackStreamer(TextStreamer):
+            def on_finalized_text(self, text: str, stream_end: bool = False):
+                if text:
+                    emit(text)
+                if stream_end:
+                    emit(None)
+        
+        streamer = CallbackStreamer(self.tokenizer, skip_prompt=True, skip_special_tokens=True)
+        return self._start_stream(
+            text, max_length, min_length, cancel_event or threading.Event(), streamer, deadline, on_start
+        )
+    
+    def _start_stream(
+        self,
+        text: str,
+        max_length: Optional[int],
+        min_length: Optional[int],
+        cancel_event: threading.Event,
+        streamer,
+        deadline: Optional[float] = None,
+        on_start: Optional[Callable[[], None]] = None
+    ) -> Future:
+        """Submit a streamed generation to the inference executor; the streamer is ended however it finishes"""
+        if not self.is_loaded:
+            raise RuntimeError("Model not loaded. Please check the model loading process.")
+        
+        if not text.strip():
+            raise ValueError("Input text cannot be empty")
+        
+        import torch
+        from transformers import StoppingCriteriaList
+        from stopping import CancelCriteria, DeadlineCriteria
+        
+        def generate():
+            if on_start is not None:
+                on_start()
+            if deadline is not None and time.monotonic() >= deadline:
+                metrics.DEADLINE_EXPIRED.inc(stage="queued")
+                raise TimeoutError("Request deadline passed before generation started")
+            inputs = self.tokenizer(
+                [self._build_prompt(text)],
+                return_tensors="pt",
+                truncation=True
+            ).to(self.device)
+            min_len = min_length or MIN_LENGTH
+            kwargs = self._generation_kwargs(max_length or MAX_LENGTH, min_len)
+            kwargs["streamer"] = streamer
+            if self.assistant is not None:
+                kwargs["assistant_model"] = self.assistant.draft_model
+            criteria = [CancelCriteria(cancel_event)] + self._summary_stop_criteria(inputs["input_ids"].shape[1], min_len)
+            deadline_criteria = None
+            if deadline is not None:
+                deadline_criteria = DeadlineCriteria(deadline)
+                criteria.append(deadline_criteria)
+            kwargs["stopping_criteria"] = StoppingCriteriaList(criteria)
+            with torch.no_grad():
+                self.model.generate(**inputs, **kwargs)
+            if deadline_criteria is not None and deadline_criteria.expired:
+                metrics.DEADLINE_EXPIRED.inc(stage="decode")
+                raise TimeoutError("Request deadline passed during generation")
+        
+        def on_done(future):
+            # generate() only ends the streamer when it finishes normally
+            if future.cancelled() or future.exception() is not None:
+                streamer.end()
+        
+        future = get_inference_executor().submit(generate)
+        future.add_done_callback(on_done)
+        return future
+    
+    def finish_stream(self, generated_text: str) -> str:
+        """Turn the concatenated output of stream_summary into the final summary"""
+        return self._postprocess(generated_text)
+    
+    def summarize_long(
+        self,
+        text: str,
+        max_length: Optional[int] = None,
+        min_length: Optional[int] = None,
+        deadline: Optional[float] = None,
+        yield_to: Optional[Callable[[], bool]] = None
+    ) -> str:
+        """Summarize a document of any length with chunked map-reduce
+        
+        The text is split into sentence-aligned chunks that fit the chunk
+        token budget, the chunks are summarized in batches (map) and the
+        partial summaries are combined and summarized again (reduce) until
+        they fit in a single prompt. If that takes more than
+        LONG_DOC_MAX_ROUNDS rounds, the remaining chunks are summarized
+        separately and joined. Texts that already fit go straight to a
+        normal summarization.
+        """
+        if not self.is_loaded:
+            raise RuntimeError("Model not loaded. Please check the model loading process.")
+        
+        if not text.strip():
+            raise ValueError("Input text cannot be empty")
+        
+        chunks = self._chunk_text(text, LONG_DOC_CHUNK_TOKENS)
+        if len(chunks) == 1:
+            return self.summarize(
+                text, max_length=max_length, min_length=min_length, deadline=deadline, yield_to=yield_to
             )
+        
+        for round_number in range(1, LONG_DOC_MAX_ROUNDS + 1):
+            logger.info(f"Long document round {round_number}: summarizing {len(chunks)} chunks")
+            partials = []
+            for i in range(0, len(chunks), BATCH_MAX_SIZE):
+                partials.extend(self.summarize_batch(
+                    chunks[i:i + BATCH_MAX_SIZE],
+                    max_length=LONG_DOC_PARTIAL_TOKENS,
+                    # Target length: each partial stops at the first sentence end after it
+                    min_length=LONG_DOC_PARTIAL_TOKENS // 2,
+                    deadline=deadline,
+                    yield_to=yield_to
+                ))
             
-            # Extract the generated text
-            generated_text = result[0]['generated_text']
-            
-            # Extract only the summary part (after "Summary:")
-            if "Summary:" in generated_text:
-                summary = generated_text.split("Summary:")[-1].strip()
-            else:
-                # Fallback: take the last part of generated text
-                summary = generated_text[len(prompt):].strip()
-            
-            # Clean up the summary
-            summary = self._clean_summary(summary)
-            
-            return summary
+            combined = " ".join(p for p in partials if p.strip())
+            chunks = self._chunk_text(combined, LONG_DOC_CHUNK_TOKENS)
+            if len(chunks) == 1:
+                break
+        
+        # Normally one chunk is left. If the rounds ran out first, every remaining
+        # chunk is summarized and the summaries joined, so no part of the text is dropped
+        if len(chunks) > 1:
+            logger.warning(
+                f"Long document still has {len(chunks)} chunks after {LONG_DOC_MAX_ROUNDS} rounds, "
+                "joining their summaries"
+            )
+        summaries = []
+        for i in range(0, len(chunks), BATCH_MAX_SIZE):
+            summaries.extend(self.summarize_batch(
+                chunks[i:i + BATCH_MAX_SIZE],
+                max_length=max_length or MAX_LENGTH,
+                min_length=min_length or MIN_LENGTH,
+                deadline=deadline,
+                yield_to=yield_to
+            ))
+        return " ".join(summary for summary in summaries if summary.strip())
+    
+    def _chunk_text(self, text: str, max_tokens: int) -> List[str]:
+        """Split text into sentence-aligned chunks of at most max_tokens tokens"""
+        sentences = [s for s in SENTENCE_BOUNDARY.split(" ".join(text.split())) if s]
+        if not sentences:
+            return [text]
+        
+        # Tokenize every sentence in one pass
+        sentence_ids = self.tokenizer(sentences, add_special_tokens=False)["input_ids"]
+        
+        chunks = []
+        current = []
+        current_tokens = 0
+        for sentence, ids in zip(sentences, sentence_ids):
+            if len(ids) > max_tokens:
+                # A single oversized sentence is split on token boundaries
+                if current:
+                    chunks.append(" ".join(current))
+                    current, current_tokens = [], 0
+                for start in range(0, len(ids), max_tokens):
+                    chunks.append(self.tokenizer.decode(ids[start:start + max_tokens]).strip())
+                continue
             
-        except Exception as e:
-            logger.error(f"Error during summarization: {e}")
-            raise e
+            if current and current_tokens + len(ids) > max_tokens:
+                chunks.append(" ".join(current))
+                current, current_tokens = [], 0
+            current.append(sentence)
+            current_tokens += len(ids)
+        
+        if current:
+            chunks.append(" ".join(current))
+        return chunks
+    
+    def count_tokens(self, text: str) -> int:
+        """Return the number of prompt tokens the model will see for this text"""
+        return len(self.tokenizer(self._build_prompt(text), truncation=True)["input_ids"])
+    
+    def _build_prompt(self, text: str) -> str:
+        """Create the summarization prompt for a single text"""
+        return f"{self.prompt_prefix}{text}{self.prompt_suffix}"
+    
+    @property
+    def generation_mode(self) -> str:
+        """Name of the decoding strategy"""
+        return "greedy" if self.deterministic else "sample"
+    
+    @property
+    def cache_tag(self) -> str:
+        """Settings that change the output for a given input, part of the result cache key"""
+        template_hash = hashlib.sha1(self.prompt_template.encode("utf-8")).hexdigest()[:8]
+        stopping = "stop" if EARLY_STOPPING else "full"
+        return f"{self.generation_mode}:{self.precision}:{self.backend.name}:{template_hash}:{stopping}"
+    
+    def _generation_kwargs(self, max_len: int, min_len: int) -> dict:
+        """Keyword arguments shared by every generate call"""
+        kwargs = {
+            # Budgets count generated tokens only, so long inputs don't eat the output allowance
+            "max_new_tokens": max_len,
+            "min_new_tokens": min(min_len, max_len),
+            "num_return_sequences": 1,
+            "pad_token_id": self.tokenizer.pad_token_id
+        }
+        if self.deterministic:
+            # Greedy search tends to loop, block repeated trigrams instead
+            kwargs.update(do_sample=False, no_repeat_ngram_size=3)
+        else:
+            kwargs.update(do_sample=True, temperature=0.7, top_p=0.9)
+        return kwargs
+    
+    def _postprocess(self, generated_text: str) -> str:
+        """Turn generated text (without the prompt) into the final summary"""
+        # Drop a new prompt block the model started before it was stopped
+        for stop in self.stop_strings:
+            generated_text = generated_text.split(stop, 1)[0]
+        return self._clean_summary(generated_text.strip())
     
     def _clean_summary(self, summary: str) -> str:
         """Clean and format the generated summary"""
         # Remove any remaining prompt text
-        summary = summary.replace("Summarize the following text in a concise way:", "").strip()
+        instruction = self.prompt_prefix.strip()
+        if instruction:
+            summary = summary.replace(instruction, "").strip()
         
         # Remove incomplete trailing sentence
         sentences = summary.split('.')
@@ -124,7 +791,21 @@ class TextSummarizer:
         return {
             "model_name": self.model_name,
             "is_loaded": self.is_loaded,
-            "device": "cuda" if torch.cuda.is_available() else "cpu",
+            "status": self.status,
+            "load_time": self.load_time,
+            "load_peak_rss_mb": self.load_peak_rss_mb,
+            "load_rss_delta_mb": self.load_rss_delta_mb,
+            "snapshot": self.snapshot,
+            "load_count": self.load_count,
+            "unload_count": self.unload_count,
+            "device": self.device,
+            "precision": self.precision,
+            "backend": self.backend.name,
+            "generation_mode": self.generation_mode,
             "max_length": MAX_LENGTH,
-            "min_length": MIN_LENGTH
+            "min_length": MIN_LENGTH,
+            "long_doc_chunk_tokens": LONG_DOC_CHUNK_TOKENS,
+            "prompt_template": self.prompt_template,
+            "prefix_cache": self.prefix_cache.get_stats() if self.prefix_cache is not None else None,
+            "assisted_generation": self.assistant.get_stats() if self.assistant is not None else None
         }
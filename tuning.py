@@ -0,0 +1,83 @@
+"""
+CPU thread settings written by autotune.py
+
+The tuning file holds the best workers x threads-per-worker x pinning
+combination measured on this host. Settings given explicitly in the
+environment (or .env) take precedence over the file, and the file is
+ignored when it was measured on a host with a different number of CPUs.
+"""
+
+import json
+import logging
+import os
+from typing import Optional, Tuple
+
+from config import TUNING_FILE, WORKERS, THREADS_PER_WORKER, PIN_WORKER_CPUS
+from prefork import available_cpus
+
+logger = logging.getLogger(__name__)
+
+_threads_configured = False
+
+
+def load_tuning(path: str = TUNING_FILE) -> Optional[dict]:
+    """The tuning file's settings, None if there is no usable file"""
+    if not path or not os.path.isfile(path):
+        return None
+    try:
+        with open(path, encoding="utf-8") as f:
+            tuning = json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Ignoring unreadable tuning file {path}: {e}")
+        return None
+    cpus = len(available_cpus())
+    if tuning.get("cpus") != cpus:
+        logger.warning(f"Ignoring tuning file {path}: tuned for {tuning.get('cpus')} CPUs, this host has {cpus}")
+        return None
+    return tuning
+
+
+def worker_settings(path: str = TUNING_FILE) -> Tuple[int, int, bool]:
+    """(workers, threads_per_worker, pin_worker_cpus) to serve with"""
+    tuning = load_tuning(path) or {}
+
+    def pick(env: str, key: str, default):
+        if os.getenv(env) is None and key in tuning:
+            return tuning[key]
+        return default
+
+    return (
+        pick("WORKERS", "workers", WORKERS),
+        pick("THREADS_PER_WORKER", "threads_per_worker", THREADS_PER_WORKER),
+        pick("PIN_WORKER_CPUS", "pin_worker_cpus", PIN_WORKER_CPUS),
+    )
+
+
+def configure_threads(threads: Optional[int] = None):
+    """Set torch's thread counts, once per process
+
+    Only server entry points call this: the lifespan hook with threads=None
+    (THREADS_PER_WORKER or the tuning file) and forked workers with their
+    share of the cores. The first call wins, so the lifespan hook never
+    overrides a forked worker's count. Other callers (batch_summarize.py
+    workers, benchmarks) keep whatever threads they set themselves. Never
+    pins: pinning the parent would shrink the CPU set its workers are
+    planned over.
+    """
+    global _threads_configured
+    if _threads_configured:
+        return
+    if threads is None:
+        _, threads, _ = worker_settings()
+    if not threads:
+        return
+    _threads_configured = True
+    import torch
+
+    torch.set_num_threads(threads)
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        # Only allowed before the first parallel region
+        pass
+    logger.info(f"Using {threads} torch thread(s)")